@@ -0,0 +1,191 @@
+import handler_vars
+import main_customize
+
+# ACHIEVEMENTS FROM main_customize.thisgame_achievements
+# EACH ENTRY IS COMPILED ONCE INTO PREDICATES AND INDEXED BY THE VARIABLES IT READS; handler_vars CALLS BACK ONLY WHEN ONE OF
+# THOSE VARIABLES IS WRITTEN, SO A WRITE RE-CHECKS ONLY THE ACHIEVEMENTS THAT DEPEND ON IT AND COST FOLLOWS CHANGES, NOT ACHIEVEMENT COUNT
+# AN UNLOCK SETS THE ACHIEVEMENT'S FLAG VARIABLE (IF ONE IS DECLARED) RIGHT AWAY AND IS ANNOUNCED ONCE, FROM dispatch_unlocks() ON THE MAIN THREAD
+# ONCE MEANS ONCE PER TRACKER: A ROLLBACK RESTORE CAN CLEAR THE FLAG AND THE RE-SIMULATED FRAMES UNLOCK IT AGAIN, BUT ONLY THE FIRST UNLOCK IS ANNOUNCED
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+import operator
+import re
+import threading
+
+# "gold>1000", "health >= 50", "level==3"
+CONDITION_PATTERN = re.compile(r'^\s*([A-Za-z_]\w*)\s*(>=|<=|==|!=|>|<)\s*(-?\d+(?:\.\d+)?)\s*$')
+CONDITION_OPERATORS = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    "<": operator.lt
+}
+ACHIEVEMENT_FIELDS = ("id", "name", "description")
+
+@dataclass
+class Condition:
+    var_name: str
+    op: str
+    threshold: float
+    test: Callable = field(repr=False)
+
+    def check(self) -> bool:
+        return self.test(handler_vars.vars_getLive(self.var_name), self.threshold)
+
+@dataclass
+class Achievement:
+    achievement_id: str
+    conditions: List[Condition]
+    fields: Dict[str, str] = field(default_factory=dict)
+    unlocked: bool = False
+
+    def is_met(self) -> bool:
+        """Every condition has to hold"""
+        for condition in self.conditions:
+            if not condition.check():
+                return False
+        return True
+
+def parse_achievement(entry: str) -> Achievement:
+    """
+    Compile one declaration such as "id=wowrich::gold>1000"; several conditions ("::gold>1000::ore>=10") must all hold
+    :param entry: Declaration string from main_customize.thisgame_achievements
+    :return: Achievement with its compiled conditions
+    :raises ValueError: If the entry has no id, no condition, or a field that is neither
+    """
+    fields = {}
+    conditions = []
+    for part in entry.split("::"):
+        match = CONDITION_PATTERN.match(part)
+        if match:
+            var_name, op, threshold = match.groups()
+            conditions.append(Condition(var_name, op, float(threshold), CONDITION_OPERATORS[op]))
+            continue
+        key, separator, value = part.partition("=")
+        if not separator or key not in ACHIEVEMENT_FIELDS:
+            raise ValueError(f"Achievement field '{part}' in '{entry}' is not a condition or one of {ACHIEVEMENT_FIELDS}")
+        fields[key] = value
+    if not fields.get("id"):
+        raise ValueError(f"Achievement '{entry}' has no id")
+    if not conditions:
+        raise ValueError(f"Achievement '{entry}' has no condition")
+    return Achievement(fields["id"], conditions, fields)
+
+class AchievementTracker:
+    def __init__(self, entries: Optional[tuple] = None):
+        """
+        :param entries: Declaration strings; defaults to main_customize.thisgame_achievements
+        """
+        self.lock = threading.RLock()  # Watched writes can arrive from the threaded var handler; unlocking sets a flag, which re-enters
+        self.achievements: Dict[str, Achievement] = {}
+        self.watching: Dict[str, List[Achievement]] = {}  # Var name -> locked achievements that read it
+        self.pending_unlocks = deque()
+        self.announced = set()  # Ids already passed to the listeners; survives rollback restores and loads
+        self.listeners: List[Callable[[str], None]] = []
+
+        for entry in main_customize.thisgame_achievements if entries is None else entries:
+            achievement = parse_achievement(entry)
+            if achievement.achievement_id in self.achievements:
+                raise ValueError(f"Achievement id '{achievement.achievement_id}' is declared twice")
+            for condition in achievement.conditions:
+                if handler_vars.returnVarNameIndex(condition.var_name) == -1:
+                    print(f"Achievement {achievement.achievement_id} reads '{condition.var_name}', which handler_vars does not declare")
+            self.achievements[achievement.achievement_id] = achievement
+
+        handler_vars.vars_addBulkListener(self.recheck_all)
+        self.recheck_all()
+
+    def _index(self, achievement: Achievement) -> None:
+        for condition in achievement.conditions:
+            dependents = self.watching.get(condition.var_name)
+            if dependents is None:
+                dependents = self.watching[condition.var_name] = []
+                handler_vars.vars_watch(condition.var_name, self._on_write)
+            if achievement not in dependents:
+                dependents.append(achievement)
+
+    def _unindex(self, achievement: Achievement) -> None:
+        """Unlocked achievements stop costing anything; a variable nobody depends on any more is unwatched"""
+        for condition in achievement.conditions:
+            dependents = self.watching.get(condition.var_name)
+            if dependents is None or achievement not in dependents:
+                continue
+            dependents.remove(achievement)
+            if not dependents:
+                del self.watching[condition.var_name]
+                handler_vars.vars_unwatch(condition.var_name, self._on_write)
+
+    def _on_write(self, var_name: str) -> None:
+        with self.lock:
+            for achievement in tuple(self.watching.get(var_name, ())):
+                if achievement.is_met():
+                    self._unlock(achievement)
+
+    def _unlock(self, achievement: Achievement) -> None:
+        achievement.unlocked = True
+        self._unindex(achievement)
+        self.pending_unlocks.append(achievement.achievement_id)
+        if handler_vars.returnVarKind(achievement.achievement_id) == handler_vars.VAR_FLAG:
+            handler_vars.vars_setFlag(achievement.achievement_id, True)
+
+    def recheck_all(self) -> None:
+        """After a load or reset: take unlocks from the flag variables, rebuild the index and evaluate everything once"""
+        with self.lock:
+            for var_name in self.watching:
+                handler_vars.vars_unwatch(var_name, self._on_write)
+            self.watching = {}
+            for achievement in self.achievements.values():
+                if handler_vars.returnVarKind(achievement.achievement_id) == handler_vars.VAR_FLAG:
+                    achievement.unlocked = handler_vars.vars_getLiveFlag(achievement.achievement_id)
+                if not achievement.unlocked:
+                    self._index(achievement)
+            for achievement in self.achievements.values():
+                if not achievement.unlocked and achievement.is_met():
+                    self._unlock(achievement)
+
+    def add_listener(self, callback: Callable[[str], None]) -> None:
+        """callback(achievement_id) runs once per unlock, from dispatch_unlocks()"""
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[str], None]) -> None:
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def dispatch_unlocks(self) -> None:
+        """Announce unlocks since the last call; call from the main thread once per frame"""
+        while self.pending_unlocks:
+            achievement_id = self.pending_unlocks.popleft()
+            if achievement_id in self.announced:
+                continue
+            self.announced.add(achievement_id)
+            for callback in tuple(self.listeners):
+                try:
+                    callback(achievement_id)
+                except Exception as e:
+                    print(f"Error in achievement listener for {achievement_id}: {e}")
+
+    def is_unlocked(self, achievement_id: str) -> bool:
+        achievement = self.achievements.get(achievement_id)
+        return achievement is not None and achievement.unlocked
+
+    def get_unlocked(self) -> List[str]:
+        return [achievement_id for achievement_id, achievement in self.achievements.items() if achievement.unlocked]
+
+# Global achievement tracker instance
+achievement_tracker = None
+
+def get_achievement_tracker() -> AchievementTracker:
+    """Get the global achievement tracker, compiling the declarations on first use"""
+    global achievement_tracker
+    if achievement_tracker is None:
+        achievement_tracker = AchievementTracker()
+    return achievement_tracker
+
+def dispatch_unlocks() -> None:
+    """Per-frame hook; does nothing until the tracker exists"""
+    if achievement_tracker is not None:
+        achievement_tracker.dispatch_unlocks()
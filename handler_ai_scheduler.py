@@ -0,0 +1,199 @@
+import handler_npc
+import numpy as np
+
+# LEVEL-OF-DETAIL AI SCHEDULING FOR NPCS
+# THE ACTIVE NPCS ARE SORTED INTO TIERS BY THEIR DISTANCE TO THE NEAREST FOCUS POINT (PLAYER, CAMERA, ...) WITH ARRAY PASSES, A ROTATING
+# SHARE OF THEM EACH FRAME SO THE CLASSIFICATION COST IS SPREAD OVER classify_frames FRAMES
+# NEAR NPCS THINK EVERY FRAME, MID-RANGE NPCS EVERY FEW FRAMES AND FAR ONES RARELY; EACH THINK IS GIVEN THE TIME SINCE THAT NPC LAST THOUGHT
+# A HARD PER-FRAME TIME BUDGET CAPS THE WHOLE update, THE ARRAY PASS AND BOOKKEEPING INCLUDED, NOT ONLY THE THINKS
+# WHOEVER IS DUE BUT DOES NOT FIT KEEPS WAITING, AND SINCE DUE NPCS GO IN ORDER OF HOW
+# OVERDUE THEY ARE (FRAMES WAITED / TIER INTERVAL), THE ONES LEFT OVER ARE AT THE FRONT OF THE LINE NEXT FRAME (ROUND-ROBIN CARRY-OVER)
+# AND AN OVERLOADED FRAME SLOWS EVERY TIER DOWN TOGETHER INSTEAD OF STARVING THE FAR ONES
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Optional, Sequence, Tuple
+import time
+
+TIER_NEAR = 0
+TIER_MID = 1
+TIER_FAR = 2
+TIER_NAMES = ("near", "mid", "far")
+
+@dataclass
+class AIFrameStats:
+    frame: int
+    updated: Tuple[int, int, int]   # NPCs that thought this frame, per tier
+    deferred: Tuple[int, int, int]  # NPCs that were due but did not fit in the budget, per tier
+    elapsed_ms: float
+
+class AIScheduler:
+    def __init__(self, near_radius: float = 600.0, mid_radius: float = 1500.0, intervals: Sequence[int] = (1, 4, 30),
+                 budget_ms: float = 2.0, think: Optional[Callable] = None, store=None, history: int = 120, classify_frames: int = 4):
+        """
+        :param near_radius: NPCs this close to a focus point are in the near tier
+        :param mid_radius: NPCs beyond near_radius but this close are mid; everyone else is far
+        :param intervals: Frames between thinks for the near, mid and far tiers
+        :param budget_ms: Hard cap on the time update takes per frame, classification and bookkeeping included
+        :param think: think(npc, delta_time) for one NPC; defaults to npcObject.ai_think
+        :param history: Frames of AIFrameStats kept in self.history
+        :param classify_frames: Frames over which every NPC's tier is refreshed once; the others keep their last tier meanwhile
+        """
+        self.store = handler_npc.get_npc_store() if store is None else store
+        self.near_radius = near_radius
+        self.mid_radius = mid_radius
+        self.intervals = np.array(intervals, np.int32)
+        # OVERDUE RATIOS (FRAMES WAITED / INTERVAL) THAT DIFFER, DIFFER BY AT LEAST 1 / LONGEST INTERVAL SQUARED; TIE-BREAKS STAY BELOW A TENTH OF THAT
+        self.tie_scale = 0.1 / float(self.intervals.max()) ** 2 / 3
+        self.jitter = np.zeros(0)
+        self.budget_ms = budget_ms
+        self.think = think
+        self.classify_frames = classify_frames
+        self.classify_next = 0 # WHERE IN THE ID ARRAY NEXT FRAME'S SHARE OF CLASSIFICATION STARTS
+        self.focus = np.zeros((0, 2), np.float64)
+        self.frame = 0
+        self.clock = 0.0 # SECONDS OF delta_time SUMMED OVER EVERY update; THE store.ai_time STAMPS ARE ON THIS CLOCK
+        self.history: Deque[AIFrameStats] = deque(maxlen=history)
+        self.last_stats = AIFrameStats(0, (0, 0, 0), (0, 0, 0), 0.0)
+        # ESTIMATES START CAUTIOUS AND DECAY TOWARDS WHAT IS MEASURED WITHIN A FEW FRAMES
+        self.think_s = budget_ms / 1000 / 20 # ESTIMATED COST OF THE SLOWEST THINK, SO THE LAST THINK STARTED STILL ENDS INSIDE THE BUDGET
+        self.think_mean_s = 0.0 # AVERAGE COST OF A THINK, FOR GUESSING HOW MANY WILL FIT; 0 UNTIL SOMETHING HAS THOUGHT
+        self.tail_s = budget_ms / 1000 / 20 # ESTIMATED COST OF THE BOOKKEEPING AFTER THE THINK LOOP
+
+    def set_focus(self, points) -> None:
+        """Positions the AI detail is centred on, as (x, y) pairs; call each frame with the player and camera. With no focus every NPC is near"""
+        self.focus = np.asarray(points, np.float64).reshape(-1, 2)
+
+    def classify(self, ids: np.ndarray) -> np.ndarray:
+        """Tier of each id, from its distance to the nearest focus point"""
+        if len(self.focus) == 0:
+            return np.zeros(len(ids), np.int8)
+        xs, ys = self.store.x[ids], self.store.y[ids]
+        nearest = np.full(len(ids), np.inf)
+        for fx, fy in self.focus.tolist():
+            np.minimum(nearest, (xs - fx) ** 2 + (ys - fy) ** 2, out=nearest)
+        tiers = np.full(len(ids), TIER_FAR, np.int8)
+        tiers[nearest <= self.mid_radius * self.mid_radius] = TIER_MID
+        tiers[nearest <= self.near_radius * self.near_radius] = TIER_NEAR
+        return tiers
+
+    def update(self, ids, delta_time: float) -> AIFrameStats:
+        """
+        Run one frame of AI over the active NPCs
+        :param ids: Ids of every active NPC; only read before any NPC thinks, so a live view such as NPCGroup.active_ids is fine
+        :return: Per-tier counts for this frame, also kept in last_stats and history
+        """
+        start = time.perf_counter()
+        store = self.store
+        self.frame += 1
+        self.clock += delta_time
+        ids = np.asarray(ids)
+        # STAMPS OF THE LAST THINK RATHER THAN PER-NPC COUNTERS, SO NOTHING HAS TO BE WRITTEN FOR EVERY NPC EACH FRAME
+        last = store.ai_frame[ids]
+        fresh = last < 0
+        if fresh.any():
+            # JUST BECAME ACTIVE: TREATED AS HAVING THOUGHT LAST FRAME, NOT WHENEVER IT LAST THOUGHT BEFORE
+            store.ai_frame[ids[fresh]] = self.frame - 1
+            store.ai_time[ids[fresh]] = self.clock - delta_time
+            last = store.ai_frame[ids]
+
+        # ONLY THIS FRAME'S SHARE IS CLASSIFIED; EVERYONE ELSE KEEPS THE TIER STORED IN ai_tier
+        share = -(-len(ids) // self.classify_frames)
+        first = self.classify_next if self.classify_next < len(ids) else 0
+        batch = ids[first:first + share]
+        store.ai_tier[batch] = self.classify(batch)
+        self.classify_next = first + share
+        tiers = store.ai_tier[ids]
+        overdue = (self.frame - last) / np.take(self.intervals, tiers) # FRAMES WAITED / TIER INTERVAL; DUE FROM 1 UP
+        due = overdue >= 1
+        ids, tiers, overdue = ids[due], tiers[due], overdue[due]
+        due_counts = np.bincount(tiers, minlength=3)
+
+        # THE DEADLINE COUNTS FROM start, SO THE ARRAY PASS ABOVE IS ALREADY CHARGED; ROOM IS LEFT FOR ONE MORE THINK AND THE BOOKKEEPING BELOW
+        deadline = start + self.budget_ms / 1000 - self.think_s - self.tail_s
+        # ONE KEY: MOST OVERDUE FIRST, ON A TIE THE NEARER TIER, THEN A FIXED RANDOM JITTER; WITHOUT THE JITTER A CROWD OF EQUALLY
+        # OVERDUE FAR NPCS GIVES THOUSANDS OF EQUAL KEYS, WHICH MAKES argpartition SLOW
+        if len(self.jitter) < len(ids):
+            self.jitter = np.random.default_rng(0).random(2 * len(ids))
+        key = (tiers + self.jitter[:len(ids)]) * self.tie_scale - overdue
+        # ONLY THE MOST OVERDUE NPCS THAT CAN FIT IN WHAT IS LEFT ARE PICKED OUT AND SORTED, NOT EVERY DUE NPC
+        fit = len(ids)
+        think_cost = self.think_mean_s or self.think_s
+        if think_cost > 0:
+            fit = min(fit, max(0, int((deadline - time.perf_counter()) / think_cost) + 1))
+        picked = np.argpartition(key, fit)[:fit] if fit < len(ids) else np.arange(len(ids))
+        picked = picked[np.argsort(key[picked])]
+
+        think = self.think
+        done = 0
+        longest = 0.0
+        now = loop_start = time.perf_counter()
+        for npc_id in ids[picked].tolist():
+            if now >= deadline:
+                break
+            npc = store.view(npc_id)
+            wait = self.clock - float(store.ai_time[npc_id])
+            store.ai_time[npc_id] = self.clock
+            store.ai_frame[npc_id] = self.frame
+            if think is None:
+                npc.ai_think(wait)
+            else:
+                think(npc, wait)
+            done += 1
+            before, now = now, time.perf_counter()
+            longest = max(longest, now - before)
+        loop_end = now
+
+        updated = np.bincount(tiers[picked[:done]], minlength=3)
+        deferred = due_counts - updated
+        end = time.perf_counter()
+        # SLOWLY DECAYING MAXIMUMS: A SLOW FRAME RAISES THE ESTIMATES AT ONCE, FAST ONES LOWER THEM GRADUALLY
+        self.think_s = max(longest, self.think_s * 0.9)
+        self.tail_s = max(end - loop_end, self.tail_s * 0.9)
+        if done:
+            self.think_mean_s = (loop_end - loop_start) / done
+        self.last_stats = AIFrameStats(self.frame, tuple(updated.tolist()), tuple(deferred.tolist()), (end - start) * 1000)
+        self.history.append(self.last_stats)
+        return self.last_stats
+
+# Global AI scheduler
+ai_scheduler = None
+
+def get_ai_scheduler() -> AIScheduler:
+    global ai_scheduler
+    if ai_scheduler is None:
+        ai_scheduler = AIScheduler()
+    return ai_scheduler
+
+def benchmark_scheduler(npc_count: int = 20000, frames: int = 120, think_us: float = 5.0) -> None:
+    """Every NPC thinking every frame versus the tiered, budgeted scheduler, with a think that costs think_us"""
+    store = handler_npc.NPCStore(npc_count)
+    ids = store.allocate_many(npc_count)
+    rng = np.random.default_rng(2)
+    store.x[ids] = rng.uniform(0, 20000, npc_count)
+    store.y[ids] = rng.uniform(0, 20000, npc_count)
+    def think(npc, delta_time):
+        end = time.perf_counter() + think_us / 1e6
+        while time.perf_counter() < end:
+            pass
+
+    start = time.perf_counter()
+    for npc_id in ids[:2000].tolist():
+        think(store.view(npc_id), 1 / 60)
+    flat_ms = (time.perf_counter() - start) * 1000 * npc_count / 2000
+
+    scheduler = AIScheduler(think=think, store=store)
+    scheduler.set_focus([(10000, 10000)])
+    elapsed = []
+    for x in range(frames):
+        elapsed.append(scheduler.update(ids, 1 / 60).elapsed_ms)
+    worst = max(elapsed)
+    over = sum(ms > scheduler.budget_ms for ms in elapsed)
+    totals = np.sum([stats.updated for stats in scheduler.history], axis=0) / len(scheduler.history)
+    print(f"{npc_count} NPCs, every one every frame: ~{flat_ms:.1f} ms per frame")
+    print(f"scheduled with a {scheduler.budget_ms} ms budget: worst frame {worst:.2f} ms ({over} of {frames} over), average thinks per frame "
+          + ", ".join(f"{name} {count:.0f}" for name, count in zip(TIER_NAMES, totals))
+          + f", last frame deferred {scheduler.last_stats.deferred}")
+
+if __name__ == "__main__":
+    benchmark_scheduler()
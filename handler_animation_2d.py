@@ -56,7 +56,7 @@ class Animation:
         self.current_angle = start_angle
         
         # Store original image for rotation
-        self.original_image = sprite.image
+        self.original_image = getattr(sprite, 'image', None)
         
         # Callback functions
         self.on_complete = on_complete
@@ -86,6 +86,16 @@ class Animation:
             else:
                 self.total_angle = diff - 360
 
+    def apply_position(self, new_x: float, new_y: float) -> None:
+        """Move the animated sprite to an interpolated position"""
+        self.sprite.rect.topleft = (new_x, new_y)
+
+class OffsetAnimation(Animation):
+    """Tweens the offset of a GUI container (Panels, Popups, Layers) instead of a sprite rect.
+    Children are drawn relative to the container, so one offset moves every widget inside it."""
+    def apply_position(self, new_x: float, new_y: float) -> None:
+        self.sprite.set_offset(round(new_x), round(new_y))
+
 class AnimationManager:
     def __init__(self):
         self.animations: Dict[int, Animation] = {}
@@ -172,6 +182,39 @@ class AnimationManager:
         self.next_animation_id += 1
         return animation_id
 
+    def create_offset_animation(self,
+                               container,
+                               end_offset: Tuple[int, int],
+                               duration: float,
+                               ease_type: EaseType = EaseType.LINEAR,
+                               on_complete: Optional[Callable[[int], None]] = None,
+                               on_cancel: Optional[Callable[[int], None]] = None,
+                               on_pause: Optional[Callable[[int], None]] = None,
+                               on_resume: Optional[Callable[[int], None]] = None) -> int:
+        """Creates an animation that slides a panel, popup or layer by tweening its offset
+        
+        Args:
+            container: Any GUI container with get_offset/set_offset
+            end_offset: Target offset in pixels
+            duration: Animation duration in seconds
+            ease_type: Type of easing to apply
+            on_complete: Callback when animation completes normally
+            on_cancel: Callback when animation is cancelled
+            on_pause: Callback when animation is paused
+            on_resume: Callback when animation is resumed
+        """
+        start_offset = container.get_offset()
+        
+        animation = OffsetAnimation(
+            container, start_offset, end_offset, duration, ease_type,
+            on_complete=on_complete, on_cancel=on_cancel,
+            on_pause=on_pause, on_resume=on_resume
+        )
+        animation_id = self.next_animation_id
+        self.animations[animation_id] = animation
+        self.next_animation_id += 1
+        return animation_id
+
     def update(self, delta_time: float) -> None:
         """Updates all active animations"""
         completed_animations = []
@@ -227,7 +270,7 @@ class AnimationManager:
                 setattr(animation.sprite, 'rotation', new_angle)
             
             # Update sprite position
-            animation.sprite.rect.topleft = (new_x, new_y)
+            animation.apply_position(new_x, new_y)
             
             if progress >= 1.0:
                 animation.is_complete = True
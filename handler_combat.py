@@ -0,0 +1,181 @@
+import numpy as np
+
+# BATCHED COMBAT: DAMAGE AND HEALING ARE QUEUED AS EVENTS DURING THE FRAME AND RESOLVED TOGETHER ONCE PER FRAME
+# resolve() MITIGATES DAMAGE BY EACH TARGET'S ARMOR, NETS EVERY TARGET'S DAMAGE AND HEALING, SPENDS ANY shield, APPLIES THE REST TO THE STORE'S hp COLUMN
+# IN ONE ARRAY PASS AND ONLY THEN HANDS THE DEATHS BACK, SO A 200-PROJECTILE AoE IS 200 ROWS IN A FEW ARRAYS AND ONE COMBAT EVENT,
+# NOT 200 CALL CHAINS EACH ENDING IN ITS OWN killMe
+# EACH NPCStore OWNS ONE RESOLVER (NPCStore.combat); npcObject.damageMe / healMe QUEUE INTO IT AND handler_npc_minder RESOLVES IT
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+ARMOR_SCALE = 100.0 # DAMAGE TAKEN = DAMAGE * ARMOR_SCALE / (ARMOR_SCALE + ARMOR): 100 ARMOR HALVES DAMAGE, AND ARMOR NEVER MAKES ANYONE IMMUNE
+
+@dataclass
+class CombatResult:
+    """Everything one resolve() did, for listeners (HUD, audio, floating numbers, achievements)"""
+    targets: np.ndarray      # Every NPC that took part, once each
+    damage: np.ndarray       # Damage taken after armor, parallel to targets; shields absorbed part of it
+    healing: np.ndarray      # Healing received, parallel to targets
+    deaths: np.ndarray       # Targets that went from above zero hp to zero or below
+    killers: np.ndarray      # Source of the last hit on each death, parallel to deaths; -1 when unknown
+    event_count: int = 0
+    damage_by_type: Dict[str, float] = field(default_factory=dict)
+
+class CombatResolver:
+    def __init__(self, store, capacity: int = 256, piercing_types=()):
+        """
+        :param store: NPCStore whose hp, hp_max, armor and shield columns are used
+        :param capacity: Event rows allocated up front; doubles when full
+        :param piercing_types: Damage types that ignore armor
+        """
+        self.store = store
+        self.piercing_types = set(piercing_types)
+        self.type_names: List[str] = []
+        self.type_codes: Dict[str, int] = {}
+        self.target = np.zeros(capacity, np.int32)
+        self.amount = np.zeros(capacity, np.float32) # Damage is positive, healing negative
+        self.source = np.zeros(capacity, np.int32)
+        self.damage_type = np.zeros(capacity, np.int16) # -1 for healing
+        self.count = 0
+        self.listeners: List[Callable[[CombatResult], None]] = []
+
+    def _type_code(self, damage_type: str) -> int:
+        code = self.type_codes.get(damage_type)
+        if code is None:
+            code = self.type_codes[damage_type] = len(self.type_names)
+            self.type_names.append(damage_type)
+        return code
+
+    def _reserve(self, extra: int) -> slice:
+        needed = self.count + extra
+        capacity = len(self.target)
+        if needed > capacity:
+            while capacity < needed:
+                capacity *= 2
+            for name in ("target", "amount", "source", "damage_type"):
+                column = getattr(self, name)
+                grown = np.zeros(capacity, column.dtype)
+                grown[:self.count] = column[:self.count]
+                setattr(self, name, grown)
+        rows = slice(self.count, needed)
+        self.count = needed
+        return rows
+
+    def queue_damage(self, target: int, amount: float, damage_type: str = "physical", source: int = -1) -> None:
+        self.queue_damage_many(np.array((target,), np.int32), amount, damage_type, source)
+
+    def queue_damage_many(self, targets, amounts, damage_type: str = "physical", source: int = -1) -> None:
+        """
+        One damage event per target, e.g. everyone caught in an AoE
+        :param amounts: One amount for all, or one per target; before armor
+        """
+        targets = np.asarray(targets, np.int32)
+        rows = self._reserve(len(targets))
+        self.target[rows] = targets
+        self.amount[rows] = amounts
+        self.source[rows] = source
+        self.damage_type[rows] = self._type_code(damage_type)
+
+    def queue_heal(self, target: int, amount: float, source: int = -1) -> None:
+        self.queue_heal_many(np.array((target,), np.int32), amount, source)
+
+    def queue_heal_many(self, targets, amounts, source: int = -1) -> None:
+        """Healing ignores armor and is capped at hp_max when resolved"""
+        targets = np.asarray(targets, np.int32)
+        rows = self._reserve(len(targets))
+        self.target[rows] = targets
+        self.amount[rows] = -np.asarray(amounts, np.float32)
+        self.source[rows] = source
+        self.damage_type[rows] = -1
+
+    def clear(self) -> None:
+        self.count = 0
+
+    def add_listener(self, callback: Callable[[CombatResult], None]) -> None:
+        """callback(result) once per resolve() that had any events"""
+        self.listeners.append(callback)
+
+    def resolve(self, on_death: Optional[Callable[[int], None]] = None) -> Optional[CombatResult]:
+        """
+        Apply every queued event at once
+        Events aimed at NPCs that are already dead or asleep in a pool are dropped
+        :param on_death: Called with each death's id, after all hp is applied and before the listeners run
+        :return: The frame's CombatResult, or None if nothing was queued
+        """
+        n = self.count
+        if n == 0:
+            return None
+        self.count = 0
+        store = self.store
+        target, amount, source, damage_type = self.target[:n], self.amount[:n].copy(), self.source[:n], self.damage_type[:n]
+        live = (store.hp[target] > 0) & (store.pool_slot[target] < 0)
+        if not live.all():
+            target, amount, source, damage_type = target[live], amount[live], source[live], damage_type[live]
+
+        is_damage = damage_type >= 0
+        mitigated = is_damage.copy()
+        for name in self.piercing_types:
+            code = self.type_codes.get(name)
+            if code is not None:
+                mitigated &= damage_type != code
+        amount[mitigated] *= ARMOR_SCALE / (ARMOR_SCALE + np.maximum(store.armor[target[mitigated]], 0))
+
+        targets, slot = np.unique(target, return_inverse=True)
+        damage = np.bincount(slot, weights=np.where(is_damage, amount, 0), minlength=len(targets))
+        healing = np.bincount(slot, weights=np.where(is_damage, 0, -amount), minlength=len(targets))
+        shield = store.shield[targets]
+        absorbed = np.minimum(damage, np.maximum(shield, 0))
+        store.shield[targets] = shield - absorbed
+        hp = store.hp[targets] - (damage - absorbed) + healing
+        store.hp[targets] = np.minimum(hp, store.hp_max[targets])
+        died = store.hp[targets] <= 0
+        deaths = targets[died]
+
+        # THE LAST DAMAGE EVENT ON EACH TARGET IS ITS KILLING BLOW
+        last_hit = np.full(len(targets), -1, np.int32)
+        hit_rows = np.flatnonzero(is_damage)
+        last_hit[slot[hit_rows]] = source[hit_rows] # LATER ROWS OVERWRITE EARLIER ONES
+        type_totals = np.bincount(damage_type[is_damage], weights=amount[is_damage], minlength=len(self.type_names))
+
+        result = CombatResult(targets, damage.astype(np.float32), healing.astype(np.float32), deaths, last_hit[died], int(len(target)),
+                              {name: float(total) for name, total in zip(self.type_names, type_totals.tolist()) if total})
+        if on_death is not None:
+            for npc_id in deaths.tolist():
+                on_death(npc_id)
+        for callback in self.listeners:
+            callback(result)
+        return result
+
+def benchmark_aoe(npc_count: int = 2000, projectiles: int = 200, frames: int = 50) -> None:
+    """An AoE of many projectiles over a crowd: one immediate call chain per hit versus queued and resolved once"""
+    import time
+    from types import SimpleNamespace
+    rng = np.random.default_rng(4)
+    store = SimpleNamespace(hp=np.full(npc_count, 1e9, np.float32), hp_max=np.full(npc_count, 1e9, np.float32),
+                            armor=rng.uniform(0, 50, npc_count).astype(np.float32), shield=np.zeros(npc_count, np.float32),
+                            pool_slot=np.full(npc_count, -1, np.int32))
+    hits = [rng.integers(0, npc_count, 40) for x in range(projectiles)] # EACH PROJECTILE CATCHES 40 NPCS
+
+    start = time.perf_counter()
+    for x in range(frames):
+        for targets in hits:
+            for npc_id in targets.tolist():
+                taken = 10 * ARMOR_SCALE / (ARMOR_SCALE + float(store.armor[npc_id]))
+                store.hp[npc_id] -= taken
+                if store.hp[npc_id] <= 0:
+                    pass
+    immediate_ms = (time.perf_counter() - start) * 1000 / frames
+
+    resolver = CombatResolver(store)
+    start = time.perf_counter()
+    for x in range(frames):
+        for targets in hits:
+            resolver.queue_damage_many(targets, 10.0, "fire")
+        result = resolver.resolve()
+    batched_ms = (time.perf_counter() - start) * 1000 / frames
+    print(f"{projectiles} projectiles x 40 hits: immediate {immediate_ms:.2f} ms, queued + resolved {batched_ms:.2f} ms "
+          f"({result.event_count} events -> {len(result.targets)} targets, 1 combat event)")
+
+if __name__ == "__main__":
+    benchmark_aoe()
@@ -0,0 +1,482 @@
+import handler_achievements
+import main_customize
+
+# COMPILED CONFIGURATION
+# EVERY TABLE IN main_customize IS PARSED AND VALIDATED ONCE INTO FROZEN DATACLASSES; ANY MALFORMED ENTRY RAISES ConfigError AT STARTUP
+# THE RESULT IS PICKLED TO cache/config.pickle UNDER A HASH OF main_customize.py AND THE PARSING CODE, SO LATER STARTS SKIP PARSING UNTIL ONE CHANGES
+# THE CACHE SITS NEXT TO THE GAME'S OWN .py FILES AND IS TRUSTED LIKE THEM; DELETE cache/ TO FORCE A RECOMPILE
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+import hashlib
+import os
+import pickle
+import sys
+
+CONFIG_FORMAT_VERSION = 3  # Part of the cache key with the sources; bump to discard every cache without editing a source
+CONFIG_CACHE_PATH = os.path.join("cache", "config.pickle")
+STATUS_EFFECT_STATS = ("hp", "shield", "armor")  # What a status effect's "stat=" may name; each is an NPCStore column
+
+class ConfigError(ValueError):
+    """A main_customize entry that cannot be compiled; the message names the table and entry"""
+
+@dataclass(frozen=True)
+class AssetDef:
+    id: str
+    file: str
+    type: str = ""
+
+@dataclass(frozen=True)
+class VarDef:
+    id: str
+    value: object
+    name: str = ""
+    type: str = ""
+
+@dataclass(frozen=True)
+class AchievementDef:
+    id: str
+    conditions: Tuple[Tuple[str, str, float], ...]  # (var name, operator, threshold)
+
+@dataclass(frozen=True)
+class CollectableDef:
+    id: str
+    location: str
+
+@dataclass(frozen=True)
+class ItemDef:
+    id: str
+    type: str
+    name: str
+    trade_gold: int = 0
+
+@dataclass(frozen=True)
+class EnemyDef:
+    group: str
+    health: int
+    armor: int
+    damage: int
+
+@dataclass(frozen=True)
+class KeyBindingDef:
+    key: str
+    press_id: str
+
+@dataclass(frozen=True)
+class LocationDef:
+    id: str
+    category: str  # One of the declared location groups
+    name: str
+    file: str
+
+@dataclass(frozen=True)
+class LootTableDef:
+    group: str  # An enemy group, "default" or "itemType"
+    drops: Tuple[Tuple[str, float], ...]  # (drop, weight); "nothing" is a draw that drops nothing
+    rolls: int = 1  # Draws per death
+
+@dataclass(frozen=True)
+class NpcDef:
+    id: str
+    type: str  # One of the declared npc groups
+
+@dataclass(frozen=True)
+class StatusEffectDef:
+    id: str
+    duration: float
+    instant: float = 0.0
+    per_second: float = 0.0  # "ps=" for buffs, "dps=" for debuffs
+    is_debuff: bool = False
+    stat: str = "hp"  # Stat the instant and per-second amounts change; one of STATUS_EFFECT_STATS
+
+@dataclass(frozen=True)
+class GameConfig:
+    source_hash: str
+    window_width: int
+    window_height: int
+    window_fps: int
+    window_title: str
+    application: Dict[str, object]
+    fonts: Dict[str, AssetDef]
+    achievements: Dict[str, AchievementDef]
+    music: Dict[str, AssetDef]
+    sfx: Dict[str, AssetDef]
+    collectables: Dict[str, CollectableDef]
+    recipes: Dict[str, AssetDef]
+    resources: Dict[str, ItemDef]
+    currencies: Dict[str, VarDef]
+    dialogs: Dict[str, AssetDef]
+    enemies: Dict[str, EnemyDef]
+    flags: Dict[str, VarDef]
+    armor: Dict[str, ItemDef]
+    weapons: Dict[str, ItemDef]
+    keybindings: Dict[str, KeyBindingDef]
+    location_groups: Tuple[str, ...]
+    locations: Dict[str, LocationDef]
+    loot_tables: Dict[str, LootTableDef]
+    npc_groups: Tuple[str, ...]
+    npcs: Dict[str, NpcDef]
+    quests: Dict[str, AssetDef]
+    skills: Dict[str, VarDef]
+    sprites: Dict[str, AssetDef]
+    stats: Dict[str, VarDef]
+    buffs: Dict[str, StatusEffectDef]
+    debuffs: Dict[str, StatusEffectDef]
+    timers: Dict[str, VarDef]
+
+def parse_scalar(text: str):
+    """"True"/"False" to bool, then int, then float, otherwise the string itself"""
+    if text in ("True", "False"):
+        return text == "True"
+    for kind in (int, float):
+        try:
+            return kind(text)
+        except ValueError:
+            pass
+    return text
+
+def parse_fields(table_name: str, entry: str) -> Dict[str, str]:
+    """Split "key=value::key=value"; every part needs a key and no key may repeat"""
+    fields = {}
+    for part in entry.split("::"):
+        key, separator, value = part.partition("=")
+        if not separator or not key:
+            raise ConfigError(f"{table_name}: '{part}' in '{entry}' is not key=value")
+        if key in fields:
+            raise ConfigError(f"{table_name}: '{key}' appears twice in '{entry}'")
+        fields[key] = value
+    return fields
+
+class TableCompiler:
+    """Walks one main_customize table, giving each entry's fields to a builder and keeping results by key"""
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        table = getattr(main_customize, table_name, None)
+        if not isinstance(table, tuple):
+            # A ONE-ENTRY TABLE WITHOUT A TRAILING COMMA IS A PLAIN STRING, NOT A TUPLE
+            raise ConfigError(f"{table_name} must be a tuple of strings (one-entry tables need a trailing comma), not {type(table).__name__}")
+        self.table = table
+
+    def fail(self, entry: str, reason: str):
+        raise ConfigError(f"{self.table_name}: {reason} in '{entry}'")
+
+    def require(self, entry: str, fields: Dict[str, str], *keys: str) -> None:
+        for key in keys:
+            if not fields.get(key):
+                self.fail(entry, f"missing '{key}='")
+
+    def number(self, entry: str, fields: Dict[str, str], key: str, kind=int, default=None):
+        if key not in fields:
+            if default is None:
+                self.fail(entry, f"missing '{key}='")
+            return default
+        try:
+            return kind(fields[key])
+        except ValueError:
+            self.fail(entry, f"'{key}={fields[key]}' is not a{'n integer' if kind is int else ' number'}")
+
+    def compile(self, build, key_field: str = "id") -> Dict[str, object]:
+        results = {}
+        for entry in self.table:
+            if not isinstance(entry, str):
+                raise ConfigError(f"{self.table_name}: entry {entry!r} is not a string")
+            fields = parse_fields(self.table_name, entry)
+            self.require(entry, fields, key_field)
+            key = fields[key_field]
+            if key in results:
+                self.fail(entry, f"duplicate {key_field} '{key}'")
+            results[key] = build(entry, fields)
+        return results
+
+def compile_assets(table_name: str, required: str = "file") -> Dict[str, AssetDef]:
+    compiler = TableCompiler(table_name)
+    def build(entry, fields):
+        compiler.require(entry, fields, required)
+        return AssetDef(fields["id"], fields[required], fields.get("type", ""))
+    return compiler.compile(build)
+
+def compile_vars(table_name: str, kind=int, default_key: str = "value") -> Dict[str, VarDef]:
+    compiler = TableCompiler(table_name)
+    def build(entry, fields):
+        if kind is bool:
+            value = fields.get(default_key, "False")
+            if value not in ("True", "False"):
+                compiler.fail(entry, f"'{default_key}={value}' is not True or False")
+            value = value == "True"
+        else:
+            value = compiler.number(entry, fields, default_key, kind, kind(0))
+        return VarDef(fields["id"], value, fields.get("name", ""), fields.get("type", ""))
+    return compiler.compile(build)
+
+def compile_items(table_name: str) -> Dict[str, ItemDef]:
+    compiler = TableCompiler(table_name)
+    def build(entry, fields):
+        compiler.require(entry, fields, "type", "name")
+        return ItemDef(fields["id"], fields["type"], fields["name"], compiler.number(entry, fields, "tradeGold", int, 0))
+    return compiler.compile(build)
+
+def compile_status_effects(table_name: str, per_second_key: str, is_debuff: bool) -> Dict[str, StatusEffectDef]:
+    compiler = TableCompiler(table_name)
+    def build(entry, fields):
+        unknown = set(fields) - {"id", "duration", "instant", per_second_key, "stat"}
+        if unknown:
+            compiler.fail(entry, f"unknown field(s) {sorted(unknown)}")
+        duration = compiler.number(entry, fields, "duration", float)
+        if duration <= 0:
+            compiler.fail(entry, "duration must be positive")
+        if fields.get("stat", "hp") not in STATUS_EFFECT_STATS:
+            compiler.fail(entry, f"'stat={fields['stat']}' is not one of {', '.join(STATUS_EFFECT_STATS)}")
+        return StatusEffectDef(
+            fields["id"],
+            duration,
+            compiler.number(entry, fields, "instant", float, 0.0),
+            compiler.number(entry, fields, per_second_key, float, 0.0),
+            is_debuff,
+            fields.get("stat", "hp")
+        )
+    return compiler.compile(build)
+
+def compile_grouped(table_name: str) -> Tuple[Tuple[str, ...], list]:
+    """Tables that declare "group=" lines before the entries that use them"""
+    compiler = TableCompiler(table_name)
+    groups = []
+    entries = []
+    for entry in compiler.table:
+        fields = parse_fields(table_name, entry)
+        if "group" in fields:
+            if len(fields) != 1 or not fields["group"]:
+                compiler.fail(entry, "a group line takes only 'group='")
+            if fields["group"] in groups:
+                compiler.fail(entry, f"duplicate group '{fields['group']}'")
+            groups.append(fields["group"])
+        else:
+            compiler.require(entry, fields, "id")
+            entries.append((entry, fields))
+    return tuple(groups), entries
+
+def compile_locations() -> Tuple[Tuple[str, ...], Dict[str, LocationDef]]:
+    compiler = TableCompiler("thisGame_locations")
+    groups, entries = compile_grouped(compiler.table_name)
+    locations = {}
+    for entry, fields in entries:
+        compiler.require(entry, fields, "file")
+        if "type" in fields:
+            category, name = fields["type"], fields["id"]
+        else:
+            named = [key for key in fields if key in groups]
+            if len(named) != 1:
+                compiler.fail(entry, f"expected exactly one of {groups}= or type=")
+            category, name = named[0], fields[named[0]]
+        if category not in groups:
+            compiler.fail(entry, f"'{category}' is not a declared group {groups}")
+        if fields["id"] in locations:
+            compiler.fail(entry, f"duplicate id '{fields['id']}'")
+        locations[fields["id"]] = LocationDef(fields["id"], category, name, fields["file"])
+    return groups, locations
+
+def compile_npcs() -> Tuple[Tuple[str, ...], Dict[str, NpcDef]]:
+    compiler = TableCompiler("thisGame_npcs")
+    groups, entries = compile_grouped(compiler.table_name)
+    npcs = {}
+    for entry, fields in entries:
+        compiler.require(entry, fields, "type")
+        if fields["type"] not in groups:
+            compiler.fail(entry, f"'{fields['type']}' is not a declared group {groups}")
+        if fields["id"] in npcs:
+            compiler.fail(entry, f"duplicate id '{fields['id']}'")
+        npcs[fields["id"]] = NpcDef(fields["id"], fields["type"])
+    return groups, npcs
+
+def compile_loot_tables(enemies: Dict[str, EnemyDef], items: Dict[str, ItemDef], currencies: Dict[str, VarDef]) -> Dict[str, LootTableDef]:
+    """Entries are grouped by group=; each drop must be an item type, item name, currency id or nothing"""
+    compiler = TableCompiler("thisGame_lootTables")
+    groups = set(enemies) | {"default", "itemType"}
+    item_types = {item.type for item in items.values()} | {"currency"}
+    known = item_types | {item.name for item in items.values()} | set(currencies) | {"nothing"}
+    drops: Dict[str, list] = {}
+    rolls: Dict[str, int] = {}
+    for entry in compiler.table:
+        fields = parse_fields(compiler.table_name, entry)
+        compiler.require(entry, fields, "group")
+        group = fields["group"]
+        if group not in groups:
+            compiler.fail(entry, f"'{group}' is not an enemy group, default or itemType")
+        if "drop" not in fields:
+            if set(fields) != {"group", "rolls"}:
+                compiler.fail(entry, "expected drop= and weight=, or only rolls=")
+            if group in rolls:
+                compiler.fail(entry, f"rolls for '{group}' set twice")
+            rolls[group] = compiler.number(entry, fields, "rolls")
+            if rolls[group] < 1:
+                compiler.fail(entry, "rolls must be at least 1")
+            continue
+        unknown = set(fields) - {"group", "drop", "weight"}
+        if unknown:
+            compiler.fail(entry, f"unknown field(s) {sorted(unknown)}")
+        drop = fields["drop"]
+        if drop not in (item_types if group == "itemType" else known):
+            compiler.fail(entry, f"'{drop}' is not {'an item type' if group == 'itemType' else 'an item type, item name, currency id or nothing'}")
+        weight = compiler.number(entry, fields, "weight", float)
+        if weight <= 0:
+            compiler.fail(entry, "weight must be positive")
+        if any(drop == existing for existing, x in drops.get(group, ())):
+            compiler.fail(entry, f"duplicate drop '{drop}' for '{group}'")
+        drops.setdefault(group, []).append((drop, weight))
+    for group in rolls:
+        if group not in drops:
+            raise ConfigError(f"{compiler.table_name}: rolls given for '{group}', which has no drops")
+    return {group: LootTableDef(group, tuple(entries), rolls.get(group, 1)) for group, entries in drops.items()}
+
+def compile_achievements() -> Dict[str, AchievementDef]:
+    compiler = TableCompiler("thisgame_achievements")
+    achievements = {}
+    for entry in compiler.table:
+        try:
+            achievement = handler_achievements.parse_achievement(entry)
+        except ValueError as e:
+            raise ConfigError(f"{compiler.table_name}: {e}") from e
+        if achievement.achievement_id in achievements:
+            compiler.fail(entry, f"duplicate id '{achievement.achievement_id}'")
+        achievements[achievement.achievement_id] = AchievementDef(
+            achievement.achievement_id,
+            tuple((condition.var_name, condition.op, condition.threshold) for condition in achievement.conditions)
+        )
+    return achievements
+
+def compile_config(source_hash: str = "") -> GameConfig:
+    """Parse and validate every main_customize table; raises ConfigError on the first bad entry"""
+    keybindings_compiler = TableCompiler("thisGame_keybindings")
+    def build_keybinding(entry, fields):
+        keybindings_compiler.require(entry, fields, "pressID")
+        return KeyBindingDef(fields["key"], fields["pressID"])
+
+    enemies_compiler = TableCompiler("thisGame_enemies")
+    def build_enemy(entry, fields):
+        return EnemyDef(
+            fields["group"],
+            enemies_compiler.number(entry, fields, "health"),
+            enemies_compiler.number(entry, fields, "armor"),
+            enemies_compiler.number(entry, fields, "damage")
+        )
+
+    application_compiler = TableCompiler("thisgame_application")
+    def build_setting(entry, fields):
+        application_compiler.require(entry, fields, "default")
+        return parse_scalar(fields["default"])
+
+    location_groups, locations = compile_locations()
+    npc_groups, npcs = compile_npcs()
+
+    collectables_compiler = TableCompiler("thisGame_collectables")
+    location_names = {location.name for location in locations.values()}
+    def build_collectable(entry, fields):
+        collectables_compiler.require(entry, fields, "location")
+        if fields["location"] not in location_names:
+            collectables_compiler.fail(entry, f"location '{fields['location']}' is not in thisGame_locations")
+        return CollectableDef(fields["id"], fields["location"])
+
+    for name in ("window_assumed_width", "window_assumed_height", "window_fps"):
+        if not isinstance(getattr(main_customize, name, None), int):
+            raise ConfigError(f"{name} must be an integer")
+
+    enemies = enemies_compiler.compile(build_enemy, "group")
+    resources = compile_items("thisGame_crafting_resources")
+    currencies = compile_vars("thisGame_currencies")
+    armor = compile_items("thisGame_equipable_armor")
+    weapons = compile_items("thisGame_equipable_weapons")
+    items = {**resources, **armor, **weapons}
+
+    return GameConfig(
+        source_hash=source_hash,
+        window_width=main_customize.window_assumed_width,
+        window_height=main_customize.window_assumed_height,
+        window_fps=main_customize.window_fps,
+        window_title=str(main_customize.window_title),
+        application=application_compiler.compile(build_setting),
+        fonts=compile_assets("thisGame_application_fonts"),
+        achievements=compile_achievements(),
+        music=compile_assets("thisgame_audio_music"),
+        sfx=compile_assets("thisgame_audio_sfx"),
+        collectables=collectables_compiler.compile(build_collectable),
+        recipes=compile_assets("thisGame_crafting_recipes"),
+        resources=resources,
+        currencies=currencies,
+        dialogs=compile_assets("thisGame_dialogs"),
+        enemies=enemies,
+        flags=compile_vars("thisGame_flags", bool, "default"),
+        armor=armor,
+        weapons=weapons,
+        keybindings=keybindings_compiler.compile(build_keybinding, "key"),
+        location_groups=location_groups,
+        locations=locations,
+        loot_tables=compile_loot_tables(enemies, items, currencies),
+        npc_groups=npc_groups,
+        npcs=npcs,
+        quests=compile_assets("thisGame_quests"),
+        skills=compile_vars("thisGame_skills"),
+        sprites=compile_assets("thisGame_sprites"),
+        stats=compile_vars("thisGame_stats"),
+        buffs=compile_status_effects("thisGame_statusEffects_buffs", "ps", False),
+        debuffs=compile_status_effects("thisGame_statusEffects_debuffs", "dps", True),
+        timers=compile_vars("thisGame_timers", float)
+    )
+
+def returnSourceHash() -> str:
+    """Hash of the format version, main_customize.py and the code that parses it; any edit to one of them means recompiling"""
+    digest = hashlib.sha256(str(CONFIG_FORMAT_VERSION).encode('utf-8'))
+    for module in (main_customize, handler_achievements, sys.modules[__name__]):
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def load_config(cache_path: str = CONFIG_CACHE_PATH) -> GameConfig:
+    """
+    Return the compiled config, from the cache when neither main_customize.py nor the parsing code has changed since it was written
+    :param cache_path: Pickle file holding the last compiled config
+    :raises ConfigError: If main_customize has a malformed entry
+    """
+    source_hash = returnSourceHash()
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = pickle.load(f)
+        if isinstance(cached, GameConfig) and cached.source_hash == source_hash:
+            return cached
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError, TypeError):
+        pass  # No cache yet, or one written by an older version of this module
+
+    config = compile_config(source_hash)
+    try:
+        import handler_vars_save
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        handler_vars_save.write_atomic(cache_path, [pickle.dumps(config, pickle.HIGHEST_PROTOCOL)])
+    except OSError as e:
+        print(f"Could not write config cache {cache_path}: {e}")
+    return config
+
+# Global compiled config
+game_config: Optional[GameConfig] = None
+
+def get_config() -> GameConfig:
+    """Get the compiled config, loading or compiling it on first use"""
+    global game_config
+    if game_config is None:
+        game_config = load_config()
+    return game_config
+
+def benchmark_config(loads: int = 200) -> None:
+    """Full compile versus a cached load"""
+    import time
+    start = time.perf_counter()
+    for x in range(loads):
+        compile_config()
+    compile_us = (time.perf_counter() - start) * 1e6 / loads
+    load_config()
+    start = time.perf_counter()
+    for x in range(loads):
+        load_config()
+    cached_us = (time.perf_counter() - start) * 1e6 / loads
+    print(f" compile: {compile_us:9.1f} us per load")
+    print(f"  cached: {cached_us:9.1f} us per load (hash + unpickle)")
+
+if __name__ == "__main__":
+    benchmark_config()
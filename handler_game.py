@@ -6,7 +6,7 @@ import handler_gui_popups
 testing_coroutine_maximum = 6
 
 def alertUser (input_message):
-    popup_alert.elements[0].text = input_message
+    popup_alert.elements[0].set_text(input_message)
     popTo("alert")
 
 def create_allLayers ():
@@ -35,6 +35,8 @@ def create_allPanels ():
     # Initialize global panels group
     global panels
     panels = handler_gui_panels.Panels(200)  # Default offset
+    # THE GROUP ONLY COLLECTS THE PANELS, WHICH ALREADY HAVE SCREEN POSITIONS; CHILDREN ARE RELATIVE TO THEIR CONTAINER, SO IT SITS AT (0, 0)
+    panels.set_offset(0, 0)
     panels.element_add(panel_left)
     panels.element_add(panel_right)
     panels.element_add(panel_top)
@@ -66,6 +68,8 @@ def create_allPopups ():
     # Initialize global popups group
     global popups
     popups = handler_gui_popups.Popups()
+    # EACH POPUP IS ALREADY CENTERED ON THE SCREEN; THE GROUP SITS AT (0, 0) SO THEY ARE NOT OFFSET A SECOND TIME
+    popups.set_offset(0, 0)
     popups.element_add(popup_alert)
     popups.element_add(popup_gameover)
     popups.element_add(popup_prompt)
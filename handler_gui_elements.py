@@ -1,8 +1,24 @@
 import handler_fonts
+import numpy as np
 import pygame
 import os
 
-class UIElement:
+class GuiNode:
+    """Anything that can sit in a Container. Its x, y and rect are relative to that container (self.parent),
+    so points from pygame.mouse or events are screen points and go through to_local before any rect test"""
+    parent = None
+    visible = True
+
+    def to_local(self, point):
+        """Translate a screen point into the coordinates this node's own position is in"""
+        parent = self.parent
+        while parent is not None:
+            offset_x, offset_y = parent.get_offset()
+            point = (point[0] - offset_x, point[1] - offset_y)
+            parent = parent.parent
+        return point
+
+class UIElement (GuiNode):
     def __init__(self, image, x, y):
         self.image = image
         self.x = x
@@ -12,16 +28,108 @@ class UIElement:
         self.home_y = y
         self.default_x = x
         self.default_y = y        
+        self.dirty = False # THE IMAGE IS RENDERED BY THE SUBCLASS BEFORE IT CALLS THIS
         
-    def draw(self, screen):
-        screen.blit(self.image, (self.x, self.y))
+    def mark_dirty(self):
+        """Flag the cached image as stale; it is re-rendered the next time the element is drawn"""
+        self.dirty = True
+
+    def is_dirty(self):
+        return self.dirty
+
+    def render(self):
+        """Redraw self.image from the element's state; elements with a static image have nothing to do"""
+        pass
+
+    def refresh(self):
+        """Render the cached image if it is stale. Returns True if a render happened"""
+        if not self.dirty:
+            return False
+        self.dirty = False
+        self.render()
+        return True
+
+    def draw(self, screen, offset=(0, 0)):
+        """offset is the top-left of the container this element is drawn in, (0, 0) when it is drawn straight to the screen"""
+        self.refresh()
+        screen.blit(self.image, (self.x + offset[0], self.y + offset[1]))
 
     def collidepoint(self, point):
+        """point is in the container's coordinates, like self.rect"""
         return self.rect.collidepoint(point)
 
     def update_position(self, new_x, new_y):
         self.x = new_x
         self.y = new_y
+        self.rect.topleft = (new_x, new_y)
+
+class Container (GuiNode):
+    """Shared behaviour of Panels, Popups and Layers: children are stored relative to the container,
+    so moving, sliding or hiding a container only changes self.x, self.y or self.visible"""
+    def element_add(self, element):
+        """Add an element; its position is relative to the container's top-left corner"""
+        self.elements.append(element)
+        element.parent = self
+
+    def element_remove(self, element):
+        if element in self.elements:
+            self.elements.remove(element)
+            element.parent = None
+
+    def hide(self):
+        self.visible = False
+
+    def show(self):
+        self.visible = True
+
+    def set_offset(self, input_newX, input_newY):
+        self.x = input_newX
+        self.y = input_newY
+
+    def get_offset(self):
+        return self.x, self.y
+
+    def update_position(self, input_newX, input_newY):
+        self.set_offset(input_newX, input_newY)
+
+    def collidepoint(self, point):
+        return self.visible and pygame.Rect(self.x, self.y, self.width, self.height).collidepoint(point)
+
+    def element_at(self, point):
+        """Return the topmost element under a point in this container's parent's coordinates (a screen point for a top-level container), or None"""
+        if not self.visible:
+            return None
+        local_point = (point[0] - self.x, point[1] - self.y)
+        for element in reversed(self.elements):
+            if element.collidepoint(local_point):
+                return element
+        return None
+
+    def draw_elements(self, screen, offset=(0, 0)):
+        """Blit every visible child at its position plus the container's offset; only children that changed since the last frame re-render.
+        Children with their own draw (borders, dropdowns, scroll thumbs, nested containers) draw themselves at that offset.
+        offset is the screen position of this container's parent, (0, 0) for a top-level container"""
+        origin_x, origin_y = self.x + offset[0], self.y + offset[1]
+        for element in self.elements:
+            if not element.visible:
+                continue
+            if type(element).draw is not UIElement.draw:
+                element.draw(screen, offset=(origin_x, origin_y))
+                continue
+            element.refresh()
+            screen.blit(element.image, (element.x + origin_x, element.y + origin_y))
+
+    def refresh(self):
+        """Re-render any stale children. Returns True if any child re-rendered"""
+        rendered = False
+        for element in self.elements:
+            if element.refresh():
+                rendered = True
+        return rendered
+
+    def is_dirty(self):
+        """True if any child changed since it was last drawn"""
+        return any(element.is_dirty() for element in self.elements)
 
 class element_button_text (UIElement):
     def __init__(self, text, position, size):
@@ -53,21 +161,18 @@ class element_button_text (UIElement):
         text_rect = text_surface.get_rect(center=(self.size[0] // 2, self.size[1] // 2))
         self.image.blit(text_surface, text_rect)
 
-    def update_position(self, new_x, new_y):
-        super().update_position(new_x, new_y)
-        self.render()
-
     def set_text(self, new_text):
-        self.text = new_text
-        self.render()
+        if self.text != new_text:
+            self.text = new_text
+            self.mark_dirty()
 
     def set_active(self, is_active):
         if self.active != is_active:
             self.active = is_active
-            self.render()
+            self.mark_dirty()
 
     def is_clicked(self, pos):
-        return self.active and self.rect.collidepoint(pos)
+        return self.active and self.rect.collidepoint(self.to_local(pos))
 
 class element_button_image (UIElement):
     def __init__(self, image_path, position, size):
@@ -85,35 +190,130 @@ class element_button_image (UIElement):
         hover.fill((204, 0, 0), special_flags=pygame.BLEND_RGB_ADD)
         return hover
 
-    def update(self, mouse_pos):
-        if self.rect.collidepoint(mouse_pos):
-            if not self.is_hovered:
-                self.is_hovered = True
-                self.image = self.hover_image
+    def render(self):
+        # BOTH STATES ARE PRE-RENDERED, SO "RENDERING" IS JUST PICKING ONE
+        if self.is_hovered:
+            self.image = self.hover_image
         else:
-            if self.is_hovered:
-                self.is_hovered = False
-                self.image = self.original_image
+            self.image = self.original_image
+
+    def set_hovered(self, is_hovered):
+        if self.is_hovered != is_hovered:
+            self.is_hovered = is_hovered
+            self.mark_dirty()
+
+    def update(self, mouse_pos):
+        self.set_hovered(self.rect.collidepoint(self.to_local(mouse_pos)))
 
     def is_clicked(self, pos):
-        return self.rect.collidepoint(pos)
+        return self.rect.collidepoint(self.to_local(pos))
 
 class element_bar_status (UIElement):
     def __init__(self, input_x, input_y, width, height, max_value=100, color=(0, 255, 0), background_color=(255, 0, 0)):
-        self.rect = pygame.Rect(input_x, input_y, width, height)
-        self.x = input_x
-        self.y = input_y
+        self.width = width
+        self.height = height
         self.max_value = max_value
         self.color = color
         self.background_color = background_color
+        self.value = max_value
+        self.fill_width = width
+        self.image = pygame.Surface((width, height))
+        self.render()
+        super().__init__(self.image, input_x, input_y)
 
-    def draw(self, surface, current_value):
-        current_value = max(0, min(current_value, self.max_value))
-        fill_width = int(self.rect.width * (current_value / self.max_value))
-        pygame.draw.rect(surface, self.background_color, self.rect)
-        fill_rect = pygame.Rect(self.rect.left, self.rect.top, fill_width, self.rect.height)
-        pygame.draw.rect(surface, self.color, fill_rect)
-        pygame.draw.rect(surface, (0, 0, 0), self.rect, 2)
+    def render(self):
+        self.image.fill(self.background_color)
+        pygame.draw.rect(self.image, self.color, (0, 0, self.fill_width, self.height))
+        pygame.draw.rect(self.image, (0, 0, 0), (0, 0, self.width, self.height), 2)
+
+    def set_value(self, current_value):
+        """Only a change in the filled pixel width counts as a change worth re-rendering"""
+        self.value = max(0, min(current_value, self.max_value))
+        fill_width = int(self.width * (self.value / self.max_value))
+        if fill_width != self.fill_width:
+            self.fill_width = fill_width
+            self.mark_dirty()
+
+    def draw(self, surface, current_value=None, offset=(0, 0)):
+        if current_value is not None:
+            self.set_value(current_value)
+        super().draw(surface, offset)
+
+class element_bar_set:
+    # NOTE: A SET OF IDENTICAL STATUS BARS (FOR EXAMPLE ONE OVER EVERY ENEMY) THAT DRAWS IN ONE BATCHED BLIT
+    # EACH QUANTIZED FILL LEVEL IS RENDERED ONCE AND SHARED BY EVERY BAR, SO A VALUE CHANGE IS JUST A SURFACE SWAP
+    def __init__(self, width, height, max_value=100, color=(0, 255, 0), background_color=(255, 0, 0), levels=None):
+        self.width = width
+        self.height = height
+        self.max_value = max_value
+        self.color = color
+        self.background_color = background_color
+        self.levels = width if levels is None else max(1, levels) # ONE LEVEL PER PIXEL OF FILL BY DEFAULT
+        self.level_images = [None] * (self.levels + 1)
+        self.quantized = np.zeros(0, dtype=np.int32)
+        self.blit_sequence = [] # [surface, (x, y)] PAIRS HANDED STRAIGHT TO Surface.blits
+        self.visible = True
+
+    def __len__(self):
+        return len(self.blit_sequence)
+
+    def _get_level_image(self, level):
+        """Return the shared image for a fill level, rendering it the first time it is needed"""
+        image = self.level_images[level]
+        if image is None:
+            image = pygame.Surface((self.width, self.height))
+            image.fill(self.background_color)
+            pygame.draw.rect(image, self.color, (0, 0, round(self.width * level / self.levels), self.height))
+            pygame.draw.rect(image, (0, 0, 0), (0, 0, self.width, self.height), 2)
+            self.level_images[level] = image
+        return image
+
+    def _quantize(self, values):
+        values = np.asarray(values, dtype=np.float32)
+        return np.clip(values * (self.levels / self.max_value), 0, self.levels).astype(np.int32)
+
+    def set_bars(self, xs, ys, values=None):
+        """Replace the whole set: one bar per position, all starting full unless values are given"""
+        count = len(xs)
+        self.quantized = np.full(count, self.levels, dtype=np.int32)
+        full_image = self._get_level_image(self.levels)
+        self.blit_sequence = [[full_image, (x, y)] for x, y in zip(xs, ys)]
+        if values is not None:
+            self.set_values(values)
+
+    def set_values(self, values, indices=None):
+        """Bulk value update from an array. Only bars whose quantized level changed are touched"""
+        new_levels = self._quantize(values)
+        if indices is None:
+            changed = np.flatnonzero(new_levels != self.quantized)
+            targets = changed
+        else:
+            indices = np.asarray(indices, dtype=np.intp)
+            changed = np.flatnonzero(new_levels != self.quantized[indices])
+            targets = indices[changed]
+        if len(changed) == 0:
+            return 0
+        self.quantized[targets] = new_levels[changed]
+        for index, level in zip(targets.tolist(), new_levels[changed].tolist()):
+            self.blit_sequence[index][0] = self._get_level_image(level)
+        return len(changed)
+
+    def set_value(self, index, value):
+        level = int(max(0, min(self.levels, value * self.levels / self.max_value)))
+        if level != self.quantized[index]:
+            self.quantized[index] = level
+            self.blit_sequence[index][0] = self._get_level_image(level)
+
+    def set_positions(self, xs, ys, indices=None):
+        """Bulk move bars, for example to follow the enemies they belong to"""
+        if indices is None:
+            indices = range(len(self.blit_sequence))
+        for index, x, y in zip(indices, xs, ys):
+            self.blit_sequence[index][1] = (x, y)
+
+    def draw(self, screen):
+        if self.visible and self.blit_sequence:
+            screen.blits(self.blit_sequence, doreturn=False)
 
 class element_image (UIElement):
     def __init__(self, image_path, position, size):
@@ -127,14 +327,25 @@ class element_image (UIElement):
 class element_text_title (UIElement):
     def __init__(self, text, position):
         self.text = text
-        self.x = position[0]
-        self.y = position[1]
         self.color = (255, 255, 0)  # Yellow color
         self.font = handler_fonts.FontHandler().get_font('trajan48')
+        self.x, self.y = position
+        self.render()
+        super().__init__(self.image, position[0], position[1])
 
-    def draw(self, screen):
-        text_surface = self.font.render(self.text, True, self.color)
-        screen.blit(text_surface, self.position)
+    def render(self):
+        self.image = self.font.render(self.text, True, self.color)
+        self.rect = self.image.get_rect(topleft=(self.x, self.y))  # NEW TEXT CAN BE WIDER OR NARROWER; CLICKS USE THE RECT
+
+    def set_text(self, new_text):
+        if self.text != new_text:
+            self.text = new_text
+            self.mark_dirty()
+
+    def set_color(self, new_color):
+        if self.color != new_color:
+            self.color = new_color
+            self.mark_dirty()
 
 class element_box_color (UIElement):
     def __init__(self, color, position, size):
@@ -142,17 +353,24 @@ class element_box_color (UIElement):
         self.size = size
         self.image = pygame.Surface(size, pygame.SRCALPHA)  # Enable alpha channel
         self.alpha = 100  # Default to fully visible
-        self._update_surface()
+        self.render()
         super().__init__(self.image, position[0], position[1])
     
-    def _update_surface(self):
-        """Internal method to update the surface with current color and alpha"""
+    def render(self):
+        """Fill the surface with current color and alpha"""
         self.image.fill((self.color[0], self.color[1], self.color[2], int(self.alpha * 2.55)))
     
     def set_alpha(self, alpha_percent: int):
         """Set the alpha value (0-100 where 0 is invisible and 100 is fully visible)"""
-        self.alpha = max(0, min(100, alpha_percent))  # Clamp between 0 and 100
-        self._update_surface()
+        alpha_percent = max(0, min(100, alpha_percent))  # Clamp between 0 and 100
+        if self.alpha != alpha_percent:
+            self.alpha = alpha_percent
+            self.mark_dirty()
+
+    def set_color(self, new_color):
+        if self.color != new_color:
+            self.color = new_color
+            self.mark_dirty()
     
     def get_alpha(self) -> int:
         """Get the current alpha value (0-100)"""
@@ -180,62 +398,163 @@ class element_box_text (UIElement):
         self.image.blit(text_surface, text_rect)
 
     def set_text(self, new_text):
-        self.text = new_text
-        self.render()
+        if self.text != new_text:
+            self.text = new_text
+            self.mark_dirty()
 
 class element_slider (UIElement):
     def __init__(self, x, y, width, height, min_value, max_value, value):
-        self.rect = pygame.Rect(x, y, width, height)
+        self.width = width
+        self.height = height
         self.min_value = min_value
         self.max_value = max_value
         self.value = value
+        self.thumb_size = 20
+        self.font = pygame.font.Font(None, 20)
+        # THE THUMB HANGS OVER THE EDGES OF THE TRACK, SO THE CACHED IMAGE IS PADDED BY HALF A THUMB ON EVERY SIDE
+        self.pad = self.thumb_size // 2
+        self.image = pygame.Surface((width + self.pad * 2, height + self.pad * 2), pygame.SRCALPHA)
+        self.render()
+        super().__init__(self.image, x - self.pad, y - self.pad)
 
-    def draw(self, surface):
-        pygame.draw.rect(surface, (0, 0, 0), self.rect, 2)
-        fill_width = int(self.rect.width * (self.value - self.min_value) / (self.max_value - self.min_value))
-        fill_rect = pygame.Rect(self.rect.left, self.rect.top, fill_width, self.rect.height)
-        pygame.draw.rect(surface, (0, 255, 0), fill_rect)
-
-        thumb_width = 20
-        thumb_height = 20
-        thumb_x = self.rect.left + fill_width - thumb_width // 2
-        thumb_y = self.rect.top - thumb_height // 2
-        pygame.draw.rect(surface, (0, 0, 0), (thumb_x, thumb_y, thumb_width, thumb_height))
-        pygame.draw.circle(surface, (0, 255, 0), (thumb_x + thumb_width // 2, thumb_y + thumb_height // 2), thumb_width // 2)
-
-        text_surface = pygame.font.Font(None, 20).render(str(self.value), True, (0, 0, 0))
-        surface.blit(text_surface, (self.rect.left + self.rect.width // 2 - text_surface.get_width() // 2, self.rect.top - text_surface.get_height() // 2))
-
-    def update_value(self, value):
-        self.value = value
-
-        fill_width = int(self.rect.width * (self.value - self.min_value) / (self.max_value - self.min_value))
-        fill_rect = pygame.Rect(self.rect.left, self.rect.top, fill_width, self.rect.height)
-        pygame.draw.rect(self.image, (0, 255, 0), fill_rect)
+    def render(self):
+        self.image.fill((0, 0, 0, 0))
+        track_rect = pygame.Rect(self.pad, self.pad, self.width, self.height)
+        pygame.draw.rect(self.image, (0, 0, 0), track_rect, 2)
+        fill_width = int(self.width * (self.value - self.min_value) / (self.max_value - self.min_value))
+        pygame.draw.rect(self.image, (0, 255, 0), (track_rect.left, track_rect.top, fill_width, self.height))
 
-        thumb_width = 20
-        thumb_height = 20
-        thumb_x = self.rect.left + fill_width - thumb_width // 2
-        thumb_y = self.rect.top - thumb_height // 2
-        pygame.draw.rect(self.image, (0, 0, 0), (thumb_x, thumb_y, thumb_width, thumb_height))
-        pygame.draw.circle(self.image, (0, 255, 0), (thumb_x + thumb_width // 2, thumb_y + thumb_height // 2), thumb_width // 2)
+        thumb_x = track_rect.left + fill_width - self.thumb_size // 2
+        thumb_y = track_rect.top - self.thumb_size // 2
+        pygame.draw.rect(self.image, (0, 0, 0), (thumb_x, thumb_y, self.thumb_size, self.thumb_size))
+        pygame.draw.circle(self.image, (0, 255, 0), (thumb_x + self.thumb_size // 2, thumb_y + self.thumb_size // 2), self.thumb_size // 2)
 
         text_surface = self.font.render(str(self.value), True, (0, 0, 0))
-        self.image.blit(text_surface, (self.rect.left + self.rect.width // 2 - text_surface.get_width() // 2, self.rect.top - text_surface.get_height() // 2))
-
-        self.rect.topleft = (x, y)
+        self.image.blit(text_surface, (track_rect.left + self.width // 2 - text_surface.get_width() // 2, track_rect.top - text_surface.get_height() // 2))
 
-        return self.image
+    def update_value(self, value):
+        value = max(self.min_value, min(value, self.max_value))
+        if self.value != value:
+            self.value = value
+            self.mark_dirty()
 
     def get_value(self):
         return self.value
 
 class element_viewport (UIElement):
-    def __init__(self, x, y, width, height):
-        self.rect = pygame.Rect(x, y, width, height)
+    # NOTE: THIS IS A VIRTUALIZED LIST/GRID. ONLY THE ROWS THAT ARE ON SCREEN EVER GET RENDERED
+    # A FIXED POOL OF ROW SURFACES IS RECYCLED AS YOU SCROLL, SO MEMORY DOES NOT GROW WITH THE NUMBER OF ITEMS
+    def __init__(self, x, y, width, height, row_height=24, items=None, columns=1, render_cell=None):
+        self.width = width
+        self.height = height
+        self.row_height = row_height
+        self.columns = max(1, columns)
+        self.cell_width = width // self.columns
+        self.items = items if items is not None else []
+        self.render_cell = render_cell if render_cell is not None else self._render_cell_default
+        self.font = handler_fonts.FontHandler().get_font('verdana16')
+        self.bg_color = (255, 255, 255)
+        self.text_color = (0, 0, 0)
+        self.border_color = (0, 0, 0)
+        self.thumb_color = (102, 102, 102)
         self.scroll_x = 0
         self.scroll_y = 0
 
+        # Row pool: row N is always cached in slot N % pool_size, and every visible row maps to a different slot
+        self.pool_size = height // row_height + 2
+        self.row_pool = [pygame.Surface((width, row_height)) for _ in range(self.pool_size)]
+        self.row_pool_index = [-1] * self.pool_size
+
+        self.image = pygame.Surface((width, height))
+        self._rendered_scroll_y = 0
+        self._needs_full_redraw = True
+        self.render()
+        super().__init__(self.image, x, y)
+
+    def _render_cell_default(self, surface, item, cell_rect):
+        """Draw an item as a single line of text; objects with a name (cards, slots) use the name"""
+        text_surface = self.font.render(str(getattr(item, 'name', item)), True, self.text_color)
+        surface.blit(text_surface, text_surface.get_rect(midleft=(cell_rect.left + 5, cell_rect.centery)))
+
+    def _get_row_count(self):
+        return (len(self.items) + self.columns - 1) // self.columns
+
+    def _get_max_scroll(self):
+        return max(0, self._get_row_count() * self.row_height - self.height)
+
+    def _get_row_surface(self, row):
+        """Return the pooled surface for a row, rendering it only if the slot holds a different row"""
+        slot = row % self.pool_size
+        surface = self.row_pool[slot]
+        if self.row_pool_index[slot] != row:
+            surface.fill(self.bg_color)
+            first = row * self.columns
+            for column, item in enumerate(self.items[first:first + self.columns]):
+                self.render_cell(surface, item, pygame.Rect(column * self.cell_width, 0, self.cell_width, self.row_height))
+            self.row_pool_index[slot] = row
+        return surface
+
+    def _redraw_strip(self, top, bottom):
+        """Redraw the viewport rows between two y coordinates (viewport space) from the row pool"""
+        self.image.set_clip(pygame.Rect(0, top, self.width, bottom - top))
+        self.image.fill(self.bg_color)
+        row_count = self._get_row_count()
+        first_row = (self.scroll_y + top) // self.row_height
+        last_row = min(row_count - 1, (self.scroll_y + bottom - 1) // self.row_height)
+        for row in range(first_row, last_row + 1):
+            self.image.blit(self._get_row_surface(row), (0, row * self.row_height - self.scroll_y))
+        self.image.set_clip(None)
+
+    def render(self):
+        """Bring the cached image up to the current scroll position"""
+        delta = self.scroll_y - self._rendered_scroll_y
+        if self._needs_full_redraw or abs(delta) >= self.height:
+            self._redraw_strip(0, self.height)
+        elif delta > 0:
+            # Content moved up: shift what we already have and only draw the strip exposed at the bottom
+            self.image.scroll(0, -delta)
+            self._redraw_strip(self.height - delta, self.height)
+        elif delta < 0:
+            self.image.scroll(0, -delta)
+            self._redraw_strip(0, -delta)
+        self._rendered_scroll_y = self.scroll_y
+        self._needs_full_redraw = False
+
+    def set_items(self, items):
+        """Replace the list being displayed; the list is referenced, not copied"""
+        self.items = items
+        self.row_pool_index = [-1] * self.pool_size
+        self.scroll_y = min(self.scroll_y, self._get_max_scroll())
+        self._needs_full_redraw = True
+        self.mark_dirty()
+
+    def refresh_item(self, index):
+        """Re-render a single item after it changed; rows that are off screen are left alone"""
+        row = index // self.columns
+        slot = row % self.pool_size
+        if self.row_pool_index[slot] == row:
+            self.row_pool_index[slot] = -1
+            self._needs_full_redraw = True
+            self.mark_dirty()
+
+    def scroll_to(self, scroll_y):
+        scroll_y = max(0, min(int(scroll_y), self._get_max_scroll()))
+        if self.scroll_y != scroll_y:
+            # SEVERAL SCROLLS IN ONE FRAME ARE MERGED INTO A SINGLE SHIFT WHEN THE IMAGE IS NEXT RENDERED
+            self.scroll_y = scroll_y
+            self.mark_dirty()
+
+    def scroll_by(self, delta_y):
+        self.scroll_to(self.scroll_y + delta_y)
+
+    def scroll_to_item(self, index):
+        """Scroll the minimum amount needed to make an item fully visible"""
+        top = (index // self.columns) * self.row_height
+        if top < self.scroll_y:
+            self.scroll_to(top)
+        elif top + self.row_height > self.scroll_y + self.height:
+            self.scroll_to(top + self.row_height - self.height)
+
     def get_scroll(self):
         return self.scroll_x, self.scroll_y
 
@@ -244,63 +563,97 @@ class element_viewport (UIElement):
 
     def update_scroll(self, scroll_x, scroll_y):
         self.scroll_x = scroll_x
-        self.scroll_y = scroll_y
-
-    def draw(self, surface):
-        pygame.draw.rect(surface, (0, 0, 0), self.rect, 2)
-        fill_rect = pygame.Rect(self.rect.left + self.scroll_x, self.rect.top + self.scroll_y, self.rect.width, self.rect.height)
-        pygame.draw.rect(surface, (0, 255, 0), fill_rect)
-
-        thumb_width = 20
-        thumb_height = 20
-        thumb_x = self.rect.left + self.scroll_x - thumb_width // 2
-        thumb_y = self.rect.top + self.scroll_y - thumb_height // 2
-        pygame.draw.rect(surface, (0, 0, 0), (thumb_x, thumb_y, thumb_width, thumb_height))
-        pygame.draw.circle(surface, (0, 255, 0), (thumb_x + thumb_width // 2, thumb_y + thumb_height // 2), thumb_width // 2)
+        self.scroll_to(scroll_y)
+
+    def get_visible_range(self):
+        """Return the (first, last) item indices that are at least partly on screen"""
+        first = (self.scroll_y // self.row_height) * self.columns
+        last = min(len(self.items), ((self.scroll_y + self.height - 1) // self.row_height + 1) * self.columns) - 1
+        return first, last
+
+    def item_at(self, pos):
+        """Return the index of the item under a screen position, or None"""
+        pos = self.to_local(pos)
+        if not self.rect.collidepoint(pos):
+            return None
+        row = (pos[1] - self.rect.top + self.scroll_y) // self.row_height
+        column = min(self.columns - 1, (pos[0] - self.rect.left) // self.cell_width)
+        index = row * self.columns + column
+        if index < len(self.items):
+            return index
+        return None
 
-        text_surface = self.font.render(str(self.scroll_x), True, (0, 0, 0))
-        surface.blit(text_surface, (self.rect.left + self.rect.width // 2 - text_surface.get_width() // 2, self.rect.top - text_surface.get_height() // 2))
+    def handle_event(self, event):
+        if event.type == pygame.MOUSEWHEEL and self.rect.collidepoint(self.to_local(pygame.mouse.get_pos())):
+            self.scroll_by(-event.y * self.row_height)
+            return True
+        return False
 
-        self.rect.topleft = (x, y)
+    def draw(self, surface, offset=(0, 0)):
+        self.refresh()
+        rect = self.rect.move(offset)
+        surface.blit(self.image, rect.topleft)
+        pygame.draw.rect(surface, self.border_color, rect, 2)
 
-        return self.image
+        # Scroll thumb along the right edge, sized to the visible fraction of the list
+        content_height = self._get_row_count() * self.row_height
+        if content_height > self.height:
+            thumb_height = max(10, self.height * self.height // content_height)
+            thumb_y = rect.top + (self.height - thumb_height) * self.scroll_y // self._get_max_scroll()
+            pygame.draw.rect(surface, self.thumb_color, (rect.right - 6, thumb_y, 4, thumb_height))
 
 class element_input_field (UIElement):
     def __init__(self, x, y, width, height):
-        self.rect = pygame.Rect(x, y, width, height)
+        self.width = width
+        self.height = height
         self.text = ""
         self.max_length = 20
+        self.font = handler_fonts.FontHandler().get_font('verdana16')
+        self.image = pygame.Surface((width, height), pygame.SRCALPHA)
+        self.render()
+        super().__init__(self.image, x, y)
 
-    def draw(self, surface):
-        pygame.draw.rect(surface, (0, 0, 0), self.rect, 2)
+    def render(self):
+        self.image.fill((0, 0, 0, 0))
+        pygame.draw.rect(self.image, (0, 0, 0), (0, 0, self.width, self.height), 2)
         text_surface = self.font.render(self.text, True, (0, 0, 0))
-        surface.blit(text_surface, (self.rect.left + 5, self.rect.top + 5))
+        self.image.blit(text_surface, (5, 5))
 
-        self.rect.topleft = (x, y)
+    def set_text(self, new_text):
+        new_text = new_text[:self.max_length]
+        if self.text != new_text:
+            self.text = new_text
+            self.mark_dirty()
 
-        return self.image
+    def get_text(self):
+        return self.text
 
 class element_toggle (UIElement):
     def __init__(self, x, y, width, height):
-        self.rect = pygame.Rect(x, y, width, height)
         self.active = False
+        self.image = pygame.Surface((width, height))
+        self.render()
+        super().__init__(self.image, x, y)
 
-    def draw(self, surface):
+    def render(self):
         if self.active:
-            pygame.draw.rect(surface, (0, 255, 0), self.rect)
+            self.image.fill((0, 255, 0))
         else:
-            pygame.draw.rect(surface, (255, 0, 0), self.rect)
+            self.image.fill((255, 0, 0))
 
-        self.rect.topleft = (x, y)
+    def set_active(self, is_active):
+        if self.active != is_active:
+            self.active = is_active
+            self.mark_dirty()
 
-        return self.image
+    def toggle(self):
+        self.set_active(not self.active)
 
 class element_menu_bar(UIElement):
     def __init__(self, x, y, width, height):
-        self.rect = pygame.Rect(x, y, width, height)
         self.menu_items = {}  # Dictionary to store menu items and their submenus
         self.active_menu = None
-        self.font = handler_fonts.FontHandler().get_font('default', 16)
+        self.font = handler_fonts.FontHandler().get_font('default')
         self.colors = {
             'background': (240, 240, 240),
             'text': (0, 0, 0),
@@ -309,6 +662,10 @@ class element_menu_bar(UIElement):
         }
         self.item_padding = 10
         self.item_height = 30
+        self.image = pygame.Surface((width, height))
+        self.dropdown_image = None
+        self.render()
+        super().__init__(self.image, x, y)
         
     def add_menu(self, name, items):
         """Add a menu with its items. Items should be a list of (name, callback) tuples."""
@@ -326,56 +683,63 @@ class element_menu_bar(UIElement):
             'items': items,
             'dropdown_rect': pygame.Rect(x, self.item_height, dropdown_width, dropdown_height)
         }
+        self.mark_dirty()
+
+    def set_active_menu(self, name):
+        if self.active_menu != name:
+            self.active_menu = name
+            self.mark_dirty()
     
-    def draw(self, surface):
+    def render(self):
         # Draw menu bar background
-        pygame.draw.rect(surface, self.colors['background'], self.rect)
+        self.image.fill(self.colors['background'])
+        self.dropdown_image = None
         
         # Draw menu items
-        x = self.rect.x
         for name, menu in self.menu_items.items():
-            item_rect = menu['rect'].copy()
-            item_rect.x += x
+            item_rect = menu['rect']
             
             # Draw menu item background
             if name == self.active_menu:
                 color = self.colors['active']
             else:
                 color = self.colors['background']
-            pygame.draw.rect(surface, color, item_rect)
+            pygame.draw.rect(self.image, color, item_rect)
             
             # Draw menu text
             text = self.font.render(name, True, self.colors['text'])
             text_rect = text.get_rect(center=item_rect.center)
-            surface.blit(text, text_rect)
+            self.image.blit(text, text_rect)
             
-            # Draw dropdown if active
+            # Render the dropdown if active; it hangs below the bar so it gets its own cached surface
             if name == self.active_menu:
-                dropdown_rect = menu['dropdown_rect'].copy()
-                dropdown_rect.x += x
-                pygame.draw.rect(surface, self.colors['background'], dropdown_rect)
+                dropdown_rect = menu['dropdown_rect']
+                self.dropdown_image = pygame.Surface(dropdown_rect.size)
+                self.dropdown_image.fill(self.colors['background'])
                 
                 # Draw dropdown items
                 for i, (item_name, _) in enumerate(menu['items']):
-                    item_rect = pygame.Rect(
-                        dropdown_rect.x,
-                        dropdown_rect.y + i * self.item_height,
-                        dropdown_rect.width,
-                        self.item_height
-                    )
                     text = self.font.render(item_name, True, self.colors['text'])
-                    text_rect = text.get_rect(midleft=(item_rect.x + self.item_padding, item_rect.centery))
-                    surface.blit(text, text_rect)
+                    text_rect = text.get_rect(midleft=(self.item_padding, i * self.item_height + self.item_height // 2))
+                    self.dropdown_image.blit(text, text_rect)
+
+    def draw(self, surface, offset=(0, 0)):
+        super().draw(surface, offset)
+        if self.dropdown_image is not None:
+            dropdown_rect = self.menu_items[self.active_menu]['dropdown_rect']
+            surface.blit(self.dropdown_image, (self.x + offset[0] + dropdown_rect.x, self.y + offset[1] + dropdown_rect.y))
     
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_pos = pygame.mouse.get_pos()
+            # THE MENU AND DROPDOWN RECTS ARE RELATIVE TO THE BAR ITSELF
+            local_x, local_y = self.to_local(pygame.mouse.get_pos())
+            mouse_pos = (local_x - self.x, local_y - self.y)
             
             # Check main menu items
             for name, menu in self.menu_items.items():
                 item_rect = menu['rect']
                 if item_rect.collidepoint(mouse_pos):
-                    self.active_menu = name if self.active_menu != name else None
+                    self.set_active_menu(name if self.active_menu != name else None)
                     return True
                     
             # Check dropdown items if a menu is active
@@ -388,9 +752,9 @@ class element_menu_bar(UIElement):
                         _, callback = menu['items'][item_index]
                         if callback:
                             callback()
-                        self.active_menu = None
+                        self.set_active_menu(None)
                         return True
                         
             # Close dropdown if clicked outside
-            self.active_menu = None
+            self.set_active_menu(None)
         return False
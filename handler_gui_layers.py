@@ -2,7 +2,7 @@ import handler_gui_elements
 import pygame
 from pygame.locals import *
 
-class Layers:
+class Layers (handler_gui_elements.Container):
     def __init__(self):
         self.elements = []
         self.window_width = 1600
@@ -11,24 +11,16 @@ class Layers:
         self.y = 0
         self.background = pygame.Surface((self.window_width, self.window_height))
         self.background.fill((204,204,204))
+        self.visible = True
 
-    def element_add (self, UIElement):
-        self.elements.append(UIElement)
+    def collidepoint(self, point):
+        # A LAYER COVERS THE WHOLE WINDOW WHEREVER IT IS SCROLLED TO
+        return self.visible
 
-    def element_remove (self, UIElement):
-        self.elements.remove(UIElement)
-
-    def hide (self):
-        for element in self.elements:
-            element.update_position(element.x + 3000, element.y)
-
-    def show(self):
-        for element in self.elements:
-            element.update_position(element.default_x, element.default_y)
-
-    def draw(self, screen):
-        for element in self.elements:
-            screen.blit(element.image, (element.x + self.x, element.y + self.y))
+    def draw(self, screen, offset=(0, 0)):
+        if not self.visible:
+            return
+        self.draw_elements(screen, offset)
 
 # LAYERS: GAMEPLAY-SPECIFIC
 class layer_game (Layers):
@@ -142,12 +134,19 @@ class layer_loading (Layers):
         # Update progress bar in next draw call
         self.progress = progress
     
-    def draw(self, screen):
-        """Override draw to handle progress bar separately"""
+    def draw(self, screen, offset=(0, 0)):
+        """Override draw to hold the progress bar back until the first progress update"""
+        if not self.visible:
+            return
+
         # Draw background and text
-        screen.blit(self.background.image, (self.background.x + self.x, self.background.y + self.y))
-        self.loading_text.draw(screen)
+        origin_x, origin_y = self.x + offset[0], self.y + offset[1]
+        for element in (self.background, self.loading_text):
+            element.refresh()
+            screen.blit(element.image, (element.x + origin_x, element.y + origin_y))
         
         # Draw progress bar with current progress
         if hasattr(self, 'progress'):
-            self.progress_bar.draw(screen, self.progress)
\ No newline at end of file
+            self.progress_bar.set_value(self.progress)
+            self.progress_bar.refresh()
+            screen.blit(self.progress_bar.image, (self.progress_bar.x + origin_x, self.progress_bar.y + origin_y))
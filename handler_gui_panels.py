@@ -2,7 +2,7 @@ import handler_gui_elements
 import pygame
 from pygame.locals import *
 
-class Panels:
+class Panels(handler_gui_elements.Container):
     def __init__(self, offset, margin="left"):
         self.elements = []
         self.window_width = 1600
@@ -43,56 +43,17 @@ class Panels:
         self.y = self._calculate_y()
         self.background = pygame.Surface((self.width, self.height))
         self.background.fill((204, 204, 204))
-        self._update_element_positions()
     
-    def _update_element_positions(self):
-        """Update all element positions when panel moves"""
-        for element in self.elements:
-            # Calculate relative position within panel
-            rel_x = element.x - (element.default_x - self.x)
-            rel_y = element.y - (element.default_y - self.y)
-            # Update position
-            element.update_position(self.x + rel_x, self.y + rel_y)
-            # Update default position
-            element.default_x = self.x + rel_x
-            element.default_y = self.y + rel_y
-    
-    def element_add(self, element):
-        """Add an element to the panel"""
-        # Adjust element position relative to panel
-        element.update_position(self.x + element.x, self.y + element.y)
-        element.default_x = self.x + element.x
-        element.default_y = self.y + element.y
-        self.elements.append(element)
-    
-    def element_remove(self, element):
-        """Remove an element from the panel"""
-        if element in self.elements:
-            self.elements.remove(element)
-    
-    def hide(self):
-        """Hide the panel"""
-        self.visible = False
-        for element in self.elements:
-            element.update_position(element.x + 3000, element.y)
-    
-    def show(self):
-        """Show the panel"""
-        self.visible = True
-        for element in self.elements:
-            element.update_position(element.default_x, element.default_y)
-    
-    def draw(self, screen):
+    def draw(self, screen, offset=(0, 0)):
         """Draw the panel and its elements"""
         if not self.visible:
             return
             
         # Draw panel background
-        screen.blit(self.background, (self.x, self.y))
+        screen.blit(self.background, (self.x + offset[0], self.y + offset[1]))
         
-        # Draw elements
-        for element in self.elements:
-            screen.blit(element.image, (element.x, element.y))
+        # Draw elements relative to the panel
+        self.draw_elements(screen, offset)
     
     def resize(self, width, height):
         """Resize the panel"""
@@ -103,12 +64,6 @@ class Panels:
         # Recalculate position based on margin
         self.x = self._calculate_x()
         self.y = self._calculate_y()
-        self._update_element_positions()
-
-    def update_position(self, input_newX, input_newY):
-        self.x = input_newX
-        self.y = input_newY
-        self._update_element_positions()
 
 # PANEL OBJECTS
 class panel_sidebar_left(Panels):
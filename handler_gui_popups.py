@@ -3,7 +3,7 @@ import pygame
 from pygame.locals import *
 from handler_gui_sizing import get_sizing
 
-class Popups:
+class Popups (handler_gui_elements.Container):
     def __init__ (self, width_percent=50, height_percent=50):
         self.elements = []
         
@@ -28,40 +28,20 @@ class Popups:
         self.overlay = pygame.Surface((self.window_width, self.window_height))
         self.overlay.fill((0, 0, 0))
         self.overlay.set_alpha(128)  # 50% transparency
+        self.visible = True
     
-    def element_add (self, element):
-        # Adjust element position relative to popup's position
-        element.update_position(
-            element.x + self.x,
-            element.y + self.y
-        )
-        self.elements.append(element)
-    
-    def element_remove (self, element):
-        self.elements.remove(element)
-    
-    def hide (self):
-        for element in self.elements:
-            element.update_position(element.x + 3000, element.y)
-    
-    def show (self):
-        for element in self.elements:
-            element.update_position(element.default_x, element.default_y)
-    
-    def update_position (self, input_newX, input_newY):
-        self.x = input_newX
-        self.y = input_newY
+    def draw (self, screen, offset=(0, 0)):
+        if not self.visible:
+            return
 
-    def draw (self, screen):
         # Draw darkened overlay
         screen.blit(self.overlay, (0, 0))
         
         # Draw popup background
-        screen.blit(self.background, (self.x, self.y))
+        screen.blit(self.background, (self.x + offset[0], self.y + offset[1]))
         
-        # Draw elements
-        for element in self.elements:
-            screen.blit(element.image, (element.x, element.y))
+        # Draw elements relative to the popup
+        self.draw_elements(screen, offset)
 
 class popup_alert (Popups):
     # NOTE: THE ALERT POPUP AUTOMATICALLY SHOWS ITSELF WHEN IT GETS SENT A MESSAGE
@@ -71,12 +51,12 @@ class popup_alert (Popups):
         self.image = pygame.image.load("default/tg.png").convert_alpha()  # Specify the correct path        
         self.element_add(handler_gui_elements.element_box_text(
             message,
-            (self.x + 10, self.y + 10),
+            (10, 10),
             (self.width - 20, self.height - 20)
         ))
         self.element_add (handler_gui_elements.element_button_text(
             "OKAY",
-            (self.x + 10, self.y + self.height - 40),
+            (10, self.height - 40),
             (self.width - 20, 30)
         ))
         def updateMessage (input_message):
@@ -93,17 +73,17 @@ class popup_gameover (Popups):
         self.image = pygame.image.load("default/tg.png").convert_alpha()  # Specify the correct path        
         self.element_add(handler_gui_elements.element_box_text(
             "Game Over",
-            (self.x + 10, self.y + 10),
+            (10, 10),
             (self.width - 20, self.height - 20)
         ))
         self.element_add(handler_gui_elements.element_box_text(
             reason,
-            (self.x + 10, self.y + 40),
+            (10, 40),
             (self.width - 35, self.height - 60)
         ))
         self.element_add (handler_gui_elements.element_button_text(
             "OKAY",
-            (self.x + 10, self.y + self.height - 40),
+            (10, self.height - 40),
             (self.width - 20, 30)
         ))
 
@@ -115,16 +95,16 @@ class popup_prompt (Popups):
         self.image = pygame.image.load("default/tg.png").convert_alpha()  # Specify the correct path        
         self.element_add(handler_gui_elements.element_box_text(
             inquiry,
-            (self.x + 10, self.y + 10),
+            (10, 10),
             (self.width - 35, self.height - 20)
         ))
         self.element_add (handler_gui_elements.element_button_text(
             "YES",
-            (self.x + 10, self.y + self.height - 40),
+            (10, self.height - 40),
             (self.width - 20, 30)
         ))
         self.element_add (handler_gui_elements.element_button_text(
             "NO",
-            (self.x + 60, self.y + self.height - 40),
+            (60, self.height - 40),
             (self.width - 20, 30)
         ))
@@ -1,3 +1,4 @@
+import handler_rollback
 import socket
 import json
 import time
@@ -29,6 +30,10 @@ class NetworkInputHandler:
         self.input_delay = 2  # Frames of input delay for rollback
         self.max_rollback = 7  # Maximum frames to roll back
         
+        # Preallocated per-frame state snapshots; holds the current frame plus every frame we can roll back to
+        self.snapshot_ring = handler_rollback.SnapshotRing(self.max_rollback + 1)
+        self.snapshot_ring.register(handler_rollback.VarsStateProvider())
+        
         # Input buffers for each player
         self.input_buffers = {}  # player_id -> deque of InputState
         self.prediction_buffer = deque(maxlen=60)  # Store predicted inputs
@@ -174,6 +179,23 @@ class NetworkInputHandler:
         
         return rollback_frame
     
+    def register_state_provider(self, provider):
+        """Add game state (beyond handler_vars) that has to roll back with the frame"""
+        self.snapshot_ring.register(provider)
+    
+    def save_frame_state(self):
+        """Snapshot all registered state for current_frame; call once per frame before simulating it"""
+        self.snapshot_ring.capture(self.current_frame)
+    
+    def rollback_to_frame(self, frame):
+        """Restore the state captured at frame and rewind current_frame to it; False if that frame is out of reach"""
+        if self.current_frame - frame > self.max_rollback:
+            return False
+        if not self.snapshot_ring.restore(frame):
+            return False
+        self.current_frame = frame
+        return True
+    
     def _handle_incoming_data(self, data, addr=None):
         """Handle incoming network data"""
         try:
@@ -233,6 +255,9 @@ client.connect(player_id=2)
 
 # Game loop
 def game_loop():
+    # Snapshot state before this frame is simulated
+    network.save_frame_state()
+    
     # Add local input
     local_input = get_local_input()  # Your input gathering code
     network.add_local_input(local_input)
@@ -242,8 +267,8 @@ def game_loop():
     
     # Check for rollback
     rollback_frame = network.check_rollback()
-    if rollback_frame is not None:
-        rollback_to_frame(rollback_frame)  # Your rollback code
+    if rollback_frame is not None and network.rollback_to_frame(rollback_frame):
+        resimulate_from(rollback_frame)  # Your code: replay frames with the corrected inputs
     
     # Process frame
     process_game_frame(local_input, remote_input)
@@ -1,8 +1,20 @@
+import handler_loot
 import handler_vars
+import numpy as np
 import random
+import struct
 
 list_premadeItems = list()
 
+ITEM_STAT_COUNT = 6 # EVERY ITEM IS SIX TWO-LETTER CODES, ONE PER BUFF
+ITEM_CODE_MAX = 675 # 26*26 - 1, "ZZ"; THE MOST POINTS ONE BUFF CAN HOLD
+ITEM_CODE_NONE = 0xFFFF # PADDING IN A PACKED ARRAY FOR ITEMS SHORTER THAN THE WIDEST ONE; NOT PART OF THE ITEM
+ITEM_PACK_MAGIC = b"ITM1"
+
+# PACKED ITEMS: AN INVENTORY IS A (COUNT, WIDTH) uint16 ARRAY, ONE VALUE PER TWO-LETTER CODE, SO 12 BYTES FOR A SIX-BUFF ITEM
+# encodeItemStrings / decodeItemArray CONVERT WHOLE INVENTORIES TO AND FROM THE LEGACY STRINGS, LOSSLESSLY FOR STRINGS MADE OF A-Z PAIRS
+# packItemArray / unpackItemArray TURN AN ARRAY INTO BYTES FOR SAVES AND BACK WITHOUT COPYING
+
 itemNames_all_byType = (
 	"currency",
 	"ore",
@@ -40,7 +52,7 @@ itemNames_armor = (
 
 def generatePremadeItemList (input_numberOfItemsToBuild):
 	list_premadeItems.clear()
-	temp_currentLevel = handler_vars.returnVar("player_level")
+	temp_currentLevel = max(handler_vars.vars_getMe("level"), 1)
 	for x in range(input_numberOfItemsToBuild):
 		list_premadeItems.append(returnNewItem(temp_currentLevel))
 
@@ -58,22 +70,12 @@ def returnIntFromItemCode (input_itemCode):
 	return (first_letter * 26) + second_letter
 
 def returnItemStringFromIntList (input_intList):
-    result = ""
-    for num in input_intList:
-        code = returnItemCodeFromInt(num)
-        if code:  # Only add the code if it's valid
-            result += code
-    return result
+	# Only valid codes are kept
+	return "".join(code for code in map(returnItemCodeFromInt, input_intList) if code)
 
 def returnIntArrayFromItemString (input_itemString):
-    result = []
-    # Process string in pairs of 2 characters
-    for i in range(0, len(input_itemString), 2):
-        if i + 1 < len(input_itemString):  # Ensure we have 2 characters
-            code = input_itemString[i:i+2]
-            num = returnIntFromItemCode(code)
-            result.append(num)
-    return result
+	# Pairs of 2 characters; a trailing odd character is ignored
+	return [returnIntFromItemCode(input_itemString[i:i+2]) for i in range(0, len(input_itemString) - 1, 2)]
 
 def returnNewItem (input_level):
 	temp_whichItemType = returnRandomItemType()
@@ -85,48 +87,188 @@ def returnNewItem (input_level):
 		temp_pointsRemaining -= temptemp_pointsToDistribute
 		temp_buffs[temp_indexOfBuffToIncrease] += temptemp_pointsToDistribute
 		temp_indexOfBuffToIncrease += 1
-		if temp_indexOfBuffToIncrease > 5: temp_buffToIncrease = 0
+		if temp_indexOfBuffToIncrease > 5: temp_indexOfBuffToIncrease = 0
 	temp_outputString = returnItemStringFromIntList(temp_buffs)
 	return temp_outputString
 
 def returnBlendedItem (input_item1, input_item2):
-    # Ensure both strings have even length by padding with 'A' if needed
-    if len(input_item1) % 2 != 0:
-        input_item1 += 'A'
-    if len(input_item2) % 2 != 0:
-        input_item2 += 'A'
-    max_pairs = max(len(input_item1) // 2, len(input_item2) // 2)
-    input_item1 = input_item1.ljust(max_pairs * 2, 'A')
-    input_item2 = input_item2.ljust(max_pairs * 2, 'A')
-    
-    # Split strings into pairs of characters
-    pairs1 = [input_item1[i:i+2] for i in range(0, len(input_item1), 2)]
-    pairs2 = [input_item2[i:i+2] for i in range(0, len(input_item2), 2)]
-    
-    # Create new blended item string
-    blended_pairs = []
-    for i in range(len(pairs1)):
-        # For each position, randomly choose between item1 and item2's code
-        if random.random() < 0.5:
-            blended_pairs.append(pairs1[i])
-        else:
-            blended_pairs.append(pairs2[i])
-    
-    # Join all pairs back into a single string
-    return ''.join(blended_pairs)
+	# Ensure both strings have even length by padding with 'A' if needed; the shorter item is padded with 'A' codes
+	if len(input_item1) % 2 != 0:
+		input_item1 += 'A'
+	if len(input_item2) % 2 != 0:
+		input_item2 += 'A'
+	max_pairs = max(len(input_item1) // 2, len(input_item2) // 2)
+	input_item1 = input_item1.ljust(max_pairs * 2, 'A')
+	input_item2 = input_item2.ljust(max_pairs * 2, 'A')
+	# For each position, randomly choose between item1 and item2's code; one getrandbits call instead of a random() per pair
+	# (blendItemArrays does the same for whole packed inventories)
+	temp_bits = random.getrandbits(max_pairs) if max_pairs else 0
+	return ''.join((input_item1 if (temp_bits >> i) & 1 == 0 else input_item2)[i*2:i*2+2] for i in range(max_pairs))
 
 def returnRandomItemType ():
-	tempRandom = 100
-	match tempRandom:
-		case _ if tempRandom < 14:
-			return "armor"
-		case _ if tempRandom < 34:
-			return "ore"
-		case _ if tempRandom < 54:
-			return "weapon"
-		case _:
-			return "currency"
+	# THE ODDS ARE THE itemType LOOT TABLE IN main_customize
+	return handler_loot.get_loot_system().roll_one("itemType")
 
 def returnNonZeroRandom (input_maximumInt):
-	if input_maximumInt < 5: return input_maximumInt # If we allow anything less than 5, there is a huge hit to performance when mulitple items drop. For instance, imagine a series of 99 unlucky rolls of "1".
+	if input_maximumInt <= 5: return input_maximumInt # If we allow anything less than 5, there is a huge hit to performance when mulitple items drop. For instance, imagine a series of 99 unlucky rolls of "1".
 	return random.randrange(5, input_maximumInt)
+
+def generateItems (input_count, input_level, input_seed = None, input_concentration = 1.0):
+	"""
+	Build input_count items at once; the vectorized counterpart of returnNewItem
+	Each item's level points are split over its six buffs by Dirichlet weights: input_concentration near 0 puts most points in one buff,
+	1 gives returnNewItem-like lumpy items, large values spread points evenly
+	:param input_level: One level for every item, or one per item
+	:param input_seed: Same seed, same items
+	:return: (buffs as a (count, 6) uint16 array, item type index into itemNames_all_byType per item)
+	"""
+	temp_rng = np.random.default_rng(input_seed)
+	temp_levels = np.broadcast_to(np.asarray(input_level, np.int64), (input_count,))
+	temp_weights = temp_rng.dirichlet(np.full(ITEM_STAT_COUNT, float(input_concentration)), size=input_count)
+	# SYSTEMATIC ROUNDING: CUT THE RUNNING TOTAL OF level * WEIGHT AT ONE RANDOM OFFSET PER ITEM, SO EVERY BUFF GETS THE FLOOR OR CEILING
+	# OF ITS SHARE, THE BUFFS ALWAYS ADD UP TO THE LEVEL, AND ON AVERAGE EACH GETS EXACTLY level * WEIGHT
+	temp_cuts = np.floor(np.cumsum(temp_weights, axis=1) * temp_levels[:, None] + temp_rng.random((input_count, 1))).astype(np.int64)
+	temp_cuts[:, -1] = temp_levels # CUMSUM ROUNDING MUST NOT LOSE OR ADD A POINT
+	temp_buffs = np.diff(temp_cuts, axis=1, prepend=0)
+	np.minimum(temp_buffs, ITEM_CODE_MAX, out=temp_buffs) # A TWO-LETTER CODE CANNOT HOLD MORE
+
+	temp_typeTable = handler_loot.get_loot_system().table_for("itemType")
+	temp_typeIndex = {name: index for index, name in enumerate(itemNames_all_byType)}
+	temp_typeMap = np.array([temp_typeIndex[name] for name in temp_typeTable.names], np.int8)
+	temp_types = temp_typeMap[temp_typeTable.sampler.sample_many(temp_rng, input_count)]
+	return temp_buffs.astype(np.uint16), temp_types
+
+def returnItemStringsFromArray (input_buffs):
+	"""
+	The two-letter string code of every row of a (count, 6) buff array, like returnItemStringFromIntList for each row
+	:raises ValueError: If a code is outside 0..ITEM_CODE_MAX, which no pair of letters can spell
+	"""
+	temp_buffs = np.asarray(input_buffs, np.int64)
+	if temp_buffs.size and (temp_buffs.min() < 0 or temp_buffs.max() > ITEM_CODE_MAX):
+		temp_row = int(np.flatnonzero(((temp_buffs < 0) | (temp_buffs > ITEM_CODE_MAX)).any(axis=1))[0])
+		raise ValueError(f"Item row {temp_row} has a code outside 0..{ITEM_CODE_MAX}")
+	temp_letters = np.empty(temp_buffs.shape + (2,), np.uint8)
+	temp_letters[..., 0] = temp_buffs // 26 + ord('A')
+	temp_letters[..., 1] = temp_buffs % 26 + ord('A')
+	temp_width = temp_buffs.shape[1] * 2
+	temp_text = temp_letters.tobytes().decode('ascii')
+	return [temp_text[x:x + temp_width] for x in range(0, len(temp_text), temp_width)]
+
+def encodeItemStrings (input_itemStrings):
+	"""
+	Packed (count, width) uint16 array from legacy item strings, width being the most pairs in any string
+	Shorter strings are padded with ITEM_CODE_NONE, and a trailing odd character is ignored, as in returnIntArrayFromItemString
+	:raises ValueError: If a string has a character outside A-Z, spaces included
+	"""
+	temp_strings = list(input_itemStrings)
+	temp_lengths = np.fromiter(map(len, temp_strings), np.int64, len(temp_strings)) // 2 * 2
+	temp_width = int(temp_lengths.max()) if len(temp_strings) else 0
+	if len(temp_strings) and (temp_lengths == temp_width).all() and all(len(x) == temp_width for x in temp_strings):
+		temp_text = "".join(temp_strings) # THE COMMON CASE: EVERY ITEM THE SAME LENGTH, ONE JOIN AND NO PADDING
+	else:
+		temp_text = "".join(x[:temp_width].ljust(temp_width, " ") if len(x) % 2 == 0 else x[:-1].ljust(temp_width, " ") for x in temp_strings)
+	try:
+		temp_letters = np.frombuffer(temp_text.encode('ascii'), np.uint8).reshape(len(temp_strings), temp_width // 2, 2)
+	except UnicodeEncodeError:
+		raise ValueError("Item strings may only contain the letters A-Z")
+	# PADDING IS FOUND BY POSITION, NOT BY THE SPACE IT IS FILLED WITH, SO A SPACE INSIDE A STRING IS STILL REJECTED BELOW
+	temp_padding = np.arange(temp_width // 2) >= (temp_lengths // 2)[:, None]
+	temp_values = (temp_letters[..., 0].astype(np.int32) - ord('A')) * 26 + (temp_letters[..., 1].astype(np.int32) - ord('A'))
+	temp_bad = ((temp_letters < ord('A')) | (temp_letters > ord('Z'))).any(axis=2) & ~temp_padding
+	if temp_bad.any():
+		temp_row = int(np.flatnonzero(temp_bad.any(axis=1))[0])
+		raise ValueError(f"Item string {temp_strings[temp_row]!r} has a character outside A-Z")
+	temp_values[temp_padding] = ITEM_CODE_NONE
+	return temp_values.astype(np.uint16)
+
+def decodeItemArray (input_items):
+	"""
+	Legacy item strings from a packed array; ITEM_CODE_NONE padding is dropped, so encode then decode gives back the same strings
+	:raises ValueError: If a code other than ITEM_CODE_NONE is outside 0..ITEM_CODE_MAX
+	"""
+	temp_items = np.asarray(input_items, np.uint16)
+	temp_padding = temp_items == ITEM_CODE_NONE
+	if not temp_padding.any():
+		return returnItemStringsFromArray(temp_items)
+	temp_strings = returnItemStringsFromArray(np.where(temp_padding, 0, temp_items))
+	temp_widths = (~temp_padding).sum(axis=1) * 2
+	# PADDING ONLY EVER TRAILS AN ITEM, SO CUTTING EACH STRING TO ITS OWN LENGTH REMOVES IT
+	return [x[:width] for x, width in zip(temp_strings, temp_widths.tolist())]
+
+def blendItemArrays (input_items1, input_items2, input_pickFirst = None, input_seed = None):
+	"""
+	Blend two packed arrays row by row, as returnBlendedItem does for one pair of strings: each code comes from one parent at random
+	Arrays of different widths are padded with code 0 ("AA"), and padding is treated as "AA", like the legacy 'A' padding
+	:param input_pickFirst: Optional boolean array, True where the code comes from input_items1; drawn from input_seed otherwise
+	"""
+	temp_items1, temp_items2 = np.asarray(input_items1, np.uint16), np.asarray(input_items2, np.uint16)
+	temp_width = max(temp_items1.shape[1], temp_items2.shape[1])
+	temp_items1, temp_items2 = (np.pad(np.where(x == ITEM_CODE_NONE, 0, x), ((0, 0), (0, temp_width - x.shape[1])))
+								for x in (temp_items1, temp_items2))
+	if input_pickFirst is None:
+		input_pickFirst = np.random.default_rng(input_seed).random(np.broadcast_shapes(temp_items1.shape, temp_items2.shape)) < 0.5
+	return np.where(input_pickFirst, temp_items1, temp_items2).astype(np.uint16)
+
+def packItemArray (input_items):
+	"""Bytes for a packed array: magic, width, count, then little-endian uint16 codes"""
+	temp_items = np.ascontiguousarray(input_items, '<u2')
+	return ITEM_PACK_MAGIC + struct.pack('<HI', temp_items.shape[1], temp_items.shape[0]) + temp_items.tobytes()
+
+def unpackItemArray (input_bytes):
+	"""The packed array in bytes made by packItemArray; a read-only view of them, not a copy"""
+	if input_bytes[:4] != ITEM_PACK_MAGIC:
+		raise ValueError("Not a packed item array")
+	temp_width, temp_count = struct.unpack_from('<HI', input_bytes, 4)
+	return np.frombuffer(input_bytes, '<u2', temp_width * temp_count, 10).reshape(temp_count, temp_width)
+
+def generateItemStrings (input_count, input_level, input_seed = None, input_concentration = 1.0):
+	"""generateItems, plus the legacy string code of every item"""
+	temp_buffs, temp_types = generateItems(input_count, input_level, input_seed, input_concentration)
+	return temp_buffs, temp_types, returnItemStringsFromArray(temp_buffs)
+
+def benchmark_items (input_count = 1000000, input_level = 60, input_loopCount = 20000):
+	"""returnNewItem in a loop versus generateItems, at a million items"""
+	import time
+	temp_start = time.perf_counter()
+	for x in range(input_loopCount):
+		returnNewItem(input_level)
+	temp_loopSeconds = (time.perf_counter() - temp_start) * input_count / input_loopCount
+
+	temp_start = time.perf_counter()
+	temp_buffs, temp_types = generateItems(input_count, input_level, 7)
+	temp_arraySeconds = time.perf_counter() - temp_start
+	temp_start = time.perf_counter()
+	temp_strings = returnItemStringsFromArray(temp_buffs)
+	temp_stringSeconds = time.perf_counter() - temp_start
+	print(f"{input_count} items at level {input_level}: returnNewItem loop ~{temp_loopSeconds:.1f} s (from {input_loopCount}), "
+		f"generateItems {temp_arraySeconds * 1000:.0f} ms, string codes {temp_stringSeconds * 1000:.0f} ms more")
+	print(f"  e.g. {temp_strings[0]} ({itemNames_all_byType[temp_types[0]]}), {temp_buffs.nbytes // input_count} bytes per item as arrays")
+
+def benchmark_codecs (input_count = 1000000, input_legacyCount = 50000):
+	"""Legacy one-pair-at-a-time conversion and blending versus the packed, vectorized codecs"""
+	import time
+	temp_buffs, temp_types, temp_strings = generateItemStrings(input_count, 60, 9)
+	temp_timings = []
+	def timed (input_label, input_function, input_scale = 1):
+		temp_start = time.perf_counter()
+		temp_result = input_function()
+		temp_timings.append((input_label, (time.perf_counter() - temp_start) * 1000 * input_scale))
+		return temp_result
+
+	temp_scale = input_count / input_legacyCount
+	timed("legacy string -> ints", lambda: [returnIntArrayFromItemString(x) for x in temp_strings[:input_legacyCount]], temp_scale)
+	temp_items = timed("encodeItemStrings", lambda: encodeItemStrings(temp_strings))
+	timed("legacy ints -> string", lambda: [returnItemStringFromIntList(x) for x in temp_buffs[:input_legacyCount].tolist()], temp_scale)
+	temp_back = timed("decodeItemArray", lambda: decodeItemArray(temp_items))
+	timed("legacy blend", lambda: [returnBlendedItem(x, y) for x, y in zip(temp_strings[:input_legacyCount], temp_strings[1:input_legacyCount + 1])], temp_scale)
+	timed("blendItemArrays", lambda: blendItemArrays(temp_items[:-1], temp_items[1:], input_seed=1))
+	temp_packed = timed("packItemArray", lambda: packItemArray(temp_items))
+	timed("unpackItemArray", lambda: unpackItemArray(temp_packed))
+	assert temp_back == temp_strings and (temp_items == temp_buffs).all()
+	for label, ms in temp_timings:
+		print(f"{label:>22}: {ms:9.1f} ms per {input_count} items")
+	print(f"{len(temp_packed) / input_count:.1f} bytes per item packed; round trip through strings is lossless")
+
+if __name__ == "__main__":
+	benchmark_items()
+	benchmark_codecs()
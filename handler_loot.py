@@ -0,0 +1,175 @@
+import handler_config
+import numpy as np
+
+# DATA-DRIVEN LOOT (main_customize.thisGame_lootTables)
+# EACH TABLE IS TURNED INTO AN ALIAS TABLE ONCE, SO A WEIGHTED DRAW IS ONE UNIFORM INDEX AND ONE COIN FLIP WHATEVER THE NUMBER OF DROPS
+# DRAWS COME FROM NAMED RNG STREAMS DERIVED FROM ONE SEED; A STREAM'S SEQUENCE DEPENDS ONLY ON THE SEED AND ITS NAME,
+# SO ZOMBIE DROPS STAY THE SAME WHETHER OR NOT A PIRATE DIED FIRST, AND A SEEDED RUN CAN BE REPLAYED EXACTLY
+
+from typing import Callable, Dict, List, Optional, Sequence
+import zlib
+
+NOTHING = "nothing"
+
+class AliasTable:
+    """Vose's alias method: O(n) to build, O(1) per weighted draw"""
+    def __init__(self, weights: Sequence[float]):
+        weights = np.asarray(weights, np.float64)
+        if len(weights) == 0 or (weights <= 0).any():
+            raise ValueError("Alias table weights must be positive and there must be at least one")
+        count = len(weights)
+        scaled = weights * count / weights.sum()
+        self.prob = np.ones(count, np.float64)
+        self.alias = np.arange(count, dtype=np.int32)
+        small = [index for index in range(count) if scaled[index] < 1.0]
+        large = [index for index in range(count) if scaled[index] >= 1.0]
+        while small and large:
+            low, high = small.pop(), large.pop()
+            self.prob[low] = scaled[low]
+            self.alias[low] = high
+            scaled[high] -= 1.0 - scaled[low]
+            (small if scaled[high] < 1.0 else large).append(high)
+        # WHATEVER IS LEFT IS 1.0 UP TO ROUNDING, SO KEEPS prob 1
+        self.prob_list = self.prob.tolist() # PLAIN LISTS FOR SINGLE DRAWS, WHERE NUMPY SCALAR INDEXING WOULD DOMINATE
+        self.alias_list = self.alias.tolist()
+
+    def __len__(self):
+        return len(self.prob)
+
+    def sample(self, rng: np.random.Generator) -> int:
+        # ONE UNIFORM NUMBER: ITS INTEGER PART PICKS THE COLUMN AND ITS FRACTION IS THE COIN FLIP
+        scaled = rng.random() * len(self.prob_list)
+        index = int(scaled)
+        return index if scaled - index < self.prob_list[index] else self.alias_list[index]
+
+    def sample_many(self, rng: np.random.Generator, count: int) -> np.ndarray:
+        index = rng.integers(len(self.prob), size=count)
+        return np.where(rng.random(count) < self.prob[index], index, self.alias[index])
+
+class RNGStreams:
+    """Independent, reproducible np.random.Generator streams by name"""
+    def __init__(self, seed: Optional[int] = None):
+        self.reseed(seed)
+
+    def reseed(self, seed: Optional[int] = None) -> None:
+        """Restart every stream; None picks a fresh random seed, which is kept in self.seed so the run can be replayed"""
+        self.seed = int(np.random.SeedSequence().entropy) if seed is None else seed
+        self.streams: Dict[str, np.random.Generator] = {}
+
+    def get(self, name: str) -> np.random.Generator:
+        stream = self.streams.get(name)
+        if stream is None:
+            # crc32, UNLIKE hash(), IS THE SAME IN EVERY PROCESS
+            sequence = np.random.SeedSequence(self.seed, spawn_key=(zlib.crc32(name.encode('utf-8')),))
+            stream = self.streams[name] = np.random.Generator(np.random.PCG64(sequence))
+        return stream
+
+class LootTable:
+    def __init__(self, table_def: handler_config.LootTableDef):
+        self.group = table_def.group
+        self.names = [drop for drop, weight in table_def.drops]
+        self.rolls = table_def.rolls
+        self.sampler = AliasTable([weight for drop, weight in table_def.drops])
+        self.nothing = self.names.index(NOTHING) if NOTHING in self.names else -1
+
+    def roll(self, rng: np.random.Generator) -> List[str]:
+        """Drops for one death; "nothing" draws are left out"""
+        drops = []
+        for x in range(self.rolls):
+            index = self.sampler.sample(rng)
+            if index != self.nothing:
+                drops.append(self.names[index])
+        return drops
+
+    def roll_many(self, rng: np.random.Generator, deaths: int) -> np.ndarray:
+        """Drop indices (into self.names) for many deaths at once, shape (deaths, rolls); "nothing" included"""
+        return self.sampler.sample_many(rng, deaths * self.rolls).reshape(deaths, self.rolls)
+
+class LootSystem:
+    def __init__(self, tables: Optional[Dict[str, handler_config.LootTableDef]] = None, seed: Optional[int] = None):
+        """
+        :param tables: LootTableDef by group; defaults to the compiled thisGame_lootTables
+        :param seed: Seed for every stream; None for a random one (see RNGStreams.reseed)
+        """
+        if tables is None:
+            tables = handler_config.get_config().loot_tables
+        self.tables = {group: LootTable(table_def) for group, table_def in tables.items()}
+        self.streams = RNGStreams(seed)
+        self.listeners: List[Callable[[int, float, float, List[str]], None]] = []
+
+    def table_for(self, group: str) -> LootTable:
+        table = self.tables.get(group) or self.tables.get("default")
+        if table is None:
+            raise ValueError(f"No loot table for '{group}' and no default table")
+        return table
+
+    def roll(self, group: str, stream: Optional[str] = None) -> List[str]:
+        """Drops for one death of an enemy in group, drawn from the stream named after the group unless one is given"""
+        return self.table_for(group).roll(self.streams.get(stream or group))
+
+    def roll_one(self, group: str, stream: Optional[str] = None) -> str:
+        """A single draw, "nothing" included"""
+        table = self.table_for(group)
+        return table.names[table.sampler.sample(self.streams.get(stream or group))]
+
+    def roll_bulk(self, group: str, deaths: int, seed: Optional[int] = None) -> Dict[str, int]:
+        """
+        How often each drop comes up over many deaths, for balance analysis; does not touch the game's streams
+        :param seed: Seed for this analysis; None uses a stream derived from the system seed
+        """
+        table = self.table_for(group)
+        rng = np.random.default_rng(seed) if seed is not None else RNGStreams(self.streams.seed).get("bulk:" + group)
+        counts = np.bincount(table.roll_many(rng, deaths).ravel(), minlength=len(table.names))
+        return dict(zip(table.names, counts.tolist()))
+
+    def add_drop_listener(self, callback: Callable[[int, float, float, List[str]], None]) -> None:
+        """callback(npc_id, x, y, drops) whenever an NPC drops something"""
+        self.listeners.append(callback)
+
+    def drop(self, npc_id: int, x: float, y: float, group: str) -> List[str]:
+        """Roll for one death and tell the listeners, which spawn the pickups"""
+        drops = self.roll(group)
+        if drops:
+            for callback in self.listeners:
+                callback(npc_id, x, y, drops)
+        return drops
+
+# Global loot system
+loot_system = None
+
+def get_loot_system() -> LootSystem:
+    global loot_system
+    if loot_system is None:
+        loot_system = LootSystem()
+    return loot_system
+
+def seed_loot(seed: Optional[int]) -> None:
+    """Restart every loot stream from a seed, e.g. for a replay or a seeded run"""
+    get_loot_system().streams.reseed(seed)
+
+def benchmark_loot(deaths: int = 1000000, drops: int = 64) -> None:
+    """Alias draws versus a cumulative-weight scan, and a bulk roll for balance analysis"""
+    import random
+    import time
+    weights = [float(x % 7 + 1) for x in range(drops)]
+    table = AliasTable(weights)
+    rng = np.random.default_rng(5)
+
+    start = time.perf_counter()
+    for x in range(100000):
+        random.choices(range(drops), weights)
+    choices_us = (time.perf_counter() - start) * 1e6 / 100000
+    start = time.perf_counter()
+    for x in range(100000):
+        table.sample(rng)
+    alias_us = (time.perf_counter() - start) * 1e6 / 100000
+
+    start = time.perf_counter()
+    counts = np.bincount(table.sample_many(rng, deaths), minlength=drops)
+    bulk_ms = (time.perf_counter() - start) * 1000
+    error = np.abs(counts / deaths - np.array(weights) / sum(weights)).max()
+    print(f"one draw from {drops} weighted drops: random.choices {choices_us:.2f} us, alias {alias_us:.2f} us")
+    print(f"{deaths} bulk draws: {bulk_ms:.1f} ms, largest frequency error {error:.5f}")
+
+if __name__ == "__main__":
+    benchmark_loot()
@@ -1,24 +1,177 @@
+import handler_combat
+import handler_loot
+import handler_pathfinding
+import handler_spatial_hash
+import handler_status_effects
 import handler_vars
+import numpy as np
+
+# EVERY NPC'S NUMBERS LIVE IN ONE NPCStore AS CONTIGUOUS NUMPY COLUMNS, ONE ROW PER NPC
+# npcObject IS A THIN VIEW ONTO ITS ROW: THE OLD ATTRIBUTE NAMES (stat_hp, flag_isAwake, ...) READ AND WRITE THE COLUMNS
+# SO GAME CODE KEEPS WORKING ONE NPC AT A TIME, WHILE GROUP-WIDE WORK (HEALTH, HEALING, DEATHS, XP) RUNS AS ARRAY OPERATIONS
+
+NPC_GROUPS = ("companion", "friendly", "enemy", "boss")
+NPC_GROUP_IDS = {name: index for index, name in enumerate(NPC_GROUPS)} # STORED IN NPCStore.group; -1 IS NO GROUP
+
+class NPCStore:
+    # (COLUMN, DTYPE, STARTING VALUE)
+    COLUMNS = (
+        ("hp", np.float32, 100),
+        ("hp_max", np.float32, 100),
+        ("mp", np.float32, 0),
+        ("mp_max", np.float32, 0),
+        ("xp", np.int64, 0),
+        ("level", np.int32, 1),
+        ("dying", np.float32, 0), # SECONDS LEFT IN THE DEATH ANIMATION
+        ("x", np.float32, 0),
+        ("y", np.float32, 0),
+        ("awake", np.bool_, False),
+        ("group", np.int8, -1), # ACTIVE GROUP, -1 WHEN IN NONE (E.G. DEAD)
+        ("home_group", np.int8, -1), # LAST GROUP JOINED; WHERE A RESURRECTED NPC GOES BACK TO
+        ("group_slot", np.int32, -1), # POSITION IN ITS GROUP'S DENSE ARRAYS IN handler_npc_minder
+        ("active_slot", np.int32, -1), # POSITION IN handler_npc_minder.group_active, WHICH HOLDS EVERY NPC IN ANY ACTIVE GROUP
+        ("pool", np.int16, -1), # INDEX INTO NPCStore.pools FOR NPCS OWNED BY A handler_npc_pools POOL
+        ("pool_slot", np.int32, -1), # POSITION IN THE POOL'S DORMANT STACK, -1 WHILE AWAKE
+        ("armor", np.float32, 0),
+        ("shield", np.float32, 0), # DAMAGE ABSORBED BEFORE hp; RAISED BY shield STATUS EFFECTS
+        ("damage", np.float32, 0),
+        ("ai_frame", np.int32, -1), # AI SCHEDULER FRAME OF THIS NPC'S LAST THINK; -1 UNTIL THE SCHEDULER FIRST SEES IT AFTER IT BECOMES ACTIVE
+        ("ai_time", np.float64, 0), # SCHEDULER CLOCK AT THAT THINK, SO ITS NEXT THINK IS GIVEN THE TIME IN BETWEEN
+        ("ai_tier", np.int8, 0), # LAST LEVEL-OF-DETAIL TIER THE AI SCHEDULER GAVE THIS NPC
+        ("model_id", np.int32, 0),
+        ("material_base", np.int32, 0),
+        ("material_current", np.int32, 0),
+        ("model_base", np.int32, 0),
+        ("model_current", np.int32, 0)
+    )
+
+    def __init__(self, capacity = 1024):
+        self.capacity = capacity
+        self.count = 0
+        self.views = np.full(capacity, None, object) # npcObject PER ROW, CREATED ON DEMAND FOR ROWS MADE BY allocate_many
+        for name, dtype, default in NPCStore.COLUMNS:
+            setattr(self, name, np.full(capacity, default, dtype))
+        self.spatial = handler_spatial_hash.SpatialHash(self) # NPCS IN A GROUP, BY POSITION; handler_npc_minder ADDS AND REMOVES THEM
+        self.pools = [] # handler_npc_pools.NPCPool OBJECTS THAT OWN ROWS IN THIS STORE
+        self.combat = handler_combat.CombatResolver(self) # DAMAGE AND HEALING QUEUED THIS FRAME; handler_npc_minder RESOLVES IT
+
+    def _grow (self, input_capacity):
+        # COLUMNS ARE REPLACED, SO ALWAYS REACH THEM THROUGH THE STORE RATHER THAN KEEPING A COLUMN AROUND
+        for name, dtype, default in NPCStore.COLUMNS:
+            temp_column = np.full(input_capacity, default, dtype)
+            temp_column[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, temp_column)
+        temp_views = np.full(input_capacity, None, object)
+        temp_views[:self.count] = self.views[:self.count]
+        self.views = temp_views
+        self.capacity = input_capacity
+
+    def allocate_many (self, input_count):
+        """Add input_count rows with starting values and return their ids; views are made only when asked for"""
+        if self.count + input_count > self.capacity:
+            temp_capacity = self.capacity
+            while temp_capacity < self.count + input_count:
+                temp_capacity *= 2
+            self._grow(temp_capacity)
+        temp_ids = np.arange(self.count, self.count + input_count, dtype=np.int32)
+        self.count += input_count
+        return temp_ids
+
+    def view (self, input_npcID):
+        temp_view = self.views[input_npcID]
+        if temp_view is None:
+            temp_view = npcObject(input_npcID, self)
+        return temp_view
+
+    def ids_in_group (self, input_group):
+        return np.flatnonzero(self.group[:self.count] == NPC_GROUP_IDS[input_group])
+
+    def group_health (self, input_group):
+        """Average health percentage of a group, 0 if it is empty"""
+        return self.health_percent(self.ids_in_group(input_group))
+
+    def health_percent (self, input_ids):
+        if len(input_ids) == 0:
+            return 0
+        return float(np.mean(self.hp[input_ids] / self.hp_max[input_ids]) * 100)
+
+    def heal (self, input_ids, input_amount):
+        """healMe for many NPCs at once"""
+        self.hp[input_ids] = np.minimum(self.hp[input_ids] + input_amount, self.hp_max[input_ids])
+
+    def restore_magic (self, input_ids, input_amount):
+        """magicMe for many NPCs at once"""
+        self.mp[input_ids] = np.minimum(self.mp[input_ids] + input_amount, self.mp_max[input_ids])
+
+    def grant_xp (self, input_ids, input_amount):
+        """xpMe for many NPCs at once; like adjust_currentLevel, each call levels an NPC up at most once"""
+        self.xp[input_ids] += input_amount
+        self.level[input_ids] += (self.level[input_ids].astype(np.int64) * 1000 <= self.xp[input_ids])
+
+    def find_dead (self):
+        """Ids of NPCs that are still in a group but have no hp left"""
+        temp_count = self.count
+        return np.flatnonzero((self.group[:temp_count] >= 0) & (self.hp[:temp_count] <= 0))
+
+def storeColumnProperty (input_column, input_type):
+    """npcObject attribute backed by one NPCStore column; reads come back as plain Python values"""
+    def getter (self):
+        return input_type(getattr(self.store, input_column)[self.npc_id])
+
+    def setter (self, input_value):
+        getattr(self.store, input_column)[self.npc_id] = input_value
+    return property(getter, setter)
+
+def positionProperty (input_column):
+    """pos_x / pos_y: writes also move the NPC in the store's spatial hash"""
+    def getter (self):
+        return float(getattr(self.store, input_column)[self.npc_id])
+
+    def setter (self, input_value):
+        getattr(self.store, input_column)[self.npc_id] = input_value
+        self.store.spatial.moved(self.npc_id)
+    return property(getter, setter)
+
+def statusEffectProperty (input_effect):
+    """Keeps the old flag_is* counters working; > 0 is the number of remaining seconds of the effect in handler_status_effects
+    Assigning sets the remaining time (so -= 1 shortens it and 0 cures it); only starting the effect lands its instant amount"""
+    def getter (self):
+        return handler_status_effects.get_status_engine().get_remaining(self.npc_id, input_effect)
+
+    def setter (self, input_seconds):
+        handler_status_effects.get_status_engine().set_remaining(self.npc_id, input_effect, input_seconds)
+    return property(getter, setter)
 
 class npcObject:
-    def __init__(self):
-        self.stat_hp = 100
-        self.stat_hp_max = 100
-        self.stat_mp = 0
-        self.stat_mp_max = 0
-        self.model_idnum = 0
-        self.flag_isAwake = False
-        self.flag_isPoisoned = 0 # INT > 0 IS THE NUMBER OF REMAINING SECONDS OF POISON
-        self.flag_isStunned = 0 # INT > 0 IS THE NUMBER OF REMAINING SECONDS OF STUN
-        self.flag_isBurning = 0 # INT > 0 IS THE NUMBER OF REMAINING SECONDS OF BURNING
-        self.flag_isFrozen = 0 # INT > 0 IS THE NUMBER OF REMAINING SECONDS OF FROZEN
-        self.flag_isDying = 0 # INT > 0 IS THE NUMBER OF REMAINING SECONDS IN THE DEATH ANIMATION
-        self.material_base = 0
-        self.material_current = 0
-        self.model_base = 0
-        self.model_current = 0
-        self.xp_cumulative = 0
-        self.xp_level = 1
+    stat_hp = storeColumnProperty("hp", float)
+    stat_hp_max = storeColumnProperty("hp_max", float)
+    stat_mp = storeColumnProperty("mp", float)
+    stat_mp_max = storeColumnProperty("mp_max", float)
+    stat_armor = storeColumnProperty("armor", float)
+    stat_shield = storeColumnProperty("shield", float)
+    model_idnum = storeColumnProperty("model_id", int)
+    flag_isAwake = storeColumnProperty("awake", bool)
+    flag_isPoisoned = statusEffectProperty("poison")
+    flag_isStunned = statusEffectProperty("stun")
+    flag_isBurning = statusEffectProperty("burn")
+    flag_isFrozen = statusEffectProperty("freeze")
+    flag_isDying = storeColumnProperty("dying", float) # > 0 IS THE NUMBER OF REMAINING SECONDS IN THE DEATH ANIMATION
+    material_base = storeColumnProperty("material_base", int)
+    material_current = storeColumnProperty("material_current", int)
+    model_base = storeColumnProperty("model_base", int)
+    model_current = storeColumnProperty("model_current", int)
+    xp_cumulative = storeColumnProperty("xp", int)
+    xp_level = storeColumnProperty("level", int)
+    pos_x = positionProperty("x")
+    pos_y = positionProperty("y")
+
+    def __init__(self, input_npcID = None, input_store = None):
+        """npcObject() adds a new NPC to the store; pass an id to view a row made by NPCStore.allocate_many"""
+        self.store = npc_store if input_store is None else input_store
+        if input_npcID is None:
+            input_npcID = int(self.store.allocate_many(1)[0])
+        self.npc_id = input_npcID # ROW IN THE STORE; ALSO THE ENTITY ID USED BY THE STATUS EFFECT ENGINE
+        self.store.views[input_npcID] = self
 
     ### CHECKS ###
 
@@ -36,43 +189,52 @@ class npcObject:
     
     ### DEFINED FUNCTIONS SPECIFIC TO THIS NPC'S MIND (BEHAVIOR, SKILLS, DAMAGE, ETC.) ###
 
-    def affectMe (self, input_whichStatusEffect, input_duration = 1):
-        """Apply status effects like poison, stun, etc."""
-        pass
+    def affectMe (self, input_whichStatusEffect, input_duration = None):
+        """Apply status effects like poison, stun, etc.; the duration defaults to the one in main_customize"""
+        handler_status_effects.get_status_engine().apply(self.npc_id, input_whichStatusEffect, input_duration)
 
-    def affectTarget (self, input_target, input_whichStatusEffect, input_duration = 1):
+    def affectTarget (self, input_target, input_whichStatusEffect, input_duration = None):
         """Apply status effects like poison, stun, etc."""
-        pass
+        input_target.affectMe(input_whichStatusEffect, input_duration)
 
     def ai_state_update (self, input_newState):
         """Update enemy AI state machine"""
         pass
 
+    def ai_think (self, input_deltaTime):
+        """One AI step, run by handler_ai_scheduler; input_deltaTime is the time since this NPC last thought, which is more than a frame for distant NPCs"""
+        self.update_position(input_deltaTime)
+
     def ai_state_empty (self):
         """Reset enemy to doing nothing"""
         pass
 
-    def damageMe (self, input_damageAmount, input_damageType):
-        self.stat_hp -= input_damageAmount
-        if self.stat_hp <= 0:
-            self.killMe()
+    def damageMe (self, input_damageAmount, input_damageType, input_sourceID = -1):
+        """Queue damage for this frame's combat resolve, where armor is applied and a death calls killMe"""
+        self.store.combat.queue_damage(self.npc_id, input_damageAmount, input_damageType, input_sourceID)
 
-    def damageTarget (self, target, input_damageAmount, input_damageType):
-        """Execute attack behavior against target"""
-        pass
+    def damageTarget (self, target, input_damageAmount = None, input_damageType = "physical"):
+        """Execute attack behavior against target; the amount defaults to this NPC's damage from thisGame_enemies"""
+        if input_damageAmount is None:
+            input_damageAmount = float(self.store.damage[self.npc_id])
+        target.damageMe(input_damageAmount, input_damageType, self.npc_id)
 
     def drop_loot (self):
-        """Generate and drop loot upon death"""
-        pass
+        """Generate and drop loot upon death, from the loot table of this NPC's enemy group (the default table if it has none)"""
+        temp_pool = self.store.pool[self.npc_id]
+        temp_group = self.store.pools[temp_pool].type_name if temp_pool >= 0 else "default"
+        return handler_loot.get_loot_system().drop(self.npc_id, float(self.pos_x), float(self.pos_y), temp_group)
 
-    def healMe (self, input_healAmount):
-        self.stat_hp += input_healAmount
-        if self.stat_hp > self.stat_hp_max:
-            self.stat_hp = self.stat_hp_max
+    def healMe (self, input_healAmount, input_sourceID = -1):
+        """Queue healing for this frame's combat resolve; it is netted against the frame's damage and capped at stat_hp_max"""
+        self.store.combat.queue_heal(self.npc_id, input_healAmount, input_sourceID)
 
     def hideMe (self):
         """Hide the enemy from view when it is dead"""
         self.flag_isAwake = False
+        temp_pool = self.store.pool[self.npc_id]
+        if temp_pool >= 0:
+            self.store.pools[temp_pool].release(self) # BACK TO THE DORMANT SET, READY TO BE WOKEN AGAIN
 
     def killMe (self):
         self.ai_state_empty()
@@ -94,11 +256,15 @@ class npcObject:
 
     def wakeMe (self, input_x, input_y):
         """Return a hidden enemy to the world and set their state to patrolling"""
+        self.teleportMe(input_x, input_y)
         self.flag_isAwake = True
+        temp_pool = self.store.pool[self.npc_id]
+        if temp_pool >= 0:
+            self.store.pools[temp_pool].acquire(self) # OUT OF THE DORMANT SET AND INTO ITS ACTIVE GROUP
 
     def xpMe (self, input_xpAmount):
         self.xp_cumulative += input_xpAmount
-        adjust_currentLevel()
+        self.adjust_currentLevel()
 
     ### DEFINED FUNCTIONS SPECIFIC TO THIS NPC'S MODEL
 
@@ -106,9 +272,13 @@ class npcObject:
         """Play specified animation"""
         pass
 
-    def calculate_path_to_target (self, input_targetPosition):
-        """Calculate pathfinding to reach target position"""
-        pass
+    def calculate_path_to_target (self, input_targetPosition, input_callback = None):
+        """Ask the path service for a route to the target position; the request's path fills in a few frames later"""
+        temp_service = handler_pathfinding.get_path_service()
+        if temp_service is None:
+            return None # NO LEVEL HAS SET A NAVIGATION GRID
+        self.path_request = temp_service.request_path((float(self.pos_x), float(self.pos_y)), input_targetPosition, input_callback, self.npc_id)
+        return self.path_request
 
     def changeMaterial (self, input_newMat):
         """Swap material of model when suffering from status effects"""
@@ -123,13 +293,54 @@ class npcObject:
         """Check if player is within aggression range"""
         pass
 
+    def return_distanceTo (self, input_x, input_y):
+        return float(np.hypot(self.store.x[self.npc_id] - input_x, self.store.y[self.npc_id] - input_y))
+
     def teleportMe (self, input_x, input_y):
         """Move the model to a specific location without animation or pathfinding"""
-        pass
+        self.store.x[self.npc_id] = input_x
+        self.store.y[self.npc_id] = input_y
+        self.store.spatial.moved(self.npc_id)
 
     def update_position (self, delta_time):
         """Update model position based on movement patterns and time"""
         pass
 
     # NOTE: IDEALLY YOU DON'T WANT TO CREATE AND/OR DESTROY NPC MODELS BETWEEN LEVELS. THIS IS INEFFICIENT
-    # INSTEAD, HIDE THE MODELS WHEN THEY ARE NOT IN THE IMMEDIATE AREA OF THE PLAYER
\ No newline at end of file
+    # INSTEAD, HIDE THE MODELS WHEN THEY ARE NOT IN THE IMMEDIATE AREA OF THE PLAYER
+
+# Global NPC store; npcObject() adds to it unless given another store
+npc_store = NPCStore()
+
+def get_npc_store():
+    return npc_store
+
+def benchmark_store (input_npcCount = 50000, input_repeats = 20):
+    """Group health, group healing and death detection: a loop over npcObjects versus array operations on the store"""
+    import time
+    temp_store = NPCStore(input_npcCount)
+    temp_ids = temp_store.allocate_many(input_npcCount)
+    temp_store.group[temp_ids] = NPC_GROUP_IDS["enemy"]
+    temp_store.hp[temp_ids] = np.random.uniform(-10, 100, input_npcCount)
+    temp_npcs = [temp_store.view(npc_id) for npc_id in temp_ids.tolist()]
+
+    def loopVersion ():
+        temp_health = sum(npc.stat_hp / npc.stat_hp_max * 100 for npc in temp_npcs) / len(temp_npcs)
+        for npc in temp_npcs:
+            npc.stat_hp = min(npc.stat_hp + 1, npc.stat_hp_max)
+        return temp_health, [npc for npc in temp_npcs if npc.return_amIDead()]
+
+    def arrayVersion ():
+        temp_health = temp_store.group_health("enemy")
+        temp_store.heal(temp_store.ids_in_group("enemy"), 1)
+        return temp_health, temp_store.find_dead()
+
+    for label, function in (("npcObject loop", loopVersion), ("store arrays", arrayVersion)):
+        temp_start = time.perf_counter()
+        for x in range(input_repeats):
+            function()
+        temp_ms = (time.perf_counter() - temp_start) * 1000 / input_repeats
+        print(f"{label:>15}: {temp_ms:8.3f} ms for health + heal + deaths over {input_npcCount} NPCs")
+
+if __name__ == "__main__":
+    benchmark_store()
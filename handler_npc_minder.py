@@ -1,12 +1,136 @@
 import handler_vars
 import handler_npc
+import handler_ai_scheduler
+import handler_status_effects
+import numpy as np
+
+# THE NUMBERS FOR EVERY NPC (AND WHICH GROUP IT IS IN) ALSO LIVE IN handler_npc.npc_store, SO GROUP-WIDE WORK RUNS ON ARRAYS
+
+class NPCGroup:
+    """Dense membership for one group: npc ids and their views side by side in preallocated arrays, with each NPC's position kept in its store row
+    Joining appends and leaving swaps the last member into the hole, so both are O(1) whatever the group size"""
+    def __init__(self, name, capacity = 64, slot_column = "group_slot", everyone = None):
+        """
+        :param slot_column: Store column holding each member's slot in this group
+        :param everyone: Another NPCGroup that every member of this one is also kept in, with its own slot column
+        """
+        self.name = name
+        self.slot_column = slot_column
+        self.everyone = everyone
+        self.count = 0
+        self.ids = np.zeros(capacity, np.int32)
+        self.views = np.full(capacity, None, object) # npcObject PER MEMBER, PARALLEL TO ids
+        self.slot_numbers = np.arange(capacity, dtype=np.int32) # 0, 1, 2, ... SLICED INSTEAD OF BUILDING A NEW arange PER add_many
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        # A COPY, SO MEMBERS MAY JOIN OR LEAVE WHILE THIS IS BEING ITERATED
+        return iter(self.views[:self.count].tolist())
+
+    def __getitem__(self, index):
+        return self.views[:self.count][index]
+
+    def __contains__(self, npc):
+        return self.contains(npc)
+
+    def _slots(self, store):
+        # LOOKED UP EACH TIME, AS THE STORE REPLACES ITS COLUMNS WHEN IT GROWS
+        return getattr(store, self.slot_column)
+
+    def contains(self, npc):
+        slot = int(self._slots(npc.store)[npc.npc_id])
+        return 0 <= slot < self.count and self.views[slot] is npc
+
+    def reserve(self, capacity):
+        """Make room for capacity members up front so joining never has to grow the id and view arrays"""
+        extra = capacity - len(self.ids)
+        if extra > 0:
+            self.ids = np.concatenate((self.ids, np.zeros(extra, np.int32)))
+            self.views = np.concatenate((self.views, np.full(extra, None, object)))
+            self.slot_numbers = np.arange(capacity, dtype=np.int32)
+
+    def add(self, npc):
+        slot = self.count
+        if slot == len(self.ids):
+            self.reserve(2 * slot)
+        self.ids[slot] = npc.npc_id
+        self.views[slot] = npc
+        self.count += 1
+        self._slots(npc.store)[npc.npc_id] = slot
+        if self.everyone is not None:
+            self.everyone.add(npc)
+
+    def add_many(self, store, ids):
+        """Append many members at once; ids must not be in any group and must already have their views (store.view)"""
+        start, stop = self.count, self.count + len(ids)
+        if stop > len(self.ids):
+            self.reserve(max(2 * len(self.ids), stop))
+        self.ids[start:stop] = ids
+        self.views[start:stop] = store.views[ids]
+        self._slots(store)[ids] = self.slot_numbers[start:stop]
+        self.count = stop
+        if self.everyone is not None:
+            self.everyone.add_many(store, ids)
+
+    def remove(self, npc):
+        slots = self._slots(npc.store)
+        slot = int(slots[npc.npc_id])
+        last = self.count - 1
+        moved = self.views[last]
+        self.views[slot] = moved
+        self.ids[slot] = self.ids[last]
+        slots[moved.npc_id] = slot
+        self.views[last] = None
+        self.count = last
+        slots[npc.npc_id] = -1
+        if self.everyone is not None:
+            self.everyone.remove(npc)
+
+    def remove_many(self, store, ids):
+        """Take many members out at once; ids must all be in this group, once each
+        The members left in the tail fill the holes the leavers leave below the new count, so the group stays dense"""
+        column = self._slots(store)
+        new_count = self.count - len(ids)
+        slots = column[ids]
+        holes = slots[slots < new_count]
+        column[ids] = -1
+        tail = self.slot_numbers[new_count:self.count]
+        fillers = tail[column[self.ids[tail]] >= 0] # TAIL MEMBERS THAT STAY; ONE PER HOLE
+        self.ids[holes] = self.ids[fillers]
+        self.views[holes] = self.views[fillers]
+        column[self.ids[holes]] = holes
+        self.views[new_count:self.count] = None
+        self.count = new_count
+        if self.everyone is not None:
+            self.everyone.remove_many(store, ids)
+
+    def active_ids(self):
+        """Ids of every member; a view, so copy it before adding or removing members while using it"""
+        return self.ids[:self.count]
+
+# EVERY NPC IN ANY OF THE FOUR ACTIVE GROUPS, KEPT UP TO DATE BY THOSE GROUPS, SO PER-FRAME WORK OVER ALL ACTIVE NPCS NEEDS NO COMBINED ARRAY
+group_active = NPCGroup("active", slot_column="active_slot")
+dict_groups = {
+    "companion": NPCGroup("companion", everyone=group_active),
+    "friendly": NPCGroup("friendly", everyone=group_active),
+    "enemy": NPCGroup("enemy", everyone=group_active),
+    "boss": NPCGroup("boss", everyone=group_active)
+}
+group_dead = NPCGroup("dead")
 
 # Global lists to track different NPC groups
-list_activeCompanions = []
-list_activeFriendlies = []
-list_activeEnemies = []
-list_activeBosses = []
-list_deadNPCs = []
+# THESE ARE THE NPCGroup OBJECTS ABOVE UNDER THEIR OLD NAMES: len, ITERATION, INDEXING AND "in" WORK AS BEFORE,
+# BUT THEY ARE UNORDERED AND CHANGE BY SWAP-REMOVE, SO ADD/REMOVE THROUGH THE FUNCTIONS HERE
+list_activeCompanions = dict_groups["companion"]
+list_activeFriendlies = dict_groups["friendly"]
+list_activeEnemies = dict_groups["enemy"]
+list_activeBosses = dict_groups["boss"]
+list_deadNPCs = group_dead
+
+# ONE element_bar_set DRAWS EVERY NPC HEALTH BAR IN A SINGLE BATCHED BLIT; BUILT BY drawNPCHealthBars ON FIRST USE
+npc_healthBars = None
 
 def generatePremadeCompanionsList():
     """Generate predefined companion NPCs"""
@@ -25,121 +149,194 @@ def generatePremadeBossList():
     pass
 
 def addNPCToGroup(npc, group_type):
-    """Add an NPC to the appropriate group list"""
-    if group_type == "companion":
-        list_activeCompanions.append(npc)
-    elif group_type == "friendly":
-        list_activeFriendlies.append(npc)
-    elif group_type == "enemy":
-        list_activeEnemies.append(npc)
-    elif group_type == "boss":
-        list_activeBosses.append(npc)
-
-def removeNPCFromGroup(npc, group_type):
-    """Remove an NPC from its group list"""
-    if group_type == "companion":
-        list_activeCompanions.remove(npc)
-    elif group_type == "friendly":
-        list_activeFriendlies.remove(npc)
-    elif group_type == "enemy":
-        list_activeEnemies.remove(npc)
-    elif group_type == "boss":
-        list_activeBosses.remove(npc)
-
-def handleNPCDeath(npc, group_type):
+    """Add an NPC to the appropriate group list; an NPC already in another group is moved"""
+    group = dict_groups.get(group_type)
+    if group is None:
+        return
+    current_type = determineNPCGroup(npc)
+    if current_type == group_type:
+        return
+    if current_type is not None:
+        dict_groups[current_type].remove(npc)
+    else:
+        npc.store.ai_frame[npc.npc_id] = -1 # BECOMING ACTIVE; THE AI SCHEDULER STARTS COUNTING ITS WAIT FROM NOW
+        if group_dead.contains(npc):
+            group_dead.remove(npc)
+    group.add(npc)
+    npc.store.group[npc.npc_id] = handler_npc.NPC_GROUP_IDS[group_type]
+    npc.store.spatial.insert(npc.npc_id)
+    npc.store.home_group[npc.npc_id] = handler_npc.NPC_GROUP_IDS[group_type]
+
+def removeNPCFromGroup(npc, group_type = None):
+    """Remove an NPC from its group list; the NPC knows its group, so group_type is only a check"""
+    current_type = determineNPCGroup(npc)
+    if current_type is None or (group_type is not None and group_type != current_type):
+        return
+    dict_groups[current_type].remove(npc)
+    npc.store.group[npc.npc_id] = -1
+    npc.store.spatial.remove(npc.npc_id)
+
+def handleNPCDeath(npc, group_type = None):
     """Handle NPC death - remove from active group and add to dead list"""
+    if npc.store.pool[npc.npc_id] >= 0:
+        npc.hideMe() # POOLED NPCS GO BACK TO THEIR POOL'S DORMANT SET INSTEAD OF THE DEAD LIST
+        return
     removeNPCFromGroup(npc, group_type)
-    list_deadNPCs.append(npc)
-
-def updateAllNPCs():
-    """Update all active NPCs' states and status effects"""
-    all_npcs = (list_activeCompanions + list_activeFriendlies + 
-                list_activeEnemies + list_activeBosses)
-    for npc in all_npcs:
-        if npc.return_amIDead():
-            handleNPCDeath(npc, determineNPCGroup(npc))
-        # Update status effects durations
-        if npc.flag_isPoisoned > 0:
-            npc.flag_isPoisoned -= 1
-        if npc.flag_isStunned > 0:
-            npc.flag_isStunned -= 1
-        if npc.flag_isBurning > 0:
-            npc.flag_isBurning -= 1
-        if npc.flag_isFrozen > 0:
-            npc.flag_isFrozen -= 1
+    if not group_dead.contains(npc):
+        group_dead.add(npc)
+
+def iterateActiveNPCs(group_types = None):
+    """Every NPC in the given groups (all four by default), without building a combined list
+    The ids are copied first, so NPCs may die or change group while this is being iterated"""
+    for group_type in handler_npc.NPC_GROUPS if group_types is None else group_types:
+        group = dict_groups[group_type]
+        store = handler_npc.get_npc_store()
+        for npc_id in group.active_ids().tolist():
+            yield store.view(npc_id)
+
+def updateAllNPCs(delta_time = 1.0):
+    """Update all active NPCs' combat, states, AI and status effects"""
+    # DEATH DETECTION IS ONE ARRAY TEST OVER group_active'S IDS; DORMANT AND DEAD NPCS ARE NEVER LOOKED AT
+    # ONLY THE NPCS THAT ACTUALLY DIED ARE TOUCHED FROM PYTHON, THROUGH killNPC LIKE COMBAT AND STATUS-EFFECT DEATHS
+    store = handler_npc.get_npc_store()
+    resolveCombat()
+    ids = group_active.active_ids()
+    for npc_id in ids[store.hp[ids] <= 0].tolist():
+        killNPC(store.view(npc_id))
+    updateAI(delta_time)
+    updateStatusEffects(delta_time)
+
+def updateAI(delta_time = 1.0):
+    """Let the AI scheduler think for the active NPCs; near ones every frame, distant ones less often, within its frame budget"""
+    return handler_ai_scheduler.get_ai_scheduler().update(group_active.active_ids(), delta_time)
+
+def resolveCombat():
+    """Apply the frame's queued damage and healing in one pass; NPCs it kills drop their loot and leave their groups together"""
+    store = handler_npc.get_npc_store()
+    return store.combat.resolve(lambda npc_id: killNPC(store.view(npc_id)))
+
+def killNPC(npc):
+    group_type = determineNPCGroup(npc)
+    npc.killMe()
+    if handler_status_effects.status_engine is not None:
+        # POOLED OR NOT, A DEAD NPC'S POISON OR BURN MUST STOP TICKING AND REPORTING IT AS DYING AGAIN
+        handler_status_effects.status_engine.remove(npc.npc_id)
+    if group_type is not None:
+        handleNPCDeath(npc, group_type)
+
+def updateStatusEffects(delta_time = 1.0):
+    """Tick every status effect on every NPC in one vectorized step; only expirations and deaths come back as Python calls"""
+    engine = handler_status_effects.get_status_engine()
+    if engine.count == 0:
+        return None
+    store = handler_npc.get_npc_store()
+    result = engine.tick(delta_time, store.hp, store.hp_max)
+    if len(result.deaths):
+        engine.remove_many(result.deaths) # ONE PASS FOR EVERY DEATH; killNPC'S OWN remove THEN FINDS NOTHING LEFT
+    for npc_id in result.deaths.tolist():
+        killNPC(store.view(npc_id))
+    return result
 
 def determineNPCGroup(npc):
     """Determine which group an NPC belongs to"""
-    if npc in list_activeCompanions:
-        return "companion"
-    elif npc in list_activeFriendlies:
-        return "friendly"
-    elif npc in list_activeEnemies:
-        return "enemy"
-    elif npc in list_activeBosses:
-        return "boss"
-    return None
+    group_id = int(npc.store.group[npc.npc_id])
+    if group_id < 0:
+        return None
+    return handler_npc.NPC_GROUPS[group_id]
 
 def getActivePartySize():
     """Return the number of active companions"""
     return len(list_activeCompanions)
 
+def returnGroupIDs(group_types):
+    return np.array([handler_npc.NPC_GROUP_IDS[group_type] for group_type in group_types], np.int8)
+
+def getNPCIDsInRange(x, y, range_distance, group_types = None):
+    """Ids of active NPCs within range of a point, from the spatial hash; group_types limits which groups count"""
+    store = handler_npc.get_npc_store()
+    ids = store.spatial.query_radius(x, y, range_distance)
+    if group_types is not None:
+        ids = ids[np.isin(store.group[ids], returnGroupIDs(group_types))]
+    return ids
+
+def getNPCIDsInRangeOfPoints(points, range_distance, group_types = None):
+    """Batched getNPCIDsInRange: one id array per (x, y) in points, e.g. for many aggro checks or AoE centres at once"""
+    store = handler_npc.get_npc_store()
+    results = store.spatial.query_radius_many(points, range_distance)
+    if group_types is not None:
+        group_ids = returnGroupIDs(group_types)
+        results = [ids[np.isin(store.group[ids], group_ids)] for ids in results]
+    return results
+
+def getNPCIDsInBox(x0, y0, x1, y1, group_types = None):
+    store = handler_npc.get_npc_store()
+    ids = store.spatial.query_box(x0, y0, x1, y1)
+    if group_types is not None:
+        ids = ids[np.isin(store.group[ids], returnGroupIDs(group_types))]
+    return ids
+
+def returnNPCsInRangeOf(source_npc, range_distance, group_types):
+    store = source_npc.store
+    ids = getNPCIDsInRange(float(store.x[source_npc.npc_id]), float(store.y[source_npc.npc_id]), range_distance, group_types)
+    return [store.view(npc_id) for npc_id in ids.tolist() if npc_id != source_npc.npc_id]
+
 def getActiveEnemiesInRange(source_npc, range_distance):
     """Return list of enemies within specified range of source_npc"""
-    nearby_enemies = []
-    for enemy in list_activeEnemies + list_activeBosses:
-        # Distance calculation would go here
-        # For now, just return all enemies
-        nearby_enemies.append(enemy)
-    return nearby_enemies
+    return returnNPCsInRangeOf(source_npc, range_distance, ("enemy", "boss"))
 
 def getFriendliesInRange(source_npc, range_distance):
     """Return list of friendlies within specified range of source_npc"""
-    nearby_friendlies = []
-    for friendly in list_activeCompanions + list_activeFriendlies:
-        # Distance calculation would go here
-        # For now, just return all friendlies
-        nearby_friendlies.append(friendly)
-    return nearby_friendlies
+    return returnNPCsInRangeOf(source_npc, range_distance, ("companion", "friendly"))
 
 def resurrectNPC(npc):
     """Attempt to resurrect a dead NPC"""
-    if npc in list_deadNPCs:
-        list_deadNPCs.remove(npc)
+    if group_dead.contains(npc):
+        group_dead.remove(npc)
         npc.stat_hp = npc.stat_hp_max // 2  # Resurrect with half HP
-        addNPCToGroup(npc, determineNPCGroup(npc))
+        home_group = int(npc.store.home_group[npc.npc_id])
+        if home_group >= 0:
+            addNPCToGroup(npc, handler_npc.NPC_GROUPS[home_group])
         return True
     return False
 
 def applyGroupEffect(group_type, effect_type, duration):
     """Apply a status effect to all NPCs in a specified group"""
-    target_list = []
-    if group_type == "companion":
-        target_list = list_activeCompanions
-    elif group_type == "friendly":
-        target_list = list_activeFriendlies
-    elif group_type == "enemy":
-        target_list = list_activeEnemies
-    elif group_type == "boss":
-        target_list = list_activeBosses
-    
-    for npc in target_list:
-        npc.affectMe(effect_type, duration)
+    group = dict_groups.get(group_type)
+    if group is not None and len(group):
+        handler_status_effects.get_status_engine().apply_many(group.active_ids(), effect_type, duration)
 
 def getGroupHealth(group_type):
     """Return the average health percentage of a group"""
-    target_list = []
-    if group_type == "companion":
-        target_list = list_activeCompanions
-    elif group_type == "friendly":
-        target_list = list_activeFriendlies
-    elif group_type == "enemy":
-        target_list = list_activeEnemies
-    elif group_type == "boss":
-        target_list = list_activeBosses
-    
-    if not target_list:
+    group = dict_groups.get(group_type)
+    if group is None:
         return 0
-    
-    total_health_percent = sum(npc.stat_hp / npc.stat_hp_max * 100 for npc in target_list)
-    return total_health_percent / len(target_list)
+    return handler_npc.get_npc_store().health_percent(group.active_ids())
+
+def healGroup(group_type, heal_amount):
+    """healMe for every NPC in a group, as one array operation"""
+    group = dict_groups.get(group_type)
+    if group is not None:
+        handler_npc.get_npc_store().heal(group.active_ids(), heal_amount)
+
+def drawNPCHealthBars(screen, camera_x = 0, camera_y = 0, group_types = None, bar_size = (32, 6), bar_raise = 8):
+    """Draw a health bar above every NPC in the given groups (all four by default) in one batched blit
+    Fill levels come straight from the store's hp and hp_max columns; only bars whose level changed swap their image"""
+    global npc_healthBars
+    import handler_gui_elements # HERE, NOT AT THE TOP: ITS FONTS LOAD ON IMPORT, AND THE NPC SIMULATION RUNS WITHOUT A DISPLAY
+    store = handler_npc.get_npc_store()
+    if group_types is None:
+        ids = group_active.active_ids()
+    else:
+        ids = np.concatenate([dict_groups[group_type].active_ids() for group_type in group_types])
+    if npc_healthBars is None or (npc_healthBars.width, npc_healthBars.height) != tuple(bar_size):
+        npc_healthBars = handler_gui_elements.element_bar_set(bar_size[0], bar_size[1], max_value=1.0)
+    values = store.hp[ids] / np.maximum(store.hp_max[ids], 1)
+    xs = (store.x[ids] - camera_x - bar_size[0] // 2).astype(np.int32).tolist()
+    ys = (store.y[ids] - camera_y - bar_raise).astype(np.int32).tolist()
+    if len(npc_healthBars) != len(ids):
+        npc_healthBars.set_bars(xs, ys, values)
+    else:
+        # THE SAME COUNT MAY BE DIFFERENT NPCS; EVERY BAR IS RE-POSITIONED AND RE-LEVELED BY INDEX, SO THAT IS STILL CORRECT
+        npc_healthBars.set_positions(xs, ys)
+        npc_healthBars.set_values(values)
+    npc_healthBars.draw(screen)
@@ -0,0 +1,227 @@
+import handler_config
+import handler_npc
+import handler_npc_minder
+import handler_status_effects
+import numpy as np
+
+# PREALLOCATED NPC POOLS, ONE PER ENEMY TYPE IN main_customize.thisGame_enemies
+# EVERY POOLED NPC (STORE ROW AND npcObject VIEW) IS CREATED, AND ITS GROUP SLOT RESERVED, WHEN THE POOL IS BUILT AT LEVEL LOAD; AFTER THAT
+# NPCS ONLY MOVE BETWEEN THE POOL'S DORMANT STACK AND AN ACTIVE GROUP IN handler_npc_minder, SO SPAWNING AND KILLING CREATE NO NPC OBJECTS
+# AND GROW NO ARRAYS. spawn_wave AND release_many STILL MAKE SHORT-LIVED NUMPY TEMPORARIES (FANCY-INDEXED COPIES, MASKS), AND THE
+# SPATIAL HASH MAKES A CELL LIST WHEN AN NPC LANDS IN AN EMPTY CELL AND DROPS IT WHEN THE CELL EMPTIES
+# DORMANT NPCS ARE IN NO GROUP AND NOT IN THE SPATIAL HASH, SO THE UPDATE LOOPS (WHICH WALK THE GROUPS) NEVER SEE THEM
+
+from typing import Dict, Optional
+
+class NPCPool:
+    def __init__(self, enemy_def: handler_config.EnemyDef, size: int, group_type: str = "enemy", store=None):
+        """
+        :param enemy_def: Compiled thisGame_enemies entry giving the type's name and starting stats
+        :param size: NPCs to preallocate
+        :param group_type: Group that woken NPCs join
+        """
+        self.store = handler_npc.get_npc_store() if store is None else store
+        self.enemy_def = enemy_def
+        self.type_name = enemy_def.group
+        self.group_type = group_type
+        self.pool_id = len(self.store.pools)
+        self.store.pools.append(self)
+        self.ids = np.zeros(0, np.int32)  # Every NPC this pool owns
+        self.dormant = np.zeros(0, np.int32)  # Stack of sleeping ids; the first dormant_count entries are valid
+        self.dormant_count = 0
+        self.slot_numbers = np.zeros(0, np.int32) # 0, 1, 2, ... SLICED FOR DORMANT SLOTS INSTEAD OF BUILDING A NEW arange PER RELEASE
+        self.grow(size)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def active_count(self) -> int:
+        return len(self.ids) - self.dormant_count
+
+    def grow(self, size: int) -> None:
+        """Preallocate until the pool owns size NPCs; the only place a pool allocates"""
+        extra = size - len(self.ids)
+        if extra <= 0:
+            return
+        store = self.store
+        new_ids = store.allocate_many(extra)
+        store.pool[new_ids] = self.pool_id
+        store.armor[new_ids] = self.enemy_def.armor
+        store.damage[new_ids] = self.enemy_def.damage
+        store.hp_max[new_ids] = self.enemy_def.health
+        store.hp[new_ids] = self.enemy_def.health
+        store.awake[new_ids] = False
+        for npc_id in new_ids.tolist():
+            store.view(npc_id)  # CREATE EVERY VIEW NOW RATHER THAN DURING A WAVE
+
+        self.ids = np.concatenate((self.ids, new_ids))
+        self.dormant = np.concatenate((self.dormant[:self.dormant_count], new_ids,
+                                       np.zeros(len(self.ids) - self.dormant_count - extra, np.int32)))
+        self.slot_numbers = np.arange(len(self.ids), dtype=np.int32)
+        store.pool_slot[new_ids] = self.slot_numbers[self.dormant_count:self.dormant_count + extra]
+        self.dormant_count += extra
+        group = handler_npc_minder.dict_groups[self.group_type]
+        group.reserve(len(group) + len(self.ids))
+        handler_npc_minder.group_active.reserve(len(handler_npc_minder.group_active) + len(self.ids))
+
+    def _reset(self, ids) -> None:
+        """Fresh stats for NPCs coming out of the pool"""
+        store = self.store
+        store.hp[ids] = store.hp_max[ids]
+        store.mp[ids] = store.mp_max[ids]
+        store.shield[ids] = 0
+        store.dying[ids] = 0
+        store.ai_frame[ids] = -1 # THE AI SCHEDULER STARTS COUNTING ITS WAIT FROM NOW
+
+    def acquire(self, npc) -> None:
+        """Called by npcObject.wakeMe; moves one NPC from the dormant stack into its active group"""
+        store = self.store
+        slot = int(store.pool_slot[npc.npc_id])
+        if slot < 0:
+            return  # Already awake
+        last = int(self.dormant[self.dormant_count - 1])
+        self.dormant[slot] = last
+        store.pool_slot[last] = slot
+        self.dormant_count -= 1
+        store.pool_slot[npc.npc_id] = -1
+        self._reset(npc.npc_id)
+        handler_npc_minder.addNPCToGroup(npc, self.group_type)
+
+    def release(self, npc) -> None:
+        """Called by npcObject.hideMe; takes one NPC out of its group and back onto the dormant stack"""
+        store = self.store
+        if store.pool_slot[npc.npc_id] >= 0:
+            return  # Already dormant
+        handler_npc_minder.removeNPCFromGroup(npc)
+        if handler_status_effects.status_engine is not None:
+            handler_status_effects.status_engine.remove(npc.npc_id)
+        store.awake[npc.npc_id] = False
+        self.dormant[self.dormant_count] = npc.npc_id
+        store.pool_slot[npc.npc_id] = self.dormant_count
+        self.dormant_count += 1
+
+    def spawn(self, x: float, y: float):
+        """Wake one dormant NPC at (x, y); None if the pool is empty"""
+        if self.dormant_count == 0:
+            return None
+        npc = self.store.view(int(self.dormant[self.dormant_count - 1]))
+        npc.wakeMe(x, y)
+        return npc
+
+    def spawn_wave(self, xs, ys) -> np.ndarray:
+        """
+        Wake up to len(xs) NPCs at once; position, stats, group and spatial hash are set with array writes
+        :return: Ids of the NPCs woken, fewer than asked for if the pool ran dry; a new array the caller keeps
+        """
+        count = min(len(xs), self.dormant_count)
+        if count == 0:
+            return np.zeros(0, np.int32)
+        store = self.store
+        ids = self.dormant[self.dormant_count - count:self.dormant_count].copy()
+        self.dormant_count -= count
+        store.pool_slot[ids] = -1
+        store.x[ids] = np.asarray(xs)[:count]
+        store.y[ids] = np.asarray(ys)[:count]
+        store.awake[ids] = True
+        self._reset(ids)
+
+        handler_npc_minder.dict_groups[self.group_type].add_many(store, ids)
+        group_id = handler_npc.NPC_GROUP_IDS[self.group_type]
+        store.group[ids] = group_id
+        store.home_group[ids] = group_id
+        store.spatial.insert_many(ids)
+        return ids
+
+    def release_many(self, ids) -> None:
+        """
+        Put many NPCs of this pool back to sleep at once, mirroring spawn_wave: groups, spatial hash, status effects and
+        the dormant stack are updated with array writes instead of one hideMe per NPC
+        :param ids: Ids owned by this pool; ones already dormant are skipped
+        """
+        store = self.store
+        ids = np.asarray(ids, np.int32)
+        ids = ids[store.pool_slot[ids] < 0]
+        count = len(ids)
+        if count == 0:
+            return
+        groups = store.group[ids]
+        for group_id in np.unique(groups[groups >= 0]).tolist():
+            handler_npc_minder.dict_groups[handler_npc.NPC_GROUPS[group_id]].remove_many(store, ids[groups == group_id])
+        store.group[ids] = -1
+        store.spatial.remove_many(ids)
+        if handler_status_effects.status_engine is not None:
+            handler_status_effects.status_engine.remove_many(ids)
+        store.awake[ids] = False
+        self.dormant[self.dormant_count:self.dormant_count + count] = ids
+        store.pool_slot[ids] = self.slot_numbers[self.dormant_count:self.dormant_count + count]
+        self.dormant_count += count
+
+    def release_all(self) -> None:
+        """Put every awake NPC of this pool back to sleep, e.g. when leaving a level"""
+        self.release_many(self.ids[self.store.pool_slot[self.ids] < 0])
+
+# Pools by enemy type name
+dict_pools: Dict[str, NPCPool] = {}
+
+def build_pools(sizes: Optional[Dict[str, int]] = None, default_size: int = 32) -> Dict[str, NPCPool]:
+    """
+    Create or grow a pool for every thisGame_enemies type; call while loading a level, not during play
+    :param sizes: NPCs to preallocate per type name; types not listed get default_size
+    """
+    sizes = sizes or {}
+    for type_name, enemy_def in handler_config.get_config().enemies.items():
+        size = sizes.get(type_name, default_size)
+        pool = dict_pools.get(type_name)
+        if pool is None:
+            dict_pools[type_name] = NPCPool(enemy_def, size)
+        else:
+            pool.grow(size)
+    return dict_pools
+
+def get_pool(type_name: str) -> Optional[NPCPool]:
+    return dict_pools.get(type_name)
+
+def release_allPools() -> None:
+    for pool in dict_pools.values():
+        pool.release_all()
+
+def benchmark_waves(pool_size: int = 5000, wave_size: int = 1000, waves: int = 50) -> None:
+    """
+    Spawn and clear waves from a preallocated pool versus constructing fresh npcObjects
+    Timings are taken without tracemalloc, which slows allocation down; a second, traced run reports what the waves allocate
+    """
+    import time
+    import tracemalloc
+    pool = build_pools({"zombie": pool_size})["zombie"]
+    rng = np.random.default_rng(0)
+    xs, ys = rng.uniform(0, 5000, wave_size), rng.uniform(0, 5000, wave_size)
+
+    for x in range(waves):
+        handler_npc.npcObject()  # WARM UP THE STORE SO IT IS NOT MEASURING GROWTH
+    start = time.perf_counter()
+    fresh = [handler_npc.npcObject() for x in range(wave_size)]
+    fresh_ms = (time.perf_counter() - start) * 1000
+
+    pool.release_all()
+    spawn_ms = release_ms = 0.0
+    for x in range(waves):
+        start = time.perf_counter()
+        ids = pool.spawn_wave(xs, ys)
+        spawn_ms += time.perf_counter() - start
+        start = time.perf_counter()
+        pool.release_all()
+        release_ms += time.perf_counter() - start
+
+    tracemalloc.start()
+    for x in range(waves):
+        pool.spawn_wave(xs, ys)
+        pool.release_all()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"construct {wave_size} npcObjects: {fresh_ms:.2f} ms (each one a new store row and view)")
+    print(f"pooled wave of {len(ids)}: spawn {spawn_ms * 1000 / waves:.2f} ms, release {release_ms * 1000 / waves:.2f} ms")
+    print(f"traced: {current} bytes still held after {waves} waves, peak {peak} bytes of temporaries within a wave")
+
+if __name__ == "__main__":
+    benchmark_waves()
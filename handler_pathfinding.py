@@ -0,0 +1,431 @@
+import numpy as np
+
+# PATHFINDING AS A SERVICE: NPCS ASK FOR A PATH AND GET IT A FEW FRAMES LATER, SO A FRAME WHERE FIFTY NPCS ASK AT ONCE DOES NOT HITCH
+# REQUESTS ARE GROUPED BY GOAL REGION (region_size x region_size CELLS); EACH REGION HAS ONE SHARED SEARCH, A DIJKSTRA RUN OUTWARD
+# FROM THE REGION'S ANCHOR CELL. EVERY CELL IT SETTLES KNOWS ITS NEXT STEP TOWARD THE GOAL, SO ANY NPC STARTING ON A SETTLED CELL
+# HAS ITS PATH, AND THE SEARCH ONLY GROWS UNTIL THE CELLS ITS WAITING NPCS STAND ON ARE SETTLED
+# SEARCHES ARE RESUMABLE, WHICH IS WHAT LETS update() STOP AT THE FRAME BUDGET AND CARRY ON NEXT FRAME,
+# AND FINISHED SEARCHES STAY CACHED UNTIL A MAP CHANGE TOUCHES A CELL THEY HAVE REACHED
+
+from collections import OrderedDict, deque
+from typing import Callable, Dict, List, Optional, Tuple
+import heapq
+import math
+import time
+
+DIAGONAL = math.sqrt(2)
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+class NavGrid:
+    def __init__(self, width: int, height: int, cell_size: float = 32.0, walkable: Optional[bytearray] = None):
+        """
+        :param width: Cells across
+        :param height: Cells down
+        :param cell_size: Cell edge in world units
+        :param walkable: width * height bytes, row-major, non-zero where NPCs can walk; all walkable by default
+        """
+        self.width = width
+        self.height = height
+        self.cell_size = float(cell_size)
+        self.walkable = bytearray(b"\x01" * (width * height)) if walkable is None else bytearray(walkable)
+        self.version = 0  # Bumped on every change
+        self.listeners: List[Callable[[List[int]], None]] = []
+
+    @classmethod
+    def from_rows(cls, rows: List[str], cell_size: float = 32.0) -> "NavGrid":
+        """Build a grid from text rows where '#' is a wall"""
+        walkable = bytearray(0 if char == "#" else 1 for row in rows for char in row)
+        return cls(len(rows[0]), len(rows), cell_size, walkable)
+
+    def index(self, cx: int, cy: int) -> int:
+        return cy * self.width + cx
+
+    def cell_of(self, x: float, y: float) -> int:
+        """Index of the cell under a world position, clamped to the grid"""
+        cx = min(max(int(x // self.cell_size), 0), self.width - 1)
+        cy = min(max(int(y // self.cell_size), 0), self.height - 1)
+        return cy * self.width + cx
+
+    def center(self, index: int) -> Tuple[float, float]:
+        cy, cx = divmod(index, self.width)
+        return ((cx + 0.5) * self.cell_size, (cy + 0.5) * self.cell_size)
+
+    def is_walkable(self, cx: int, cy: int) -> bool:
+        return 0 <= cx < self.width and 0 <= cy < self.height and self.walkable[cy * self.width + cx] != 0
+
+    def neighbors(self, index: int):
+        """(neighbor index, step cost) for the 8 surrounding cells; diagonals may not cut a wall corner"""
+        width, walkable = self.width, self.walkable
+        cy, cx = divmod(index, width)
+        left, right = cx > 0 and walkable[index - 1], cx < width - 1 and walkable[index + 1]
+        up, down = cy > 0 and walkable[index - width], cy < self.height - 1 and walkable[index + width]
+        if left:
+            yield index - 1, 1.0
+        if right:
+            yield index + 1, 1.0
+        if up:
+            yield index - width, 1.0
+            if left and walkable[index - width - 1]:
+                yield index - width - 1, DIAGONAL
+            if right and walkable[index - width + 1]:
+                yield index - width + 1, DIAGONAL
+        if down:
+            yield index + width, 1.0
+            if left and walkable[index + width - 1]:
+                yield index + width - 1, DIAGONAL
+            if right and walkable[index + width + 1]:
+                yield index + width + 1, DIAGONAL
+
+    def set_walkable(self, cells, value: bool) -> None:
+        """Open or wall off (cx, cy) cells; listeners hear about the ones that actually changed"""
+        changed = []
+        for cx, cy in cells:
+            index = cy * self.width + cx
+            if bool(self.walkable[index]) != value:
+                self.walkable[index] = 1 if value else 0
+                changed.append(index)
+        if changed:
+            self.version += 1
+            for callback in self.listeners:
+                callback(changed)
+
+    def set_rect(self, cx0: int, cy0: int, cx1: int, cy1: int, value: bool) -> None:
+        """Open or wall off every cell in a rectangle, edges included"""
+        self.set_walkable([(cx, cy) for cy in range(cy0, cy1 + 1) for cx in range(cx0, cx1 + 1)], value)
+
+    def add_listener(self, callback: Callable[[List[int]], None]) -> None:
+        self.listeners.append(callback)
+
+class PathRequest:
+    def __init__(self, start: int, goal: Tuple[float, float], callback: Optional[Callable], requester, frame: int):
+        self.start = start
+        self.goal = goal
+        self.callback = callback  # callback(request), on the main thread during PathService.update
+        self.requester = requester
+        self.status = PENDING
+        self.path: List[Tuple[float, float]] = []  # World points from the start cell to the goal once status is DONE
+        self.submitted = time.perf_counter()
+        self.submitted_frame = frame
+        self.latency = 0.0  # Seconds from request to result
+
+class GoalField:
+    """One resumable Dijkstra search outward from a goal region's anchor cell"""
+    def __init__(self, key, anchor: int, size: int):
+        self.key = key
+        self.anchor = anchor
+        self.dist = [math.inf] * size
+        self.next = [-1] * size  # Next cell toward the anchor
+        self.settled = bytearray(size)
+        self.heap = [(0.0, anchor)]
+        self.dist[anchor] = 0.0
+        self.waiting: Dict[int, List[PathRequest]] = {}  # Start cell -> requests still waiting on it
+
+    def exhausted(self) -> bool:
+        return not self.heap
+
+    def touches(self, grid: NavGrid, cells: List[int]) -> bool:
+        """True if any changed cell is one this search reached, or borders one; only then can its results be wrong"""
+        dist, width, height = self.dist, grid.width, grid.height
+        for index in cells:
+            cy, cx = divmod(index, width)
+            for ny in range(max(cy - 1, 0), min(cy + 2, height)):
+                for nx in range(max(cx - 1, 0), min(cx + 2, width)):
+                    if dist[ny * width + nx] != math.inf:
+                        return True
+        return False
+
+class PathService:
+    def __init__(self, grid: NavGrid, budget_ms: float = 1.0, region_size: int = 4, cache_size: int = 32, history: int = 256):
+        """
+        :param grid: Walkable cells; the service listens to it for map changes
+        :param budget_ms: Search time allowed per update() call
+        :param region_size: Goals within the same region_size x region_size block of cells share one search
+        :param cache_size: Searches kept for reuse, least recently used dropped first
+        :param history: Completed requests kept for the latency averages
+        """
+        self.grid = grid
+        self.budget_ms = budget_ms
+        self.region_size = region_size
+        self.cache_size = cache_size
+        self.fields: "OrderedDict[tuple, GoalField]" = OrderedDict()
+        self.completed: List[PathRequest] = []  # Finished since the last update, callbacks not yet run
+        self.frame = 0
+        self.latencies = deque(maxlen=history)
+        self.latency_frames = deque(maxlen=history)
+        self.counts = {"requests": 0, "cache_hits": 0, "failed": 0, "invalidated": 0}
+        grid.add_listener(self.on_map_changed)
+
+    def _field(self, key) -> Optional[GoalField]:
+        field = self.fields.get(key)
+        if field is not None:
+            self.fields.move_to_end(key)
+            return field
+        anchor = self._anchor(key)
+        if anchor is None:
+            return None
+        field = self.fields[key] = GoalField(key, anchor, len(self.grid.walkable))
+        self._evict()
+        return field
+
+    def _anchor(self, key) -> Optional[int]:
+        """Walkable cell in the region nearest its centre"""
+        grid, size = self.grid, self.region_size
+        rx, ry = key
+        mid_x, mid_y = rx * size + (size - 1) / 2, ry * size + (size - 1) / 2
+        cells = [(cx, cy) for cy in range(ry * size, min((ry + 1) * size, grid.height))
+                 for cx in range(rx * size, min((rx + 1) * size, grid.width)) if grid.is_walkable(cx, cy)]
+        if not cells:
+            return None
+        cx, cy = min(cells, key=lambda cell: (cell[0] - mid_x) ** 2 + (cell[1] - mid_y) ** 2)
+        return grid.index(cx, cy)
+
+    def _evict(self) -> None:
+        for key in list(self.fields):
+            if len(self.fields) <= self.cache_size:
+                break
+            if not self.fields[key].waiting:
+                del self.fields[key]
+
+    def request_path(self, start: Tuple[float, float], goal: Tuple[float, float], callback: Optional[Callable] = None,
+                     requester=None) -> PathRequest:
+        """
+        Queue a path from start to goal, both world positions; the result lands on the returned request
+        :param callback: callback(request) once the request is DONE or FAILED, run during update()
+        :param requester: Anything that identifies the asker, e.g. an NPC id
+        """
+        grid = self.grid
+        request = PathRequest(grid.cell_of(*start), goal, callback, requester, self.frame)
+        self.counts["requests"] += 1
+        goal_cell = grid.cell_of(*goal)
+        goal_y, goal_x = divmod(goal_cell, grid.width)
+        field = None
+        if grid.walkable[request.start] and grid.walkable[goal_cell]:
+            field = self._field((goal_x // self.region_size, goal_y // self.region_size))
+        if field is None:
+            self._finish(request, None)
+        elif field.settled[request.start]:
+            self.counts["cache_hits"] += 1
+            self._finish(request, field)
+        else:
+            field.waiting.setdefault(request.start, []).append(request)
+        return request
+
+    def cancel(self, request: PathRequest) -> None:
+        cells = (request.start, self.grid.cell_of(*request.goal))  # A request waits on its goal cell once its start is settled
+        for field in self.fields.values():
+            for cell in cells:
+                waiting = field.waiting.get(cell)
+                if waiting and request in waiting:
+                    waiting.remove(request)
+                    if not waiting:
+                        del field.waiting[cell]
+                    return
+
+    def _finish(self, request: PathRequest, field: Optional[GoalField]) -> None:
+        goal_cell = self.grid.cell_of(*request.goal)
+        if field is not None and field.settled[request.start] and field.dist[goal_cell] == math.inf and field.heap:
+            # THE ANCHOR IS NOT ALWAYS CONNECTED TO EVERY CELL OF ITS REGION; WAIT UNTIL THE SEARCH REACHES THE GOAL CELL TOO
+            field.waiting.setdefault(goal_cell, []).append(request)
+            return
+        if field is None or not field.settled[request.start] or field.dist[goal_cell] == math.inf:
+            request.status = FAILED
+            self.counts["failed"] += 1
+        else:
+            request.status = DONE
+            path = self._path(field, request.start, goal_cell)
+            if path[-1] != tuple(request.goal):
+                path.append(tuple(request.goal))
+            request.path = path
+        request.latency = time.perf_counter() - request.submitted
+        self.latencies.append(request.latency)
+        self.latency_frames.append(self.frame - request.submitted_frame)
+        self.completed.append(request)
+
+    def _path(self, field: GoalField, start: int, goal_cell: int) -> List[Tuple[float, float]]:
+        """Start cell to goal cell: down the start's next chain until it meets the goal cell's chain, then back up that one"""
+        step, center = field.next, self.grid.center
+        goal_chain, cell = [], goal_cell
+        while cell != -1:
+            goal_chain.append(cell)
+            cell = step[cell]
+        position = {cell: order for order, cell in enumerate(goal_chain)}
+        path, cell = [], start
+        while cell not in position:  # Both chains end at the anchor, so they always meet
+            path.append(center(cell))
+            cell = step[cell]
+        path.extend(center(cell) for cell in reversed(goal_chain[:position[cell] + 1]))
+        return path
+
+    def _search(self, field: GoalField, deadline: float) -> None:
+        """Grow one search until its waiting starts are settled, it runs out of cells, or the deadline passes"""
+        heap, dist, step, settled, waiting = field.heap, field.dist, field.next, field.settled, field.waiting
+        neighbors = self.grid.neighbors
+        pops = 0
+        while heap and waiting:
+            pops += 1
+            if pops & 63 == 0 and time.perf_counter() >= deadline:
+                return
+            cost, index = heapq.heappop(heap)
+            if settled[index]:
+                continue
+            settled[index] = 1
+            requests = waiting.pop(index, None)
+            if requests:
+                for request in requests:
+                    self._finish(request, field)
+            for neighbor, step_cost in neighbors(index):
+                new_cost = cost + step_cost
+                if new_cost < dist[neighbor]:
+                    dist[neighbor] = new_cost
+                    step[neighbor] = index
+                    heapq.heappush(heap, (new_cost, neighbor))
+        if not heap:
+            # EVERY REACHABLE CELL IS SETTLED; ANYONE STILL WAITING CANNOT GET THERE
+            for requests in waiting.values():
+                for request in requests:
+                    self._finish(request, None)
+            waiting.clear()
+
+    def update(self) -> None:
+        """Search for up to budget_ms, oldest waiting requests first, then run the callbacks of everything that finished"""
+        self.frame += 1
+        deadline = time.perf_counter() + self.budget_ms / 1000
+        busy = [field for field in self.fields.values() if field.waiting]
+        busy.sort(key=lambda field: min(request.submitted for requests in field.waiting.values() for request in requests))
+        for field in busy:
+            if time.perf_counter() >= deadline:
+                break
+            self._search(field, deadline)
+        self._evict()
+
+        completed, self.completed = self.completed, []
+        for request in completed:
+            if request.callback is not None:
+                request.callback(request)
+
+    def on_map_changed(self, cells: List[int]) -> None:
+        """Grid listener: drop every search the change could affect; its waiting requests start over on a fresh search"""
+        for key, field in list(self.fields.items()):
+            if not field.touches(self.grid, cells):
+                continue
+            del self.fields[key]
+            self.counts["invalidated"] += 1
+            requests = [request for waiting in field.waiting.values() for request in waiting]
+            if not requests:
+                continue
+            fresh = self._field(key)
+            for request in requests:
+                if fresh is None or not self.grid.walkable[request.start]:
+                    self._finish(request, None)
+                else:
+                    fresh.waiting.setdefault(request.start, []).append(request)
+
+    def clear(self) -> None:
+        """Forget every cached search, e.g. on level change; waiting requests fail"""
+        for field in self.fields.values():
+            for requests in field.waiting.values():
+                for request in requests:
+                    self._finish(request, None)
+        self.fields.clear()
+
+    def get_pendingCount(self) -> int:
+        return sum(len(requests) for field in self.fields.values() for requests in field.waiting.values())
+
+    def get_stats(self) -> dict:
+        """Request counts, cache hits, invalidations and the average latency over the last completed requests"""
+        stats = dict(self.counts)
+        stats["pending"] = self.get_pendingCount()
+        stats["cached_searches"] = len(self.fields)
+        stats["avg_latency_ms"] = 1000 * sum(self.latencies) / len(self.latencies) if self.latencies else 0.0
+        stats["avg_latency_frames"] = sum(self.latency_frames) / len(self.latency_frames) if self.latency_frames else 0.0
+        return stats
+
+def find_path(grid: NavGrid, start: Tuple[float, float], goal: Tuple[float, float]) -> List[Tuple[float, float]]:
+    """One synchronous A* search between world positions; for one-off queries outside the service. Empty if there is no path"""
+    start_cell, goal_cell = grid.cell_of(*start), grid.cell_of(*goal)
+    if not grid.walkable[start_cell] or not grid.walkable[goal_cell]:
+        return []
+    goal_y, goal_x = divmod(goal_cell, grid.width)
+    def heuristic(index):
+        cy, cx = divmod(index, grid.width)
+        dx, dy = abs(cx - goal_x), abs(cy - goal_y)
+        return max(dx, dy) + (DIAGONAL - 1) * min(dx, dy)
+    dist = {start_cell: 0.0}
+    came_from = {start_cell: -1}
+    heap = [(heuristic(start_cell), start_cell)]
+    closed = set()
+    while heap:
+        x, index = heapq.heappop(heap)
+        if index == goal_cell:
+            path = []
+            while index != -1:
+                path.append(grid.center(index))
+                index = came_from[index]
+            return path[::-1]
+        if index in closed:
+            continue
+        closed.add(index)
+        for neighbor, step_cost in grid.neighbors(index):
+            new_cost = dist[index] + step_cost
+            if new_cost < dist.get(neighbor, math.inf):
+                dist[neighbor] = new_cost
+                came_from[neighbor] = index
+                heapq.heappush(heap, (new_cost + heuristic(neighbor), neighbor))
+    return []
+
+# Global path service; None until a level provides a grid through set_nav_grid
+path_service = None
+
+def set_nav_grid(grid: NavGrid, **kwargs) -> PathService:
+    """Start a fresh path service for a level's grid"""
+    global path_service
+    if path_service is not None:
+        path_service.clear()
+    path_service = PathService(grid, **kwargs)
+    return path_service
+
+def get_path_service() -> Optional[PathService]:
+    return path_service
+
+def update_paths() -> None:
+    """Run the global service's per-frame slice; nothing happens until a grid is set"""
+    if path_service is not None:
+        path_service.update()
+
+def benchmark_paths(size: int = 200, npc_count: int = 50, seed: int = 3) -> None:
+    """npc_count NPCs chasing one player on the same frame: one A* each versus the sliced, shared service"""
+    rng = np.random.default_rng(seed)
+    walls = rng.random((size, size)) < 0.2
+    walls[:, 0] = walls[0, :] = False
+    grid = NavGrid(size, size, 1.0, bytearray((~walls).astype(np.uint8).ravel().tobytes()))
+    player = (size * 0.5, size * 0.5)
+    grid.walkable[grid.cell_of(*player)] = 1
+    starts = [(float(x), float(y)) for x, y in rng.uniform(0, size, (npc_count, 2))]
+    for start in starts:
+        grid.walkable[grid.cell_of(*start)] = 1
+
+    begin = time.perf_counter()
+    for start in starts:
+        find_path(grid, start, player)
+    astar_ms = (time.perf_counter() - begin) * 1000
+
+    service = PathService(grid, budget_ms=2.0)
+    requests = [service.request_path(start, player) for start in starts]
+    worst_ms, frames = 0.0, 0
+    while service.get_pendingCount():
+        begin = time.perf_counter()
+        service.update()
+        worst_ms = max(worst_ms, (time.perf_counter() - begin) * 1000)
+        frames += 1
+    stats = service.get_stats()
+    print(f"{npc_count} paths on a {size}x{size} grid: {npc_count} A* runs in one frame {astar_ms:.1f} ms")
+    print(f"path service ({service.budget_ms} ms budget): done in {frames} frames, worst frame {worst_ms:.2f} ms, "
+          f"average latency {stats['avg_latency_frames']:.1f} frames, {sum(r.status == DONE for r in requests)} found")
+
+    requests = [service.request_path(start, player) for start in starts]
+    print(f"asking again: {service.get_stats()['cache_hits']} of {npc_count} answered from the cache")
+
+if __name__ == "__main__":
+    benchmark_paths()
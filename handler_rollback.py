@@ -0,0 +1,128 @@
+import handler_vars
+
+# PER-FRAME STATE SNAPSHOTS FOR ROLLBACK NETCODE
+# A STATE PROVIDER COPIES ITS STATE INTO, AND BACK OUT OF, A FLAT BYTE BUFFER; THE RING OWNS ONE PREALLOCATED BUFFER PER PROVIDER PER SLOT
+# CAPTURING AND RESTORING A FRAME IS THEREFORE A FEW BULK MEMORY COPIES, WITH NO ALLOCATION UNLESS A PROVIDER'S SIZE CHANGES
+
+from abc import ABC, abstractmethod
+from array import array
+from typing import List
+import time
+
+class StateProvider(ABC):
+    """Base class for anything whose state has to roll back with the frame; a provider missing a method cannot be created"""
+    @abstractmethod
+    def snapshot_size(self) -> int:
+        """Bytes needed for one snapshot; if this changes, every stored frame is dropped"""
+
+    @abstractmethod
+    def capture(self, buffer: memoryview) -> None:
+        """Copy the current state into buffer, which is exactly snapshot_size() bytes"""
+
+    @abstractmethod
+    def restore(self, buffer: memoryview) -> None:
+        """Copy state back out of a buffer filled by capture()"""
+
+class VarsStateProvider(StateProvider):
+    """Snapshots the handler_vars columns with one memcpy each"""
+    def _sizes(self):
+        return (len(handler_vars.vars_ints) * handler_vars.vars_ints.itemsize,
+                len(handler_vars.vars_floats) * handler_vars.vars_floats.itemsize,
+                len(handler_vars.vars_flags.bits))
+
+    def snapshot_size(self) -> int:
+        return sum(self._sizes())
+
+    def capture(self, buffer: memoryview) -> None:
+        ints_size, floats_size, flags_size = self._sizes()
+        with handler_vars.vars_writeLock:
+            with memoryview(handler_vars.vars_ints) as view:
+                buffer[:ints_size] = view.cast('B')
+            with memoryview(handler_vars.vars_floats) as view:
+                buffer[ints_size:ints_size + floats_size] = view.cast('B')
+            buffer[ints_size + floats_size:] = handler_vars.vars_flags.bits
+
+    def restore(self, buffer: memoryview) -> None:
+        ints_size, floats_size, flags_size = self._sizes()
+        with handler_vars.vars_writeLock:
+            # WRITING THROUGH A VIEW COPIES IN PLACE, SO THE COLUMN OBJECTS ARE NEVER REBOUND OR RESIZED
+            with memoryview(handler_vars.vars_ints) as view:
+                view.cast('B')[:] = buffer[:ints_size]
+            with memoryview(handler_vars.vars_floats) as view:
+                view.cast('B')[:] = buffer[ints_size:ints_size + floats_size]
+            handler_vars.vars_flags.bits[:] = buffer[ints_size + floats_size:]
+        handler_vars.vars_notifyBulk()
+
+class SnapshotRing:
+    def __init__(self, capacity: int):
+        """
+        :param capacity: Frames kept; use max_rollback + 1 so the current frame and every frame it can roll back to fit
+        """
+        self.capacity = capacity
+        self.frames = [-1] * capacity  # Frame number held by each slot, -1 when empty
+        self.providers: List[StateProvider] = []
+        self.buffers: List[List[bytearray]] = []  # [provider][slot]
+
+    def register(self, provider: StateProvider) -> None:
+        self.providers.append(provider)
+        self.buffers.append([bytearray(provider.snapshot_size()) for x in range(self.capacity)])
+        self.clear()  # Older frames have nothing for the new provider
+
+    def clear(self) -> None:
+        self.frames = [-1] * self.capacity
+
+    def capture(self, frame: int) -> None:
+        """Snapshot every provider for this frame, overwriting the oldest slot"""
+        slot = frame % self.capacity
+        for provider, slots in zip(self.providers, self.buffers):
+            size = provider.snapshot_size()
+            if len(slots[slot]) != size:
+                # LAYOUT CHANGED (E.G. A NEW VARIABLE TABLE); NOTHING STORED SO FAR CAN BE RESTORED INTO IT
+                slots[:] = [bytearray(size) for x in range(self.capacity)]
+                self.clear()
+            provider.capture(memoryview(slots[slot]))
+        self.frames[slot] = frame
+
+    def has_frame(self, frame: int) -> bool:
+        return frame >= 0 and self.frames[frame % self.capacity] == frame
+
+    def restore(self, frame: int) -> bool:
+        """Put every provider back to how it was when this frame was captured; frames after it are dropped"""
+        if not self.has_frame(frame):
+            return False
+        slot = frame % self.capacity
+        for provider, slots in zip(self.providers, self.buffers):
+            if len(slots[slot]) != provider.snapshot_size():
+                return False
+        for provider, slots in zip(self.providers, self.buffers):
+            provider.restore(memoryview(slots[slot]))
+        self.frames = [x if x <= frame else -1 for x in self.frames]
+        return True
+
+def benchmark_snapshot(var_count: int = 10000, frames: int = 2000, target_ms: float = 0.2) -> None:
+    """Average capture and restore time for the handler_vars columns against the per-frame budget"""
+    saved = (array('i', handler_vars.vars_ints), array('f', handler_vars.vars_floats), handler_vars.vars_flags.copy())
+    handler_vars.vars_ints[:] = array('i', range(var_count))
+    handler_vars.vars_floats[:] = array('f', bytes(4 * var_count))
+    handler_vars.vars_flags.assign(handler_vars.BitColumn(var_count))
+
+    ring = SnapshotRing(8)
+    ring.register(VarsStateProvider())
+    start = time.perf_counter()
+    for frame in range(frames):
+        ring.capture(frame)
+    capture_ms = (time.perf_counter() - start) * 1000 / frames
+    start = time.perf_counter()
+    for x in range(frames):
+        ring.restore(frames - 1)
+    restore_ms = (time.perf_counter() - start) * 1000 / frames
+
+    handler_vars.vars_ints[:] = saved[0]
+    handler_vars.vars_floats[:] = saved[1]
+    handler_vars.vars_flags.assign(saved[2])
+    for label, ms in (("capture", capture_ms), ("restore", restore_ms)):
+        verdict = "within" if ms <= target_ms else "OVER"
+        print(f"{label:>8}: {ms:.4f} ms per frame ({var_count} ints + {var_count} floats + {var_count} flags), {verdict} the {target_ms} ms target")
+
+if __name__ == "__main__":
+    benchmark_snapshot()
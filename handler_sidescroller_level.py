@@ -7,7 +7,11 @@ from enum import Enum, auto
 import math
 from dataclasses import dataclass
 import os
+import copy
 from datetime import datetime
+import handler_vars_save
+import handler_npc_minder
+import handler_npc_pools
 
 class PlatformType(Enum):
     STATIC = auto()
@@ -207,19 +211,26 @@ class SaveState:
         self.save_dir = save_dir
         os.makedirs(save_dir, exist_ok=True)
         
-    def save_checkpoint(self, level_id: str, checkpoint_id: str, player_data: dict) -> bool:
-        """Save player progress at checkpoint"""
+    def save_checkpoint(self, level_id: str, checkpoint_id: str, player_data: dict,
+                        callback=None) -> bool:
+        """Save player progress at checkpoint. Only a copy of the data is taken here;
+        the JSON is written by the background save writer so touching a flag never hitches the frame.
+        Returns True once the write is queued, not once it is on disk; pass callback(success, path, size)
+        to hear how the write itself went"""
         try:
             save_data = {
                 'level_id': level_id,
                 'checkpoint_id': checkpoint_id,
-                'player_data': player_data,
+                'player_data': copy.deepcopy(player_data),
                 'timestamp': datetime.now().isoformat()
             }
             
             save_path = os.path.join(self.save_dir, f"checkpoint_{level_id}.json")
-            with open(save_path, 'w') as f:
-                json.dump(save_data, f, indent=4)
+            handler_vars_save.get_save_writer().submit(
+                save_path,
+                lambda: [json.dumps(save_data).encode('utf-8')],
+                callback
+            )
             return True
         except Exception as e:
             print(f"Error saving checkpoint: {e}")
@@ -229,6 +240,7 @@ class SaveState:
         """Load the latest checkpoint data"""
         try:
             save_path = os.path.join(self.save_dir, f"checkpoint_{level_id}.json")
+            handler_vars_save.flush_pending(save_path)
             if os.path.exists(save_path):
                 with open(save_path, 'r') as f:
                     return json.load(f)
@@ -302,6 +314,10 @@ class SideScrollerLevel:
             for platform in self.platforms:
                 if 'movement_type' in platform:
                     self.moving_platforms.append(MovingPlatform(platform))
+
+            # Preallocate enemy pools now so spawning during play allocates nothing
+            handler_npc_pools.release_allPools()
+            handler_npc_pools.build_pools(data.get('npc_pools', {}))
                     
             # Load last checkpoint if exists
             saved_data = self.save_state.load_checkpoint(self.level_id)
@@ -448,6 +464,9 @@ class SideScrollerLevel:
                 flag.height
             )
             surface.blit(flag.sprite, dest_rect, source_rect)
+
+        # NPC health bars: one batched blit for every active NPC
+        handler_npc_minder.drawNPCHealthBars(surface, self.camera_x)
             
     def get_spawn_position(self) -> Tuple[float, float]:
         return self.spawn_point
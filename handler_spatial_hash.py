@@ -0,0 +1,226 @@
+import numpy as np
+
+# UNIFORM-GRID SPATIAL HASH OVER A STORE'S x / y COLUMNS (SEE handler_npc.NPCStore)
+# EACH CELL IS A LIST OF IDS; EVERY ID REMEMBERS ITS CELL KEY AND ITS SLOT IN THAT LIST, SO MOVING BETWEEN CELLS IS A SWAP-REMOVE AND AN APPEND
+# update() RE-KEYS MANY IDS AT ONCE AND ONLY TOUCHES THE ONES THAT CROSSED INTO ANOTHER CELL
+# QUERIES COLLECT CANDIDATES FROM THE OVERLAPPED CELLS AND FILTER THEM WITH ONE VECTORIZED DISTANCE TEST
+
+from itertools import chain
+from typing import List
+import math
+
+CELL_Y_OFFSET = 1 << 31 # KEY = cx * 2^32 + (cy + 2^31), SO ANY PAIR OF int32 CELL COORDINATES GETS ITS OWN int64 KEY
+CELL_X_STRIDE = 1 << 32
+BATCH_MAX_OFFSETS = 81 # BATCHED QUERIES SPANNING MORE CELLS PER POINT THAN THIS GO ONE POINT AT A TIME
+
+class SpatialHash:
+    def __init__(self, store, cell_size: float = 128.0):
+        """
+        :param store: Object with x and y NumPy columns indexed by id; columns may be replaced as the store grows
+        :param cell_size: Grid cell edge in world units; roughly the most common query radius works well
+        """
+        self.store = store
+        self.cell_size = float(cell_size)
+        self.cells = {}  # Cell key -> list of ids
+        self.keys = np.zeros(0, np.int64)
+        self.slots = np.zeros(0, np.int32)  # Position in the cell's list, -1 when not in the hash
+
+    def __len__(self):
+        return int(np.count_nonzero(self.slots >= 0))
+
+    def _reserve(self, npc_id: int) -> None:
+        if npc_id < len(self.slots):
+            return
+        capacity = max(len(self.store.x), npc_id + 1)
+        self.keys = np.concatenate((self.keys, np.zeros(capacity - len(self.keys), np.int64)))
+        self.slots = np.concatenate((self.slots, np.full(capacity - len(self.slots), -1, np.int32)))
+
+    def cell_key(self, x: float, y: float) -> int:
+        return math.floor(x / self.cell_size) * CELL_X_STRIDE + math.floor(y / self.cell_size) + CELL_Y_OFFSET
+
+    def cell_keys(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        cx = np.floor(np.asarray(xs, np.float64) / self.cell_size).astype(np.int64)
+        cy = np.floor(np.asarray(ys, np.float64) / self.cell_size).astype(np.int64)
+        return cx * CELL_X_STRIDE + cy + CELL_Y_OFFSET
+
+    def contains(self, npc_id: int) -> bool:
+        return npc_id < len(self.slots) and self.slots[npc_id] >= 0
+
+    def _add(self, npc_id: int, key: int) -> None:
+        cell = self.cells.get(key)
+        if cell is None:
+            cell = self.cells[key] = []
+        self.keys[npc_id] = key
+        self.slots[npc_id] = len(cell)
+        cell.append(npc_id)
+
+    def _take(self, npc_id: int) -> None:
+        key = int(self.keys[npc_id])
+        cell = self.cells[key]
+        slot = int(self.slots[npc_id])
+        last = cell[-1]
+        cell[slot] = last
+        self.slots[last] = slot
+        cell.pop()
+        if not cell:
+            del self.cells[key]
+        self.slots[npc_id] = -1
+
+    def insert(self, npc_id: int) -> None:
+        self._reserve(npc_id)
+        if self.slots[npc_id] >= 0:
+            return
+        self._add(npc_id, self.cell_key(float(self.store.x[npc_id]), float(self.store.y[npc_id])))
+
+    def insert_many(self, ids) -> None:
+        """Insert many ids, computing their cell keys in one pass"""
+        ids = np.asarray(ids, np.int64)
+        if len(ids) == 0:
+            return
+        self._reserve(int(ids.max()))
+        ids = ids[self.slots[ids] < 0]
+        for npc_id, key in zip(ids.tolist(), self.cell_keys(self.store.x[ids], self.store.y[ids]).tolist()):
+            self._add(npc_id, key)
+
+    def remove(self, npc_id: int) -> None:
+        if self.contains(npc_id):
+            self._take(npc_id)
+
+    def remove_many(self, ids) -> None:
+        """Remove many ids; ids not in the hash are skipped"""
+        ids = np.asarray(ids, np.int64)
+        ids = ids[ids < len(self.slots)]
+        for npc_id in ids[self.slots[ids] >= 0].tolist():
+            self._take(npc_id)
+
+    def clear(self) -> None:
+        self.cells = {}
+        self.slots[:] = -1
+
+    def moved(self, npc_id: int) -> None:
+        """Call after one id's x / y changed"""
+        if not self.contains(npc_id):
+            return
+        key = self.cell_key(float(self.store.x[npc_id]), float(self.store.y[npc_id]))
+        if key != self.keys[npc_id]:
+            self._take(npc_id)
+            self._add(npc_id, key)
+
+    def update(self, ids=None) -> int:
+        """
+        Re-key ids whose x / y columns were written directly (e.g. a vectorized movement step)
+        :param ids: Ids to check; every id in the hash by default
+        :return: How many ids changed cell
+        """
+        if ids is None:
+            ids = np.flatnonzero(self.slots >= 0)
+        else:
+            ids = np.asarray(ids, np.int64)
+            ids = ids[self.slots[ids] >= 0]
+        new_keys = self.cell_keys(self.store.x[ids], self.store.y[ids])
+        changed = np.flatnonzero(new_keys != self.keys[ids])
+        for npc_id, key in zip(ids[changed].tolist(), new_keys[changed].tolist()):
+            self._take(npc_id)
+            self._add(npc_id, key)
+        return len(changed)
+
+    def _candidates(self, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        """Ids in every cell the box touches"""
+        cx0, cx1 = math.floor(x0 / self.cell_size), math.floor(x1 / self.cell_size)
+        cy0, cy1 = math.floor(y0 / self.cell_size), math.floor(y1 / self.cell_size)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            # A BOX OVER MORE CELLS THAN ARE OCCUPIED: WALK THE OCCUPIED ONES INSTEAD
+            lists = self.cells.values()
+        else:
+            lists = filter(None, (self.cells.get(cx * CELL_X_STRIDE + cy + CELL_Y_OFFSET)
+                                  for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)))
+        return np.fromiter(chain.from_iterable(lists), np.int64)
+
+    def query_box(self, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        """Ids whose position is inside the box, edges included"""
+        ids = self._candidates(x0, y0, x1, y1)
+        xs, ys = self.store.x[ids], self.store.y[ids]
+        return ids[(xs >= x0) & (xs <= x1) & (ys >= y0) & (ys <= y1)]
+
+    def query_radius(self, x: float, y: float, radius: float) -> np.ndarray:
+        """Ids within radius of (x, y)"""
+        ids = self._candidates(x - radius, y - radius, x + radius, y + radius)
+        dx = self.store.x[ids] - x
+        dy = self.store.y[ids] - y
+        return ids[dx * dx + dy * dy <= radius * radius]
+
+    def query_radius_many(self, points, radius: float) -> List[np.ndarray]:
+        """
+        For each point, the ids within radius of it; one candidate gather and one distance test for the whole batch
+        :param points: (n, 2) array-like of x, y
+        :return: List of n id arrays, in the order of points
+        """
+        points = np.asarray(points, np.float64).reshape(-1, 2)
+        count = len(points)
+        span = math.ceil(radius / self.cell_size)
+        offset_count = (2 * span + 1) ** 2
+        if count == 0:
+            return []
+        if offset_count > BATCH_MAX_OFFSETS:
+            return [self.query_radius(x, y, radius) for x, y in points.tolist()]
+
+        # EVERY (POINT, NEARBY CELL) PAIR, POINT-MAJOR SO RESULTS COME OUT GROUPED BY POINT
+        offsets = np.arange(-span, span + 1, dtype=np.int64)
+        offset_keys = (offsets[:, None] * CELL_X_STRIDE + offsets[None, :]).ravel()
+        pair_keys = (self.cell_keys(points[:, 0], points[:, 1])[:, None] + offset_keys[None, :]).ravel()
+        unique_keys, pair_cell = np.unique(pair_keys, return_inverse=True)
+
+        cell_lists = [self.cells.get(key, ()) for key in unique_keys.tolist()]
+        cell_sizes = np.fromiter((len(cell) for cell in cell_lists), np.int64, len(cell_lists))
+        cell_ids = np.fromiter(chain.from_iterable(cell_lists), np.int64, int(cell_sizes.sum()))
+        cell_starts = np.cumsum(cell_sizes) - cell_sizes
+
+        # EXPAND EACH PAIR INTO ITS CELL'S IDS WITHOUT A PYTHON LOOP
+        pair_sizes = cell_sizes[pair_cell.ravel()]
+        total = int(pair_sizes.sum())
+        pair_starts = np.cumsum(pair_sizes) - pair_sizes
+        index = np.arange(total) - np.repeat(pair_starts - cell_starts[pair_cell.ravel()], pair_sizes)
+        candidates = cell_ids[index]
+        owner = np.repeat(np.repeat(np.arange(count), offset_count), pair_sizes)
+
+        dx = self.store.x[candidates] - points[owner, 0]
+        dy = self.store.y[candidates] - points[owner, 1]
+        keep = dx * dx + dy * dy <= radius * radius
+        hits, owner = candidates[keep], owner[keep]
+        return np.split(hits, np.cumsum(np.bincount(owner, minlength=count))[:-1])
+
+def benchmark_queries(npc_count: int = 10000, point_count: int = 1000, radius: float = 200.0, world: float = 10000.0) -> None:
+    """Brute force versus single and batched hash queries"""
+    import time
+    from types import SimpleNamespace
+    rng = np.random.default_rng(1)
+    store = SimpleNamespace(x=rng.uniform(0, world, npc_count).astype(np.float32),
+                            y=rng.uniform(0, world, npc_count).astype(np.float32))
+    spatial = SpatialHash(store, radius)
+    for npc_id in range(npc_count):
+        spatial.insert(npc_id)
+    points = rng.uniform(0, world, (point_count, 2))
+
+    start = time.perf_counter()
+    brute = [np.flatnonzero((store.x - x) ** 2 + (store.y - y) ** 2 <= radius * radius) for x, y in points.tolist()]
+    brute_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    single = [spatial.query_radius(x, y, radius) for x, y in points.tolist()]
+    single_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    batched = spatial.query_radius_many(points, radius)
+    batched_ms = (time.perf_counter() - start) * 1000
+    assert all(np.array_equal(np.sort(a), np.sort(b)) and np.array_equal(np.sort(a), np.sort(c))
+               for a, b, c in zip(brute, single, batched))
+
+    store.x += rng.uniform(-5, 5, npc_count).astype(np.float32)
+    store.y += rng.uniform(-5, 5, npc_count).astype(np.float32)
+    start = time.perf_counter()
+    changed = spatial.update()
+    update_ms = (time.perf_counter() - start) * 1000
+    print(f"{point_count} radius queries over {npc_count} NPCs: brute force {brute_ms:.1f} ms, "
+          f"hash {single_ms:.1f} ms, batched {batched_ms:.1f} ms")
+    print(f"update after everyone moved a little: {update_ms:.2f} ms ({changed} changed cell)")
+
+if __name__ == "__main__":
+    benchmark_queries()
@@ -0,0 +1,280 @@
+import handler_config
+import numpy as np
+
+# STATUS EFFECTS (thisGame_statusEffects_buffs / _debuffs) FOR ANY NUMBER OF ENTITIES
+# EVERY ACTIVE EFFECT IS ONE ROW ACROSS PARALLEL ARRAYS: ENTITY, EFFECT ID, REMAINING SECONDS, PER-SECOND AMOUNT, PENDING INSTANT AMOUNT
+# tick() ADVANCES ALL ROWS, APPLIES THEIR DAMAGE AND HEALING AND DROPS EXPIRED ROWS IN ONE VECTORIZED STEP;
+# PYTHON ONLY HEARS ABOUT THE EFFECTS THAT EXPIRED AND THE ENTITIES THAT DIED
+# hp AMOUNTS ARE DAMAGE: DEBUFFS HURT AND BUFFS HEAL, AND WHAT THEY DO STAYS DONE
+# ANY OTHER stat= (shield, armor) IS A MODIFIER ON THAT NPCStore COLUMN: BUFFS RAISE IT AND DEBUFFS LOWER IT WHILE THE EFFECT LASTS,
+# AND WHATEVER A ROW ADDED IS TAKEN BACK WHEN IT EXPIRES, IS REMOVED OR ITS ENTITY DIES
+
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+DEPLETING_STATS = ("shield",)  # Spent by combat, so taking a buff back never leaves them below zero
+
+@dataclass
+class StatusTickResult:
+    expired_entities: np.ndarray  # One entry per expired effect
+    expired_effects: np.ndarray   # Effect ids, parallel to expired_entities; names are in StatusEffectEngine.effect_names
+    deaths: np.ndarray            # Entities whose hp went from above zero to zero or below during this tick
+
+class StatusEffectEngine:
+    def __init__(self, capacity: int = 256, effects: Optional[list] = None, store=None):
+        """
+        :param capacity: Rows allocated up front; doubles when full
+        :param effects: StatusEffectDef list; defaults to the compiled buffs and debuffs from handler_config
+        :param store: Object whose columns (e.g. NPCStore.shield, NPCStore.armor) the non-hp effects modify
+        :raises ValueError: If an effect's stat is not hp and the store has no column for it
+        """
+        if effects is None:
+            config = handler_config.get_config()
+            effects = list(config.buffs.values()) + list(config.debuffs.values())
+        self.store = store
+
+        self.effect_names: List[str] = []
+        self.effect_ids = {}
+        self.stat_names: List[str] = ["hp"]  # STAT CODE 0 IS hp; THE REST ARE MODIFIED STORE COLUMNS
+        durations, instants, rates, stats = [], [], [], []
+        for effect in effects:
+            if effect.id in self.effect_ids:
+                raise ValueError(f"Status effect '{effect.id}' is declared twice")
+            if effect.stat == "hp":
+                sign = 1.0 if effect.is_debuff else -1.0  # hp AMOUNTS ARE DAMAGE
+            elif store is not None and hasattr(store, effect.stat):
+                sign = -1.0 if effect.is_debuff else 1.0  # MODIFIER AMOUNTS ARE GAINS
+            else:
+                raise ValueError(f"Status effect '{effect.id}' changes '{effect.stat}', but there is no store column for it")
+            if effect.stat not in self.stat_names:
+                self.stat_names.append(effect.stat)
+            self.effect_ids[effect.id] = len(self.effect_names)
+            self.effect_names.append(effect.id)
+            durations.append(effect.duration)
+            instants.append(sign * effect.instant)
+            rates.append(sign * effect.per_second)
+            stats.append(self.stat_names.index(effect.stat))
+        self.effect_duration = np.array(durations, np.float32)
+        self.effect_instant = np.array(instants, np.float32)
+        self.effect_rate = np.array(rates, np.float32)
+        self.effect_stat = np.array(stats, np.int8)
+
+        self.entity = np.zeros(capacity, np.int32)
+        self.effect = np.zeros(capacity, np.int16)
+        self.stat = np.zeros(capacity, np.int8)
+        self.remaining = np.zeros(capacity, np.float32)
+        self.rate = np.zeros(capacity, np.float32)
+        self.instant = np.zeros(capacity, np.float32)
+        self.applied = np.zeros(capacity, np.float32)  # What a modifier row has added to its stat so far
+        self.count = 0
+        self.expire_listeners: List[Callable[[int, str], None]] = []
+
+    def _columns(self):
+        return ("entity", "effect", "stat", "remaining", "rate", "instant", "applied")
+
+    def _reserve(self, extra: int) -> None:
+        needed = self.count + extra
+        capacity = len(self.entity)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in self._columns():
+            column = getattr(self, name)
+            grown = np.zeros(capacity, column.dtype)
+            grown[:self.count] = column[:self.count]
+            setattr(self, name, grown)
+
+    def _compact(self, keep: np.ndarray) -> None:
+        """Drop the rows where keep is False, preserving order; keep covers the first self.count rows"""
+        kept = int(np.count_nonzero(keep))
+        if kept == self.count:
+            return
+        for name in self._columns():
+            column = getattr(self, name)
+            column[:kept] = column[:self.count][keep]
+        self.count = kept
+
+    def _revert(self, rows: np.ndarray) -> None:
+        """Take back what the modifier rows among rows (indices into the first self.count rows) added to their stat columns"""
+        stat = self.stat[rows]
+        for code in np.unique(stat[stat > 0]).tolist():
+            picked = rows[stat == code]
+            name = self.stat_names[code]
+            column = getattr(self.store, name)
+            np.subtract.at(column, self.entity[picked], self.applied[picked])
+            if name in DEPLETING_STATS:
+                entities = self.entity[picked]
+                column[entities] = np.maximum(column[entities], 0)
+
+    def effect_id(self, effect_name: str) -> int:
+        effect_id = self.effect_ids.get(effect_name)
+        if effect_id is None:
+            raise ValueError(f"Unknown status effect '{effect_name}'")
+        return effect_id
+
+    def apply(self, entity: int, effect_name: str, duration: Optional[float] = None) -> None:
+        """Start an effect on one entity, or refresh it: the longer remaining time wins and an hp effect's instant amount
+        lands again (a modifier is not stacked)"""
+        self.apply_many(np.array((entity,), np.int32), effect_name, duration)
+
+    def apply_many(self, entities, effect_name: str, duration: Optional[float] = None) -> None:
+        """Start or refresh one effect on many entities at once"""
+        effect_id = self.effect_id(effect_name)
+        if duration is None:
+            duration = float(self.effect_duration[effect_id])
+        entities = np.unique(np.asarray(entities, np.int32))
+        if len(entities) and (entities[0] < 0 or (self.store is not None and entities[-1] >= self.store.count)):
+            raise ValueError(f"Status effect '{effect_name}' applied to entity ids outside the store: {entities[0]}..{entities[-1]}")
+        n = self.count
+
+        existing = np.flatnonzero((self.effect[:n] == effect_id) & np.isin(self.entity[:n], entities))
+        if len(existing) and self.effect_stat[effect_id] == 0:
+            self.remaining[existing] = np.maximum(self.remaining[existing], duration)
+            self.instant[existing] += self.effect_instant[effect_id]
+        elif len(existing):
+            self.remaining[existing] = np.maximum(self.remaining[existing], duration)
+        new = np.setdiff1d(entities, self.entity[existing], assume_unique=True)
+
+        self._reserve(len(new))
+        rows = slice(self.count, self.count + len(new))
+        self.entity[rows] = new
+        self.effect[rows] = effect_id
+        self.stat[rows] = self.effect_stat[effect_id]
+        self.applied[rows] = 0
+        self.remaining[rows] = duration
+        self.rate[rows] = self.effect_rate[effect_id]
+        self.instant[rows] = self.effect_instant[effect_id]
+        self.count += len(new)
+
+    def set_remaining(self, entity: int, effect_name: str, seconds: float) -> None:
+        """
+        Set an effect's remaining time outright, shorter or longer; 0 or less cures it
+        Unlike apply, an effect the entity already has only gets its time changed, with no instant amount landing again
+        """
+        if seconds <= 0:
+            self.remove(entity, effect_name)
+            return
+        rows = np.flatnonzero((self.entity[:self.count] == entity) & (self.effect[:self.count] == self.effect_id(effect_name)))
+        if len(rows):
+            self.remaining[rows] = seconds
+        else:
+            self.apply(entity, effect_name, seconds)
+
+    def remove(self, entity: int, effect_name: Optional[str] = None) -> None:
+        """Cure one effect, or every effect when effect_name is None; no expiry event fires"""
+        keep = self.entity[:self.count] != entity
+        if effect_name is not None:
+            keep |= self.effect[:self.count] != self.effect_id(effect_name)
+        self._revert(np.flatnonzero(~keep))
+        self._compact(keep)
+
+    def remove_many(self, entities) -> None:
+        """remove() for many entities at once, curing every effect on them"""
+        if self.count == 0:
+            return
+        keep = ~np.isin(self.entity[:self.count], entities)
+        self._revert(np.flatnonzero(~keep))
+        self._compact(keep)
+
+    def clear(self) -> None:
+        self._revert(np.arange(self.count))
+        self.count = 0
+
+    def get_remaining(self, entity: int, effect_name: str) -> float:
+        """Seconds left on an effect, 0 if the entity does not have it"""
+        rows = np.flatnonzero((self.entity[:self.count] == entity) & (self.effect[:self.count] == self.effect_id(effect_name)))
+        return float(self.remaining[rows[0]]) if len(rows) else 0.0
+
+    def get_active_effects(self, entity: int) -> List[str]:
+        rows = np.flatnonzero(self.entity[:self.count] == entity)
+        return [self.effect_names[effect_id] for effect_id in self.effect[rows]]
+
+    def add_expire_listener(self, callback: Callable[[int, str], None]) -> None:
+        """callback(entity, effect_name) for every effect that runs out"""
+        self.expire_listeners.append(callback)
+
+    def tick(self, delta_time: float, hp: np.ndarray, hp_max: Optional[np.ndarray] = None) -> StatusTickResult:
+        """
+        Advance every active effect by delta_time seconds
+        :param hp: Float hp array indexed by entity; changed in place
+        :param hp_max: Optional array of the same shape; healing is capped to it
+        :return: Expired effects and the entities that died this tick
+        """
+        n = self.count
+        if n == 0:
+            empty = np.zeros(0, np.int32)
+            return StatusTickResult(empty, empty, empty)
+        entity = self.entity[:n]
+        remaining = self.remaining[:n]
+        stat = self.stat[:n]
+        if int(entity.max()) >= len(hp):
+            raise ValueError(f"Status effect on entity {int(entity.max())}, but hp only covers {len(hp)} entities")
+
+        # INSTANT AMOUNTS LAND ONCE; PER-SECOND AMOUNTS ONLY COUNT THE PART OF THE TICK THE EFFECT WAS STILL ACTIVE
+        amount = self.instant[:n] + self.rate[:n] * np.minimum(remaining, delta_time)
+        self.instant[:n] = 0
+        remaining -= delta_time
+
+        is_modifier = stat > 0
+        if is_modifier.any():
+            self.applied[:n] += np.where(is_modifier, amount, 0)
+            for code in np.unique(stat[is_modifier]).tolist():
+                rows = stat == code
+                np.add.at(getattr(self.store, self.stat_names[code]), entity[rows], amount[rows])
+            amount = np.where(is_modifier, 0, amount)
+
+        was_alive = hp > 0
+        hp -= np.bincount(entity, weights=amount, minlength=len(hp)).astype(hp.dtype)
+        if hp_max is not None:
+            np.minimum(hp, hp_max, out=hp)
+        deaths = np.flatnonzero(was_alive & (hp <= 0)).astype(np.int32)
+
+        expired = remaining <= 0
+        expired_entities = entity[expired].copy()
+        expired_effects = self.effect[:n][expired].astype(np.int32)
+        # THE DEAD KEEP NO EFFECTS, AND LOSING THEM IS NOT AN EXPIRY
+        keep = ~expired
+        if len(deaths):
+            keep &= ~np.isin(entity, deaths)
+            alive_expired = ~np.isin(expired_entities, deaths)
+            expired_entities, expired_effects = expired_entities[alive_expired], expired_effects[alive_expired]
+        self._revert(np.flatnonzero(~keep))
+        self._compact(keep)
+
+        if self.expire_listeners:
+            for expired_entity, effect_id in zip(expired_entities.tolist(), expired_effects.tolist()):
+                for callback in self.expire_listeners:
+                    callback(expired_entity, self.effect_names[effect_id])
+        return StatusTickResult(expired_entities, expired_effects, deaths)
+
+# Global status effect engine
+status_engine = None
+
+def get_status_engine() -> StatusEffectEngine:
+    """Get the global status effect engine, built from the compiled config on first use"""
+    global status_engine
+    if status_engine is None:
+        import handler_npc
+        status_engine = StatusEffectEngine(store=handler_npc.get_npc_store())
+    return status_engine
+
+def benchmark_tick(entities: int = 50000, effects_per_entity: int = 2, ticks: int = 200) -> None:
+    """Time one vectorized tick with many entities carrying effects"""
+    import time
+    from types import SimpleNamespace
+    hp = np.full(entities, 1e6, np.float32)
+    hp_max = np.full(entities, 1e6, np.float32)
+    store = SimpleNamespace(count=entities, shield=np.zeros(entities, np.float32), armor=np.zeros(entities, np.float32))
+    engine = StatusEffectEngine(entities * effects_per_entity, store=store)
+    names = engine.effect_names
+    for x in range(effects_per_entity):
+        engine.apply_many(np.arange(entities), names[(x * 3 + 5) % len(names)], 1e6)
+    start = time.perf_counter()
+    for x in range(ticks):
+        engine.tick(1 / 60, hp, hp_max)
+    elapsed = (time.perf_counter() - start) / ticks
+    print(f"{engine.count} active effects on {entities} entities: {elapsed * 1000:.3f} ms per tick")
+
+if __name__ == "__main__":
+    benchmark_tick()
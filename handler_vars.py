@@ -1,5 +1,104 @@
-vars_ints = []
+from array import array
+import main_customize
+import threading
+
+# EVERY VARIABLE LIVES IN ONE OF THREE TYPED COLUMNS; EACH GROUP IS A CONTIGUOUS SLICE OF ITS COLUMN
+# THE COLUMN OBJECTS ARE CREATED ONCE AND ONLY EVER CHANGED IN PLACE, SO REFERENCES TO THEM NEVER GO STALE
+VAR_INT = 0 # int32
+VAR_FLOAT = 1 # float32
+VAR_FLAG = 2 # one bit per flag
+
+class BitColumn:
+    """A bool column packed eight flags to a byte; indexing returns 0 or 1 like the old int flags"""
+    def __init__(self, count=0):
+        self.count = count
+        self.bits = bytearray((count + 7) >> 3)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.count
+        return (self.bits[index >> 3] >> (index & 7)) & 1
+
+    def __setitem__(self, index, value):
+        if index < 0:
+            index += self.count
+        if value:
+            self.bits[index >> 3] |= 1 << (index & 7)
+        else:
+            self.bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+
+    def assign(self, other):
+        """Copy another column's bits in place, resizing if needed"""
+        self.count = other.count
+        self.bits[:] = other.bits
+
+    def copy(self):
+        temp = BitColumn()
+        temp.assign(self)
+        return temp
+
+class VarsFrame:
+    """A published copy of every column, taken at a frame boundary by vars_publish()
+    Nothing writes to a frame after it is built, so any thread can read one without locking;
+    hold on to the same frame for a whole frame's worth of reads to get one consistent view"""
+    __slots__ = ("generation", "columns", "slots")
+
+    def __init__(self, generation, columns, slots):
+        self.generation = generation
+        self.columns = columns # (INTS, FLOATS, FLAGS) LIKE vars_columns
+        self.slots = slots # THE LAYOUT THE COLUMNS WERE COPIED WITH
+
+    def get(self, input_which):
+        temp = self.slots.get(input_which)
+        if temp is None:
+            return -1
+        return self.columns[temp[0]][temp[1]]
+
+    def getFlag(self, input_which):
+        temp = self.slots.get(input_which)
+        if temp is None:
+            return False
+        return self.columns[temp[0]][temp[1]] == 1
+
+vars_ints = array('i')
+vars_floats = array('f')
+vars_flags = BitColumn()
+vars_columns = (vars_ints, vars_floats, vars_flags) # INDEXED BY VAR_INT / VAR_FLOAT / VAR_FLAG
+VARS_INT_MIN = -2147483648
+VARS_INT_MAX = 2147483647
+
+def vars_clampInt (input_value):
+    # array('i') RAISES OverflowError PAST 32 BITS; GOLD AND SCORE SATURATE AT THE LIMIT INSTEAD
+    return min(max(int(input_value), VARS_INT_MIN), VARS_INT_MAX)
+
+vars_kindTypes = (vars_clampInt, float, bool)
+vars_defaultInts = array('i')
+vars_defaultFloats = array('f')
+vars_defaultFlags = BitColumn()
 vars_names = []
+vars_slots = {} # NAME -> (KIND, INDEX INTO THAT KIND'S COLUMN); REBUILT BY combine_groups()
+vars_groups = {} # GROUP NAME -> (KIND, START, STOP); REBUILT BY combine_groups()
+vars_layoutNames = b'' # EVERY NAME IN COLUMN ORDER, NEWLINE SEPARATED; WRITTEN INTO SAVES SO THEY SURVIVE LAYOUT CHANGES
+vars_layoutHash = 0 # CRC32 OF vars_layoutNames; A SAVE WITH THE SAME HASH LOADS WITH A STRAIGHT COPY
+
+# DOUBLE BUFFERING: THE COLUMNS ABOVE ARE THE LIVE (BACK) BUFFER; vars_frame IS THE FRONT BUFFER, REPLACED ONCE PER FRAME
+# WORKER THREADS WRITE THE LIVE COLUMNS ONLY WHILE HOLDING vars_writeLock; vars_publish() TAKES IT JUST LONG ENOUGH TO COPY THEM
+# THE LOCK IS REENTRANT: WATCHERS AND CUSTOM CHANGES RUN WHILE A WORKER HOLDS IT, AND MAY THEMSELVES PUBLISH, CAPTURE OR WRITE
+# THE vars_* SETTERS TAKE THE LOCK TOO, SO A WRITE FROM THE MAIN THREAD NEVER LANDS HALFWAY THROUGH A WORKER'S BATCH OR A PUBLISH
+# READERS ON ANY THREAD USE vars_getMe / vars_getFlag (ALSO CALLED vars_readMe / vars_readFlag) OR vars_getFrame(), WHICH READ THE
+# PUBLISHED FRAME AND NEVER LOCK; REBINDING vars_frame IS ATOMIC
+# CODE THAT MUST SEE A WRITE BEFORE THE NEXT PUBLISH (WATCHERS, CUSTOM CHANGES, SAVING THE LIVE COLUMNS) USES vars_getLive / vars_getLiveFlag
+vars_writeLock = threading.RLock()
+vars_frame = VarsFrame(0, (array('i'), array('f'), BitColumn()), {})
+
+# WRITE WATCHERS: callback(name) RUNS AFTER A WATCHED VARIABLE IS WRITTEN THROUGH ANY vars_* SETTER, ON THE WRITING THREAD
+# UNWATCHED VARIABLES ONLY PAY ONE DICT MEMBERSHIP TEST PER WRITE; BULK CHANGES (RESETS, LOADS) CALL THE BULK LISTENERS INSTEAD
+vars_watchers = {} # NAME -> LIST OF CALLBACKS
+vars_watchedHandles = {} # INT HANDLE -> NAME, FOR THE vars_*ByHandle SETTERS; REBUILT WITH THE LAYOUT
+vars_bulkListeners = [] # callback() AFTER MANY VARIABLES CHANGED AT ONCE
 
 vars_group_app = ["savegameloc"]
 vars_group_01 = ["01_first", "01_last"]
@@ -8,14 +107,125 @@ vars_group_currency = ["gold", "ore"]
 vars_group_flags = ["isGameRunning", "isDialogVisible"]
 vars_group_achievements = ["wowrich", "wowstrong", "wowtank"]
 
+# GROUPS DECLARED IN THIS FILE: (GROUP NAME, KIND, VARIABLE NAMES); THEY ALL START AT ZERO
+vars_groups_builtin = (
+    ("app", VAR_INT, vars_group_app),
+    ("01", VAR_INT, vars_group_01),
+    ("02", VAR_INT, vars_group_02),
+    ("currency", VAR_INT, vars_group_currency),
+    ("flags", VAR_FLAG, vars_group_flags),
+    ("achievements", VAR_FLAG, vars_group_achievements)
+)
+
+# GROUPS GENERATED FROM main_customize: (GROUP NAME, KIND, TABLE IN main_customize, ONLY IDS STARTING WITH)
+# THE STARTING VALUE COMES FROM "default=" OR "value=" AND A GROUP WITH THE SAME NAME AS A BUILT-IN ONE IS MERGED INTO IT
+vars_groups_customize = (
+    ("stats", VAR_INT, "thisGame_stats", ""),
+    ("currencies", VAR_INT, "thisGame_currencies", ""),
+    ("flags", VAR_FLAG, "thisGame_flags", ""),
+    ("skills", VAR_INT, "thisGame_skills", ""),
+    ("timers", VAR_FLOAT, "thisGame_timers", ""),
+    ("volumes", VAR_FLOAT, "thisgame_application", "volume")
+)
+
+def returnParsedDefault (input_kind, input_text):
+    try:
+        if input_kind == VAR_INT:
+            return int(float(input_text))
+        if input_kind == VAR_FLOAT:
+            return float(input_text)
+        return input_text in ("True", "true", "1")
+    except ValueError:
+        print("Starting value " + str(input_text) + " is not valid for its group; using 0.")
+        return vars_kindTypes[input_kind](0)
+
+def returnCustomizeDeclarations (input_tableName, input_idPrefix, input_kind):
+    """Return (name, default) pairs for the entries of a main_customize table"""
+    temp_declarations = []
+    for entry in getattr(main_customize, input_tableName, ()):
+        temp_fields = dict(part.split("=", 1) for part in entry.split("::") if "=" in part)
+        temp_name = temp_fields.get("id", "")
+        if temp_name == "" or not temp_name.startswith(input_idPrefix):
+            continue
+        temp_default = temp_fields.get("default", temp_fields.get("value", "0"))
+        temp_declarations.append((temp_name, returnParsedDefault(input_kind, temp_default)))
+    return temp_declarations
+
 def combine_groups ():
-    global vars_names
-    vars_names = vars_group_app + vars_group_01 + vars_group_02 + vars_group_currency + vars_group_flags + vars_group_achievements
+    global vars_names, vars_slots, vars_groups, vars_layoutNames, vars_layoutHash
+    # COLLECT GROUPS IN DECLARATION ORDER, MERGING GROUPS THAT SHARE A NAME
+    temp_groupOrder = []
+    temp_groupKinds = {}
+    temp_groupEntries = {}
+    temp_owners = {}
+    temp_declared = [(group, kind, [(name, 0) for name in names]) for group, kind, names in vars_groups_builtin]
+    temp_declared += [(group, kind, returnCustomizeDeclarations(table, prefix, kind)) for group, kind, table, prefix in vars_groups_customize]
+    for group, kind, declarations in temp_declared:
+        if group not in temp_groupKinds:
+            temp_groupOrder.append(group)
+            temp_groupKinds[group] = kind
+            temp_groupEntries[group] = {}
+        elif temp_groupKinds[group] != kind:
+            print("Group " + group + " is declared with two different types; keeping the first.")
+            continue
+        for name, default in declarations:
+            if temp_owners.get(name, group) != group:
+                print("Variable " + name + " is already declared in group " + temp_owners[name] + "; skipping duplicate.")
+                continue
+            temp_owners[name] = group
+            temp_groupEntries[group][name] = vars_kindTypes[kind](default)
+
+    # LAY EACH KIND'S GROUPS OUT BACK TO BACK IN THAT KIND'S COLUMN
+    temp_defaults = ([], [], [])
+    vars_names = []
+    vars_slots = {}
+    vars_groups = {}
+    for kind in (VAR_INT, VAR_FLOAT, VAR_FLAG):
+        for group in temp_groupOrder:
+            if temp_groupKinds[group] != kind:
+                continue
+            temp_start = len(temp_defaults[kind])
+            for name, default in temp_groupEntries[group].items():
+                vars_slots[name] = (kind, len(temp_defaults[kind]))
+                vars_names.append(name)
+                temp_defaults[kind].append(default)
+            vars_groups[group] = (kind, temp_start, len(temp_defaults[kind]))
+
+    vars_defaultInts[:] = array('i', temp_defaults[VAR_INT])
+    vars_defaultFloats[:] = array('f', temp_defaults[VAR_FLOAT])
+    temp_flags = BitColumn(len(temp_defaults[VAR_FLAG]))
+    for index, value in enumerate(temp_defaults[VAR_FLAG]):
+        temp_flags[index] = value
+    vars_defaultFlags.assign(temp_flags)
+
+    import zlib
+    vars_layoutNames = '\n'.join(vars_names).encode('utf-8')
+    vars_layoutHash = zlib.crc32(vars_layoutNames)
+    rebuild_watchedHandles()
 
 def setup_ints ():
-    global vars_ints
+    """Build the variable layout and set every column to its starting values"""
     combine_groups()
-    vars_ints = [0] * len(vars_names)
+    vars_resetAll()
+    vars_publish()
+
+def vars_resetAll ():
+    """Bulk reset every column to its starting values (a straight copy per column)"""
+    vars_ints[:] = vars_defaultInts
+    vars_floats[:] = vars_defaultFloats
+    vars_flags.assign(vars_defaultFlags)
+    vars_notifyBulk()
+
+def vars_resetGroup (input_group):
+    temp_kind, temp_start, temp_stop = vars_groups[input_group]
+    if temp_kind == VAR_INT:
+        vars_ints[temp_start:temp_stop] = vars_defaultInts[temp_start:temp_stop]
+    elif temp_kind == VAR_FLOAT:
+        vars_floats[temp_start:temp_stop] = vars_defaultFloats[temp_start:temp_stop]
+    else:
+        for index in range(temp_start, temp_stop):
+            vars_flags[index] = vars_defaultFlags[index]
+    vars_notifyBulk()
 
 def clear_appStart ():
     setup_ints()
@@ -23,72 +233,284 @@ def clear_appStart ():
     # THIS IS WHERE YOU CAN MANUALLY SET THE DEFAULT VALUES AT THE START OF THE PROGRAM
 
 def clear_newGame ():
-    setup_ints()
+    if len(vars_names) == 0:
+        combine_groups()
+    vars_resetAll()
     vars_setMe("savegameloc", returnNextSaveFileID())
     # THIS IS WHERE YOU CAN MANUALLY SET THE DEFAULT VALUES AT THE START OF A NEW GAME
+    vars_publish() # READERS SEE THE RESET NOW, NOT AFTER THE NEXT FRAME'S PUBLISH
 
 def returnVarNameIndex (input_variableName):
-    if input_variableName not in vars_names:
+    """Index of a variable within its own column, or -1"""
+    temp = vars_slots.get(input_variableName)
+    if temp is None:
         return -1
-    return vars_names.index(input_variableName)
+    return temp[1]
 
-def returnNextSaveFileID ():
-    import os
-    if not os.path.exists('saves'):
-        os.makedirs('saves')
-    files = os.listdir('saves')
-    if len(files) == 0:
-        return 0
-    return max(int(x.split('.')[0]) for x in files)
+def returnVarKind (input_variableName):
+    """VAR_INT, VAR_FLOAT or VAR_FLAG, or -1 if there is no such variable"""
+    temp = vars_slots.get(input_variableName)
+    if temp is None:
+        return -1
+    return temp[0]
 
-def vars_addMe (input_which, input_additive):
-    temp = returnVarNameIndex(input_which)
-    if temp == -1:
+def returnGroupRange (input_group):
+    """(kind, start, stop) of a group; hot code can loop over that slice of the column directly"""
+    return vars_groups[input_group]
+
+def vars_getGroupValues (input_group):
+    """Copy of a group's values; ints and floats come back as a typed array"""
+    temp_kind, temp_start, temp_stop = vars_groups[input_group]
+    if temp_kind == VAR_FLAG:
+        return [vars_flags[index] for index in range(temp_start, temp_stop)]
+    return vars_columns[temp_kind][temp_start:temp_stop]
+
+# HANDLES: LOOK A VARIABLE UP ONCE (E.G. WHEN A SYSTEM IS CREATED) AND KEEP THE INTEGER
+# A HANDLE IS A DIRECT INDEX INTO vars_ints, SO ONLY INT VARIABLES HAVE ONE; IT STAYS VALID UNTIL THE VARIABLE GROUPS THEMSELVES CHANGE
+def returnVarHandle (input_variableName):
+    temp = vars_slots.get(input_variableName)
+    if temp is None:
+        print("No variable named " + str(input_variableName) + " exists; no handle returned.")
+        return -1
+    if temp[0] != VAR_INT:
+        # A FLOAT OR FLAG INDEX WOULD SILENTLY READ AND WRITE AN UNRELATED INT
+        raise TypeError("Variable " + str(input_variableName) + " is not an int variable; only int variables have handles.")
+    return temp[1]
+
+def vars_getByHandle (input_handle):
+    return vars_ints[input_handle]
+
+def vars_setByHandle (input_handle, input_newValue):
+    with vars_writeLock:
+        vars_ints[input_handle] = vars_clampInt(input_newValue)
+    if input_handle in vars_watchedHandles:
+        vars_notifyWatchers(vars_watchedHandles[input_handle])
+
+def vars_addByHandle (input_handle, input_additive):
+    with vars_writeLock:
+        vars_ints[input_handle] = vars_clampInt(vars_ints[input_handle] + input_additive)
+    if input_handle in vars_watchedHandles:
+        vars_notifyWatchers(vars_watchedHandles[input_handle])
+
+def vars_watch (input_which, input_callback):
+    vars_watchers.setdefault(input_which, []).append(input_callback)
+    rebuild_watchedHandles()
+
+def vars_unwatch (input_which, input_callback):
+    temp = vars_watchers.get(input_which)
+    if temp is None or input_callback not in temp:
         return
-    vars_ints[temp] += input_additive
+    temp.remove(input_callback)
+    if not temp:
+        del vars_watchers[input_which]
+    rebuild_watchedHandles()
+
+def rebuild_watchedHandles ():
+    vars_watchedHandles.clear()
+    for name in vars_watchers:
+        temp = vars_slots.get(name)
+        if temp is not None and temp[0] == VAR_INT:
+            vars_watchedHandles[temp[1]] = name
+
+def vars_notifyWatchers (input_which):
+    for callback in tuple(vars_watchers.get(input_which, ())): # A CALLBACK MAY UNWATCH ITSELF
+        callback(input_which)
+
+def vars_addBulkListener (input_callback):
+    vars_bulkListeners.append(input_callback)
+
+def vars_notifyBulk ():
+    for callback in tuple(vars_bulkListeners):
+        callback()
+
+def vars_publish ():
+    """Copy the live columns into a new frame and make it the one readers see; call once per frame from the main thread"""
+    global vars_frame
+    with vars_writeLock:
+        temp_columns = (vars_ints[:], vars_floats[:], vars_flags.copy())
+    temp_frame = VarsFrame(vars_frame.generation + 1, temp_columns, vars_slots)
+    vars_frame = temp_frame
+    return temp_frame
+
+def vars_getFrame ():
+    return vars_frame
 
 def vars_getMe (input_which):
-    temp = returnVarNameIndex(input_which)
-    if temp == -1:
-        return -1
-    return vars_ints[temp]
+    # LOCK-FREE READ OF THE LAST PUBLISHED FRAME; WRITES MADE SINCE THEN SHOW UP AFTER THE NEXT vars_publish()
+    return vars_frame.get(input_which)
 
 def vars_getFlag (input_which):
-    tempIndex = returnVarNameIndex(input_which)
-    if vars_ints[tempIndex] == 1:
+    return vars_frame.getFlag(input_which)
+
+vars_readMe = vars_getMe
+vars_readFlag = vars_getFlag
+
+def vars_getLive (input_which):
+    """The live value, including writes not yet published; for the thread doing the writing (watchers, CUSTOM changes, saves)"""
+    temp = vars_slots.get(input_which)
+    if temp is None:
+        return -1
+    return vars_columns[temp[0]][temp[1]]
+
+def vars_getLiveFlag (input_which):
+    temp = vars_slots.get(input_which)
+    if temp is None:
+        return False
+    if vars_columns[temp[0]][temp[1]] == 1:
         return True
     return False
 
+def returnNextSaveFileID ():
+    # READ FROM THE SAVE MANIFEST; THE saves/ DIRECTORY IS NOT SCANNED
+    import handler_vars_manifest
+    return handler_vars_manifest.get_save_manifest().next_slot_id()
+
+def vars_addMe (input_which, input_additive):
+    temp = vars_slots.get(input_which)
+    if temp is None:
+        return
+    temp_column = vars_columns[temp[0]]
+    with vars_writeLock:
+        temp_column[temp[1]] = vars_kindTypes[temp[0]](temp_column[temp[1]] + input_additive)
+    if input_which in vars_watchers:
+        vars_notifyWatchers(input_which)
+
 def vars_setMe (input_which, input_newValue):
-    temp = returnVarNameIndex(input_which)
-    if temp == -1:
+    temp = vars_slots.get(input_which)
+    if temp is None:
         return
-    vars_ints[temp] = input_newValue
+    with vars_writeLock:
+        vars_columns[temp[0]][temp[1]] = vars_kindTypes[temp[0]](input_newValue)
+    if input_which in vars_watchers:
+        vars_notifyWatchers(input_which)
 
 def vars_setFlag (input_which, input_bool: bool):
-    tempIndex = returnVarNameIndex(input_which)
+    temp = vars_slots.get(input_which)
+    if temp is None:
+        return
     match input_bool:
         case True:
-            vars_ints[tempIndex] = 1
+            with vars_writeLock:
+                vars_columns[temp[0]][temp[1]] = vars_kindTypes[temp[0]](1)
         case False:
-            vars_ints[tempIndex] = 0
+            with vars_writeLock:
+                vars_columns[temp[0]][temp[1]] = vars_kindTypes[temp[0]](0)
         case _:
             print("Attempt to set flag with " + str(input_bool) + " failed. Possible string instead of bool.")
+            return
+    if input_which in vars_watchers:
+        vars_notifyWatchers(input_which)
 
-def saveAllVars():
-    import os
-    if not os.path.exists('saves'):
-        os.makedirs('saves')
-    save_string = '|*|'.join(str(x) for x in vars_ints)
-    with open('saves/save.sav', 'w') as f:
-        f.write(save_string)
-
-def loadAllVars():
-    global vars_ints
+def saveAllVars(input_path = 'saves/save.sav', input_compress = False):
+    # BINARY, ATOMIC AND CHECKSUMMED; SEE handler_vars_save FOR THE FORMAT
+    import handler_vars_save
+    return handler_vars_save.save_vars(input_path, input_compress)
+
+def saveAllVarsInBackground(input_path = 'saves/save.sav', input_callback = None):
+    # ONLY THE SNAPSHOT HAPPENS HERE; THE FILE IS COMPRESSED AND WRITTEN ON THE SAVE WRITER THREAD
+    # input_callback(success, path, size) RUNS FROM handler_vars_save.dispatch_completed() ON THE MAIN THREAD
+    import handler_vars_save
+    handler_vars_save.get_save_writer().submit_vars(input_path, True, input_callback)
+
+def saveToSlot(input_slot = None, input_levelID = "", input_callback = None):
+    # SAVES TO saves/<slot>.sav IN THE BACKGROUND; THE MANIFEST ENTRY IS UPDATED ONLY AFTER THE SLOT FILE IS ON DISK
+    # THE SLOT DEFAULTS TO savegameloc, WHICH clear_appStart AND clear_newGame POINT AT THE NEXT FREE SLOT
+    import handler_vars_manifest
+    import handler_vars_save
+    temp_manifest = handler_vars_manifest.get_save_manifest()
+    temp_slot = vars_getLive("savegameloc") if input_slot is None else input_slot
+    temp_playtime = max(0.0, float(vars_getLive("time_played")))
+    handler_vars_save.get_save_writer().submit_vars(
+        temp_manifest.slot_path(temp_slot), True, input_callback,
+        lambda size: temp_manifest.record_slot(temp_slot, size, input_levelID, temp_playtime)
+    )
+
+def loadFromSlot(input_slot):
+    import handler_vars_manifest
+    temp_manifest = handler_vars_manifest.get_save_manifest()
+    if temp_manifest.get_slot(input_slot) is None:
+        return False
+    return loadAllVars(temp_manifest.slot_path(input_slot))
+
+def loadAllVars(input_path = 'saves/save.sav'):
     import os
-    if os.path.exists('saves/save.sav'):
-        with open('saves/save.sav', 'r') as f:
-            save_string = f.read()
-            if save_string:
-                vars_ints = [int(x) for x in save_string.split('|*|')]
+    import handler_vars_save
+    handler_vars_save.flush_pending(input_path) # DON'T READ A SAVE THAT IS STILL BEING WRITTEN
+    if not os.path.exists(input_path):
+        return False
+    if handler_vars_save.is_binary_save(input_path):
+        temp_loaded = handler_vars_save.load_vars(input_path)
+        if temp_loaded:
+            vars_notifyBulk()
+            vars_publish()
+        return temp_loaded
+    # OLDER TEXT SAVES: ONE LINE PER COLUMN (INTS, FLOATS, FLAGS), OR A SINGLE LINE OF INTS IN THE ORIGINAL BUILT-IN ORDER
+    with open(input_path, 'r') as f:
+        temp_lines = [[x for x in line.split('|*|') if x != ''] for line in f.read().split('\n')]
+    try:
+        if len(temp_lines) == 1:
+            # THE ORIGINAL LAYOUT WAS EVERY BUILT-IN NAME IN DECLARATION ORDER WITH FLAGS STORED AS INTS; MATCH BY NAME
+            temp_names = [name for group, kind, names in vars_groups_builtin for name in names]
+            for name, value in zip(temp_names, temp_lines[0]):
+                temp = vars_slots.get(name)
+                if temp is not None:
+                    vars_columns[temp[0]][temp[1]] = vars_kindTypes[temp[0]](int(value))
+        else:
+            # THE COLUMNS NEVER RESIZE, SO EXTRA VALUES FROM A LONGER LAYOUT ARE IGNORED
+            temp_ints, temp_floats, temp_flags = (temp_lines + [[], []])[:3]
+            temp_count = min(len(temp_ints), len(vars_ints))
+            vars_ints[:temp_count] = array('i', (int(x) for x in temp_ints[:temp_count]))
+            temp_count = min(len(temp_floats), len(vars_floats))
+            vars_floats[:temp_count] = array('f', (float(x) for x in temp_floats[:temp_count]))
+            for index in range(min(len(temp_flags), len(vars_flags))):
+                vars_flags[index] = int(temp_flags[index])
+    except ValueError:
+        print("Save " + input_path + " has a value that is not a number; stopped loading it.")
+        return False
+    vars_notifyBulk()
+    vars_publish()
+    return True
+
+def benchmark_lookup (input_varCount = 10000, input_lookups = 20000):
+    """Compare the old linear name scan with the dict lookup and with pre-resolved handles"""
+    import random
+    import time
+    global vars_names, vars_slots, vars_watchers
+    temp_saved = (vars_names, vars_slots, array('i', vars_ints), vars_watchers)
+    # THE BENCHMARK'S WRITES MUST NOT REACH THE GAME'S WATCHERS (ACHIEVEMENTS AND SO ON), SO IT RUNS WITH NONE
+    vars_watchers = {}
+    vars_names = ["bench_" + str(x) for x in range(input_varCount)]
+    vars_slots = {name: (VAR_INT, index) for index, name in enumerate(vars_names)}
+    vars_ints[:] = array('i', bytes(4 * input_varCount))
+    rebuild_watchedHandles()
+    temp_names = [random.choice(vars_names) for x in range(input_lookups)]
+    temp_handles = [vars_slots[name][1] for name in temp_names]
+
+    def linearLookup (input_variableName):
+        if input_variableName not in vars_names:
+            return -1
+        return vars_names.index(input_variableName)
+
+    temp_results = {}
+    temp_start = time.perf_counter()
+    for name in temp_names:
+        vars_ints[linearLookup(name)] += 1
+    temp_results["linear scan"] = time.perf_counter() - temp_start
+    temp_start = time.perf_counter()
+    for name in temp_names:
+        vars_addMe(name, 1)
+    temp_results["dict lookup"] = time.perf_counter() - temp_start
+    temp_start = time.perf_counter()
+    for handle in temp_handles:
+        vars_addByHandle(handle, 1)
+    temp_results["handle"] = time.perf_counter() - temp_start
+
+    vars_names, vars_slots, vars_watchers = temp_saved[0], temp_saved[1], temp_saved[3]
+    vars_ints[:] = temp_saved[2]
+    rebuild_watchedHandles()
+    for label, seconds in temp_results.items():
+        print(f"{label:>12}: {seconds * 1e9 / input_lookups:10.1f} ns per access ({input_varCount} variables)")
+    return temp_results
 
+if __name__ == "__main__":
+    benchmark_lookup()
@@ -0,0 +1,127 @@
+import handler_vars_save
+
+# SAVE SLOT MANIFEST
+# saves/manifest.json LISTS EVERY SLOT WITH ITS METADATA, SO A LOAD/SAVE MENU NEVER HAS TO SCAN OR OPEN THE SAVE FILES
+# THE MANIFEST IS REWRITTEN ATOMICALLY AFTER EACH SLOT FILE IS SAFELY ON DISK; IF IT IS MISSING OR CORRUPT IT IS REBUILT ONCE
+
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+import json
+import os
+import re
+import threading
+
+MANIFEST_VERSION = 1
+SLOT_FILE_PATTERN = re.compile(r'^(\d+)\.sav$')
+
+@dataclass
+class SlotInfo:
+    slot: int
+    file: str
+    timestamp: str
+    level_id: str = ""
+    playtime: float = 0.0  # Seconds
+    size: int = 0          # Bytes on disk
+
+class SaveManifest:
+    def __init__(self, save_dir: str = "saves"):
+        self.save_dir = save_dir
+        self.path = os.path.join(save_dir, "manifest.json")
+        self.lock = threading.Lock()  # Slots are recorded from the save writer thread
+        self.slots: Dict[int, SlotInfo] = {}
+        os.makedirs(save_dir, exist_ok=True)
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                raise ValueError(f"unsupported manifest version {data.get('version')}")
+            self.slots = {entry["slot"]: SlotInfo(**entry) for entry in data["slots"]}
+        except FileNotFoundError:
+            self._rebuild()
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Save manifest {self.path} is unreadable ({e}); rebuilding it")
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        """One-off directory scan for slot files; only file names and stat info are read"""
+        self.slots = {}
+        for name in os.listdir(self.save_dir):
+            match = SLOT_FILE_PATTERN.match(name)
+            if match:
+                stat = os.stat(os.path.join(self.save_dir, name))
+                slot = int(match.group(1))
+                self.slots[slot] = SlotInfo(
+                    slot=slot,
+                    file=name,
+                    timestamp=datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                    size=stat.st_size
+                )
+        with self.lock:
+            self._write()
+
+    def _write(self) -> None:
+        """Atomically replace the manifest file; call with self.lock held"""
+        data = {
+            "version": MANIFEST_VERSION,
+            "slots": [asdict(info) for info in sorted(self.slots.values(), key=lambda info: info.slot)]
+        }
+        handler_vars_save.write_atomic(self.path, [json.dumps(data).encode('utf-8')])
+
+    def slot_path(self, slot: int) -> str:
+        return os.path.join(self.save_dir, f"{slot}.sav")
+
+    def record_slot(self, slot: int, size: int, level_id: str = "", playtime: float = 0.0) -> SlotInfo:
+        """Record that a slot file was written; called once the file itself is safely on disk"""
+        info = SlotInfo(
+            slot=slot,
+            file=os.path.basename(self.slot_path(slot)),
+            timestamp=datetime.now().isoformat(),
+            level_id=level_id,
+            playtime=playtime,
+            size=size
+        )
+        with self.lock:
+            self.slots[slot] = info
+            self._write()
+        return info
+
+    def remove_slot(self, slot: int) -> bool:
+        with self.lock:
+            info = self.slots.pop(slot, None)
+            if info is None:
+                return False
+            self._write()
+        try:
+            os.remove(os.path.join(self.save_dir, info.file))
+        except FileNotFoundError:
+            pass
+        return True
+
+    def get_slot(self, slot: int) -> Optional[SlotInfo]:
+        with self.lock:
+            return self.slots.get(slot)
+
+    def list_slots(self) -> List[SlotInfo]:
+        """All slots ordered by slot id, straight from memory"""
+        with self.lock:
+            return [self.slots[slot] for slot in sorted(self.slots)]
+
+    def next_slot_id(self) -> int:
+        with self.lock:
+            if not self.slots:
+                return 0
+            return max(self.slots) + 1
+
+# Global save manifest instance
+save_manifest = None
+
+def get_save_manifest() -> SaveManifest:
+    """Get the global save manifest, loading it on first use"""
+    global save_manifest
+    if save_manifest is None:
+        save_manifest = SaveManifest()
+    return save_manifest
@@ -0,0 +1,354 @@
+import handler_vars
+
+# BINARY SAVE FORMAT FOR handler_vars
+# A SAVE IS A FIXED HEADER FOLLOWED BY A BODY: THE VARIABLE NAME TABLE, THEN THE RAW int32, float32 AND FLAG-BIT COLUMNS
+# LOADING A SAVE WITH THE SAME LAYOUT IS A STRAIGHT MEMORY COPY INTO THE COLUMNS; A SAVE FROM AN OLDER LAYOUT IS MATCHED BY NAME
+
+from array import array
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import zlib
+
+SAVE_MAGIC = b'EXSV'
+SAVE_VERSION = 1
+SAVE_FLAG_ZLIB = 1        # Body is zlib compressed
+SAVE_FLAG_BIG_ENDIAN = 2  # Columns were written on a big-endian machine
+
+# magic, version, flags, layout hash, int count, float count, flag count, name table size, body size, body crc32
+SAVE_HEADER = struct.Struct('<4sHHIIIIIII')
+
+def encode_save(ints: array, floats: array, flags: handler_vars.BitColumn,
+                layout_names: bytes, compress: bool = False) -> List:
+    """
+    Build the chunks of a save file without joining them
+    :param ints: int32 column to save
+    :param floats: float32 column to save
+    :param flags: flag column to save
+    :param layout_names: newline separated variable names, in column order
+    :param compress: zlib compress the body
+    :return: List of bytes-like chunks, header first
+    """
+    body = [layout_names, ints, floats, flags.bits]
+    save_flags = SAVE_FLAG_BIG_ENDIAN if sys.byteorder == 'big' else 0
+    if compress:
+        compressor = zlib.compressobj()
+        body = [b''.join(compressor.compress(chunk) for chunk in body) + compressor.flush()]
+        save_flags |= SAVE_FLAG_ZLIB
+    body_size = 0
+    body_crc = 0
+    for chunk in body:
+        body_size += memoryview(chunk).nbytes
+        body_crc = zlib.crc32(chunk, body_crc)
+    header = SAVE_HEADER.pack(
+        SAVE_MAGIC, SAVE_VERSION, save_flags, zlib.crc32(layout_names),
+        len(ints), len(floats), len(flags), len(layout_names), body_size, body_crc
+    )
+    return [header] + body
+
+def write_atomic(path: str, chunks: List) -> int:
+    """
+    Write chunks to a temp file, fsync it, then rename it over path, so a crash
+    never leaves a half-written save behind
+    :return: Number of bytes written
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    # A UNIQUE TEMP FILE PER WRITE, SO A FOREGROUND AND A BACKGROUND SAVE TO THE SAME PATH NEVER SHARE ONE
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    size = 0
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                size += f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    if hasattr(os, 'O_DIRECTORY'):
+        # Make the rename itself durable
+        dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    return size
+
+def save_vars(path: str, compress: bool = False) -> int:
+    """Save the live handler_vars columns to path; returns the file size"""
+    with handler_vars.vars_writeLock: # NO WORKER WRITE LANDS WHILE THE COLUMNS ARE BEING ENCODED
+        data = encode_save(
+            handler_vars.vars_ints, handler_vars.vars_floats, handler_vars.vars_flags,
+            handler_vars.vars_layoutNames, compress
+        )
+    return write_atomic(path, data)
+
+def is_binary_save(path: str) -> bool:
+    with open(path, 'rb') as f:
+        return f.read(len(SAVE_MAGIC)) == SAVE_MAGIC
+
+def load_vars(path: str) -> bool:
+    """
+    Load a binary save into the live handler_vars columns
+    :return: True if the save was valid and loaded
+    """
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < SAVE_HEADER.size:
+                print(f"Save {path} is truncated")
+                return False
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    return _load_from_view(path, view)
+                finally:
+                    view.release()
+    except (ValueError, IndexError, struct.error, zlib.error) as e:
+        print(f"Save {path} is malformed: {e}")
+        return False
+
+def _load_from_view(path: str, view: memoryview) -> bool:
+    # EVERY VIEW TAKEN OF THE MAPPING MUST BE RELEASED BEFORE THE MAPPING CLOSES, EVEN ON AN ERROR
+    body = None
+    try:
+        (magic, version, save_flags, layout_hash, int_count, float_count, flag_count,
+         names_size, body_size, body_crc) = SAVE_HEADER.unpack_from(view)
+        if magic != SAVE_MAGIC or version > SAVE_VERSION:
+            print(f"Save {path} is not a supported save file")
+            return False
+        body = view[SAVE_HEADER.size:SAVE_HEADER.size + body_size]
+        if len(body) != body_size or zlib.crc32(body) != body_crc:
+            print(f"Save {path} failed its checksum")
+            return False
+        if save_flags & SAVE_FLAG_ZLIB:
+            compressed = body
+            body = memoryview(zlib.decompress(compressed))
+            compressed.release()
+
+        int_end = names_size + int_count * 4
+        float_end = int_end + float_count * 4
+        flag_end = float_end + (flag_count + 7) // 8
+        if len(body) < flag_end:
+            print(f"Save {path} is shorter than its header says")
+            return False
+        swap = bool(save_flags & SAVE_FLAG_BIG_ENDIAN) != (sys.byteorder == 'big')
+
+        if (not swap and layout_hash == handler_vars.vars_layoutHash
+                and int_count == len(handler_vars.vars_ints)
+                and float_count == len(handler_vars.vars_floats)
+                and flag_count == len(handler_vars.vars_flags)):
+            # Same layout: copy each column straight out of the mapped file
+            memoryview(handler_vars.vars_ints).cast('B')[:] = body[names_size:int_end]
+            memoryview(handler_vars.vars_floats).cast('B')[:] = body[int_end:float_end]
+            handler_vars.vars_flags.bits[:] = body[float_end:flag_end]
+            return True
+
+        # Layout changed since this save was written: match variables by name
+        saved_names = bytes(body[:names_size]).decode('utf-8').split('\n') if names_size else []
+        saved_counts = (int_count, float_count, flag_count)
+        if len(saved_names) != sum(saved_counts):
+            print(f"Save {path} has {len(saved_names)} names for {sum(saved_counts)} values")
+            return False
+        saved_ints = array('i')
+        saved_ints.frombytes(body[names_size:int_end])
+        saved_floats = array('f')
+        saved_floats.frombytes(body[int_end:float_end])
+        if swap:
+            saved_ints.byteswap()
+            saved_floats.byteswap()
+        saved_flags = handler_vars.BitColumn(flag_count)
+        saved_flags.bits[:] = body[float_end:flag_end]
+    finally:
+        if body is not None:
+            body.release()
+
+    saved_columns = (saved_ints, saved_floats, saved_flags)
+    position = 0
+    for kind in (handler_vars.VAR_INT, handler_vars.VAR_FLOAT, handler_vars.VAR_FLAG):
+        for index in range(saved_counts[kind]):
+            slot = handler_vars.vars_slots.get(saved_names[position + index])
+            if slot is not None:
+                handler_vars.vars_columns[slot[0]][slot[1]] = handler_vars.vars_kindTypes[slot[0]](saved_columns[kind][index])
+        position += saved_counts[kind]
+    return True
+
+# BACKGROUND SAVING
+# THE MAIN THREAD ONLY TAKES A SNAPSHOT (A FEW MEMORY COPIES); ENCODING, COMPRESSION, WRITING AND FSYNC HAPPEN ON THE WRITER THREAD
+
+@dataclass
+class VarsSnapshot:
+    """Copy of the handler_vars columns at one moment, safe to hand to another thread"""
+    ints: array
+    floats: array
+    flags: handler_vars.BitColumn
+    layout_names: bytes
+
+def take_snapshot() -> VarsSnapshot:
+    flags = handler_vars.BitColumn()
+    with handler_vars.vars_writeLock: # ONE CONSISTENT MOMENT, EVEN WITH A WORKER WRITING
+        flags.assign(handler_vars.vars_flags)
+        return VarsSnapshot(
+            ints=array('i', handler_vars.vars_ints),
+            floats=array('f', handler_vars.vars_floats),
+            flags=flags,
+            layout_names=handler_vars.vars_layoutNames
+        )
+
+@dataclass
+class SaveJob:
+    path: str
+    encode: Callable[[], List]     # Runs on the writer thread and returns the chunks to write
+    callbacks: List[Callable] = field(default_factory=list)
+    after_write: Optional[Callable[[int], None]] = None  # Runs on the writer thread once the file is on disk
+
+class SaveWriter:
+    def __init__(self):
+        self.pending: Dict[str, SaveJob] = {}  # path -> job not yet started, in submission order
+        self.active_path: Optional[str] = None
+        self.completed = deque()               # (callbacks, success, path, size) waiting for the main thread
+        self.condition = threading.Condition()
+        self.is_running = True
+        self.writer_thread = threading.Thread(target=self._process_jobs, daemon=True)
+        self.writer_thread.start()
+
+    def submit(self, path: str, encode: Callable[[], List],
+               callback: Optional[Callable[[bool, str, int], None]] = None,
+               after_write: Optional[Callable[[int], None]] = None) -> None:
+        """
+        Queue a write. If a write to the same path is still waiting, it is replaced
+        by this one (only the newest data is written) and both callbacks fire
+        :param path: Destination file
+        :param encode: Called on the writer thread; returns the chunks to write
+        :param callback: Optional callback(success, path, size), run by dispatch_completed
+        :param after_write: Optional after_write(size), run on the writer thread after a successful write
+        """
+        with self.condition:
+            job = self.pending.get(path)
+            if job is None:
+                job = self.pending[path] = SaveJob(path, encode, after_write=after_write)
+            else:
+                job.encode = encode
+                job.after_write = after_write
+            if callback:
+                job.callbacks.append(callback)
+            self.condition.notify()
+
+    def submit_vars(self, path: str, compress: bool = True,
+                    callback: Optional[Callable[[bool, str, int], None]] = None,
+                    after_write: Optional[Callable[[int], None]] = None) -> None:
+        """Snapshot handler_vars now and write it in the background"""
+        snapshot = take_snapshot()
+        self.submit(path, lambda: encode_save(
+            snapshot.ints, snapshot.floats, snapshot.flags, snapshot.layout_names, compress
+        ), callback, after_write)
+
+    def _process_jobs(self) -> None:
+        while True:
+            with self.condition:
+                while self.is_running and not self.pending:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                path = next(iter(self.pending))
+                job = self.pending.pop(path)
+                self.active_path = path
+            success = True
+            size = 0
+            try:
+                size = write_atomic(path, job.encode())
+                if job.after_write:
+                    job.after_write(size)
+            except Exception as e:
+                print(f"Error writing save {path}: {e}")
+                success = False
+            with self.condition:
+                self.active_path = None
+                self.completed.append((job.callbacks, success, path, size))
+                self.condition.notify_all()
+
+    def is_busy(self, path: Optional[str] = None) -> bool:
+        """True while a write (to path, if given) is waiting or in progress"""
+        with self.condition:
+            if path is None:
+                return bool(self.pending) or self.active_path is not None
+            return path in self.pending or self.active_path == path
+
+    def flush(self, path: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """Block until queued writes (to path, if given) are on disk"""
+        with self.condition:
+            return self.condition.wait_for(
+                lambda: not (path in self.pending or self.active_path == path) if path
+                else not (self.pending or self.active_path), timeout)
+
+    def dispatch_completed(self) -> None:
+        """Run completion callbacks; call this from the main thread, e.g. once per frame"""
+        while self.completed:
+            callbacks, success, path, size = self.completed.popleft()
+            for callback in callbacks:
+                try:
+                    callback(success, path, size)
+                except Exception as e:
+                    print(f"Error in save callback for {path}: {e}")
+
+    def stop(self) -> None:
+        """Finish queued writes, then stop the writer thread"""
+        with self.condition:
+            self.is_running = False
+            self.condition.notify_all()
+        self.writer_thread.join()
+        self.dispatch_completed()
+
+# Global save writer instance
+save_writer = None
+
+def get_save_writer() -> SaveWriter:
+    """Get the global background save writer"""
+    global save_writer
+    if save_writer is None:
+        save_writer = SaveWriter()
+    return save_writer
+
+def flush_pending(path: Optional[str] = None) -> None:
+    """Wait for queued writes (to path, if given) before reading it back; does nothing, and starts no writer, if nothing was ever queued"""
+    if save_writer is not None:
+        save_writer.flush(path)
+
+def dispatch_completed() -> None:
+    """Per-frame hook; does nothing until something has been saved in the background"""
+    if save_writer is not None:
+        save_writer.dispatch_completed()
+
+def benchmark_save(counts=(1000, 10000, 100000, 300000), path: Optional[str] = None) -> None:
+    """Time save and load of int columns of growing size"""
+    import time
+    path = path or os.path.join(tempfile.gettempdir(), 'exeblank_bench.sav')
+    for count in counts:
+        ints = array('i', range(count))
+        floats = array('f', bytes(4 * (count // 10)))
+        flags = handler_vars.BitColumn(count // 10)
+        names = '\n'.join(f"v{x}" for x in range(len(ints) + len(floats) + len(flags))).encode()
+        start = time.perf_counter()
+        write_atomic(path, encode_save(ints, floats, flags, names))
+        save_time = time.perf_counter() - start
+        start = time.perf_counter()
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as view:
+                header = SAVE_HEADER.unpack_from(view)
+                with view[SAVE_HEADER.size:SAVE_HEADER.size + header[8]] as body:
+                    zlib.crc32(body)
+                    memoryview(ints).cast('B')[:] = body[header[7]:header[7] + count * 4]
+        load_time = time.perf_counter() - start
+        print(f"{count:>8} ints: save {save_time * 1000:7.2f} ms, load {load_time * 1000:7.2f} ms")
+    os.remove(path)
+
+if __name__ == "__main__":
+    benchmark_save()
@@ -3,6 +3,7 @@ import handler_vars
 # NOTE: THE FOLLOWING IS SPECIFIC TO VERY LARGE GAMES AND CAN BE DELETED BY USERS OF SMALLER TITLES
 # MULTIPLE REQUEST THREADING
 
+from collections import deque
 from dataclasses import dataclass
 from enum import Enum, auto
 from typing import Any, Callable, List, Optional
@@ -39,11 +40,26 @@ class VarChangeRequest:
         return self.timestamp < other.timestamp
 
 class ThreadedVarHandler:
-    def __init__(self):
+    def __init__(self, batch_mode: bool = False):
+        """
+        :param batch_mode: Drain every pending request at once, merge ADDs to the same
+            variable, apply the whole batch under one lock and hold callbacks for
+            dispatch_callbacks() on the main thread instead of running them on the worker
+        """
         self.request_queue = queue.PriorityQueue()
-        self.processing_lock = threading.Lock()
+        # Shared with handler_vars.vars_publish() so a frame is never copied halfway through a change
+        self.processing_lock = handler_vars.vars_writeLock
         self.is_running = True
-        self.processor_thread = threading.Thread(target=self._process_requests, daemon=True)
+        self.batch_mode = batch_mode
+        
+        # Batch mode inbox: producers append under one short lock, the worker swaps the whole list out
+        self.inbox: List[VarChangeRequest] = []
+        self.inbox_condition = threading.Condition()
+        self.batch_active = False
+        self.pending_callbacks = deque()
+        
+        target = self._process_batches if batch_mode else self._process_requests
+        self.processor_thread = threading.Thread(target=target, daemon=True)
         self.processor_thread.start()
     
     def request_change(self, var_name: str, value: Any, 
@@ -66,7 +82,13 @@ class ThreadedVarHandler:
             callback=callback,
             timestamp=time.time()
         )
-        self.request_queue.put(request)
+        if self.batch_mode:
+            with self.inbox_condition:
+                self.inbox.append(request)
+                if len(self.inbox) == 1:
+                    self.inbox_condition.notify()
+        else:
+            self.request_queue.put(request)
     
     def _process_requests(self) -> None:
         """Process variable change requests in priority order"""
@@ -94,6 +116,68 @@ class ThreadedVarHandler:
             except Exception as e:
                 print(f"Error processing variable change request: {e}")
     
+    def _process_batches(self) -> None:
+        """Batch mode: take everything that is waiting, merge it, and apply it under a single lock"""
+        while True:
+            with self.inbox_condition:
+                while self.is_running and not self.inbox:
+                    self.inbox_condition.wait(0.1)
+                if not self.inbox:
+                    return
+                batch = self.inbox
+                self.inbox = []
+                self.batch_active = True
+            
+            try:
+                merged = self._coalesce(batch)
+                with self.processing_lock:
+                    for request in merged:
+                        self._apply_change(request)
+                self.pending_callbacks.extend(request.callback for request in batch if request.callback)
+            except Exception as e:
+                print(f"Error processing variable change batch: {e}")
+            
+            with self.inbox_condition:
+                self.batch_active = False
+                self.inbox_condition.notify_all()
+    
+    def _coalesce(self, batch: List[VarChangeRequest]) -> List[VarChangeRequest]:
+        """Order a batch by priority and fold runs of ADDs to the same variable into one ADD.
+        An ADD only merges with an earlier one if no SET/FLAG/CUSTOM touched that variable in between."""
+        batch.sort(key=lambda request: (request.priority.value, request.timestamp))
+        merged: List[VarChangeRequest] = []
+        open_adds = {}  # var_name -> index in merged of the ADD that later ADDs fold into
+        for request in batch:
+            if request.change_type == VarChangeType.ADD:
+                index = open_adds.get(request.var_name)
+                if index is not None:
+                    total = merged[index]
+                    merged[index] = VarChangeRequest(total.var_name, VarChangeType.ADD, total.value + request.value,
+                                                     total.priority, None, total.timestamp)
+                    continue
+                open_adds[request.var_name] = len(merged)
+            else:
+                open_adds.pop(request.var_name, None)
+            merged.append(request)
+        return merged
+    
+    def dispatch_callbacks(self) -> None:
+        """Batch mode: run callbacks for applied changes; call from the main thread at frame end"""
+        while self.pending_callbacks:
+            callback = self.pending_callbacks.popleft()
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error in variable change callback: {e}")
+    
+    def join(self) -> None:
+        """Block until every request made so far has been applied"""
+        if not self.batch_mode:
+            self.request_queue.join()
+            return
+        with self.inbox_condition:
+            self.inbox_condition.wait_for(lambda: not self.inbox and not self.batch_active)
+    
     def _apply_change(self, request: VarChangeRequest) -> None:
         """Apply the requested variable change"""
         try:
@@ -109,7 +193,7 @@ class ThreadedVarHandler:
             elif request.change_type == VarChangeType.CUSTOM:
                 # Custom operations should be provided as callable values
                 if callable(request.value):
-                    current_value = handler_vars.vars_getMe(request.var_name)
+                    current_value = handler_vars.vars_getLive(request.var_name)
                     new_value = request.value(current_value)
                     handler_vars.vars_setMe(request.var_name, new_value)
         
@@ -123,10 +207,16 @@ class ThreadedVarHandler:
     
     def get_queue_size(self) -> int:
         """Get the current size of the request queue"""
+        if self.batch_mode:
+            return len(self.inbox)
         return self.request_queue.qsize()
     
     def clear_queue(self) -> None:
         """Clear all pending requests"""
+        if self.batch_mode:
+            with self.inbox_condition:
+                self.inbox = []
+            return
         while not self.request_queue.empty():
             try:
                 self.request_queue.get_nowait()
@@ -137,9 +227,44 @@ class ThreadedVarHandler:
 # Global threaded var handler instance
 var_handler = None
 
-def get_var_handler() -> ThreadedVarHandler:
-    """Get the global threaded var handler instance"""
+def get_var_handler(batch_mode: bool = False) -> ThreadedVarHandler:
+    """Get the global threaded var handler instance; batch_mode only applies when it is first created"""
     global var_handler
     if var_handler is None:
-        var_handler = ThreadedVarHandler()
+        var_handler = ThreadedVarHandler(batch_mode)
     return var_handler
+
+def dispatch_callbacks() -> None:
+    """Per-frame hook; runs batch mode callbacks if the global handler exists"""
+    if var_handler is not None and var_handler.batch_mode:
+        var_handler.dispatch_callbacks()
+
+def benchmark_throughput(producers: int = 8, requests_per_producer: int = 5000) -> None:
+    """Many producer threads hammering ADDs on a few variables, one-at-a-time vs batch mode"""
+    names = ["gold", "ore", "health", "magic"]
+    total = producers * requests_per_producer
+    for batch_mode in (False, True):
+        handler_vars.setup_ints()
+        start_values = [handler_vars.vars_getLive(name) for name in names]
+        handler = ThreadedVarHandler(batch_mode)
+        
+        def produce(offset):
+            for x in range(requests_per_producer):
+                handler.request_change(names[(offset + x) % len(names)], 1, VarChangeType.ADD)
+        
+        threads = [threading.Thread(target=produce, args=(x,)) for x in range(producers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        handler.join()
+        elapsed = time.perf_counter() - start
+        handler.stop()
+        
+        applied = sum(handler_vars.vars_getLive(name) - value for name, value in zip(names, start_values))
+        label = "batch" if batch_mode else "one at a time"
+        print(f"{label:>13}: {total / elapsed:12,.0f} requests/s ({producers} producers, {applied}/{total} applied)")
+
+if __name__ == "__main__":
+    benchmark_throughput()
@@ -1,5 +1,10 @@
 import handler_game
+import handler_achievements
+import handler_config
+import handler_pathfinding
 import handler_vars
+import handler_vars_save
+import handler_vars_threading
 from handler_input import EventManager, InputPriority, InputEvent, InputSource
 from handler_observer import EventSubject, GameObserver, ObserverPriority
 import handler_gui_sizing
@@ -66,6 +71,8 @@ def start():
     # Initialize game state
     flag_isRunningApplication = True
     handler_vars.clear_appStart() # this is different than the "clear" we do at the start of a new game
+    parse_customization_file() # fails fast here if main_customize has a malformed entry
+    handler_achievements.get_achievement_tracker() # compiles thisgame_achievements and starts watching the variables they read
 
     # Initialize coroutine that runs once per second
     global timer_coroutine_1sec
@@ -101,6 +108,17 @@ def update():
         handler_game.thisWindow.clear_screen((0, 0, 0))  # Clear screen with black color
         handler_game.thisWindow.update_display()
 
+        # Completion callbacks from background saves run here, on the main thread
+        handler_vars_save.dispatch_completed()
+        # Callbacks for batched variable changes are delivered at frame end, also on the main thread
+        handler_vars_threading.dispatch_callbacks()
+        # Path requests are searched within their frame budget; finished ones call back here
+        handler_pathfinding.update_paths()
+        # Achievements unlocked by this frame's writes are announced once, here
+        handler_achievements.dispatch_unlocks()
+        # Publish this frame's variables; lock-free readers (vars_getMe, vars_getFlag) see them until the next publish
+        handler_vars.vars_publish()
+
         # Maintain consistent frame rate of 60 FPS
         clock.tick(60)
 
@@ -192,10 +210,13 @@ def handle_game_input(event):
             ))
 
 # THIS FUNCTION READS THE SETTINGS IN main_customize.py AND SETS THE VARIABLES
+# THE TABLES ARE COMPILED (OR LOADED FROM cache/) BY handler_config, WHICH RAISES ConfigError ON THE FIRST MALFORMED ENTRY
 def parse_customization_file():
-    for entry in main_customize.thisgame_application:
-        key, value = entry.split("::")
-        handler_vars.set(key, value)
+    config = handler_config.get_config()
+    for setting_id, value in config.application.items():
+        if handler_vars.returnVarKind(setting_id) != -1:
+            handler_vars.vars_setMe(setting_id, value)
+    return config
 
 if __name__ == "__main__":
     start()
@@ -1,7 +1,7 @@
 # CONFIG FILE
 # ALL VARIABLES ARE INTEGERS
 # group= defines a category of variables, so that if you need to iterate through all variables of a certain type, the system has already separated them
-# id= defines the identification name of a variable; no duplicates; used with vars_getMe, vars_addMe, and vars_setMe
+# id= defines the identification name of a variable; no duplicates; used with vars_getMe, vars_addMe, and vars_setMe (vars_getMe reads the frame published by vars_publish)
 # type= defines the type of a variable; must be identical to a defined group name
 # value= defines the starting value of a variable at the beginning of a new game
 
@@ -39,7 +39,7 @@ thisgame_audio_music = (
 )
 
 thisgame_audio_sfx = (
-    "id=thump::file=audio/sfx/thump.wav"
+    "id=thump::file=audio/sfx/thump.wav",
 )
 
 thisGame_collectables = (
@@ -72,9 +72,9 @@ thisGame_currencies = (
 )
 
 thisGame_dialogs = (
-    "id=loadingScreen::dialog/loadingScreen.json",
-    "id=newGame1::dialog/newgame1.json",
-    "id=day01::dialog/day01.json"
+    "id=loadingScreen::file=dialog/loadingScreen.json",
+    "id=newGame1::file=dialog/newgame1.json",
+    "id=day01::file=dialog/day01.json"
 )
 
 thisGame_enemies = (
@@ -131,6 +131,30 @@ thisGame_locations = (
     "id=level01::type=level::file=level1.json"
 )
 
+# LOOT TABLES: group= IS AN ENEMY GROUP FROM thisGame_enemies, default (ENEMIES WITHOUT A TABLE OF THEIR OWN)
+# OR itemType (THE ODDS USED BY handler_items.returnRandomItemType)
+# drop= IS AN ITEM TYPE, AN ITEM NAME, A CURRENCY ID OR nothing; weight= IS ITS CHANCE RELATIVE TO THE REST OF THE GROUP
+# A LINE WITH ONLY group= AND rolls= SETS HOW MANY DRAWS ONE DEATH MAKES (1 IF NOT GIVEN)
+thisGame_lootTables = (
+    "group=itemType::drop=armor::weight=14",
+    "group=itemType::drop=ore::weight=20",
+    "group=itemType::drop=weapon::weight=20",
+    "group=itemType::drop=currency::weight=46",
+    "group=default::drop=nothing::weight=60",
+    "group=default::drop=currency::weight=40",
+    "group=zombie::drop=nothing::weight=70",
+    "group=zombie::drop=currency_scrap::weight=25",
+    "group=zombie::drop=aluminum::weight=5",
+    "group=pirate::drop=nothing::weight=40",
+    "group=pirate::drop=currency_gold::weight=40",
+    "group=pirate::drop=dagger::weight=12",
+    "group=pirate::drop=sword::weight=8",
+    "group=taxman::rolls=3",
+    "group=taxman::drop=currency_gold::weight=60",
+    "group=taxman::drop=diamond::weight=25",
+    "group=taxman::drop=chestplate::weight=15"
+)
+
 thisGame_npcs = (
     "group=cityfolk",
     "group=vendor",
@@ -175,9 +199,9 @@ thisGame_stats = (
 thisGame_statusEffects_buffs = (
     "id=heal::duration=10::instant=5",
     "id=regen::duration=10::ps=1",
-    "id=shield::duration=10::instant=8",
+    "id=shield::duration=10::instant=8::stat=shield",
     "id=hidden::duration=10",
-    "id=armor::duration=10::instant=15"
+    "id=armor::duration=10::instant=15::stat=armor"
 )
 
 thisGame_statusEffects_debuffs = (